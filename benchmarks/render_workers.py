@@ -0,0 +1,102 @@
+"""Benchmark serial vs thread-pool rendering of the leaflet script.
+
+Builds a map with many independent feature groups, each holding GeoJson
+layers and markers, and times ``generate_leaflet_string`` with 1, 4 and 8
+workers. The script cache is cleared before every run so that rendering,
+not cache lookups, is measured. Run from the repository root::
+
+    python benchmarks/render_workers.py [--groups 32] [--layers 20] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import sysconfig
+import time
+
+import folium
+
+import streamlit_folium
+from streamlit_folium import generate_leaflet_string
+
+WORKERS = (1, 4, 8)
+# folium's random element ids that the renderer leaves alone (popup html)
+_RANDOM_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def build_map(groups: int, layers: int) -> folium.Map:
+    m = folium.Map(location=[40, -90], zoom_start=4)
+    for g in range(groups):
+        fg = folium.FeatureGroup(name=f"group {g}").add_to(m)
+        for i in range(layers):
+            lat, lon = 30 + g * 0.5, -120 + i * 0.5
+            folium.GeoJson(
+                {
+                    "type": "Polygon",
+                    "coordinates": [
+                        [
+                            [lon, lat],
+                            [lon + 0.4, lat],
+                            [lon + 0.4, lat + 0.4],
+                            [lon, lat + 0.4],
+                            [lon, lat],
+                        ]
+                    ],
+                },
+                style_function=lambda _: {"color": "#1100f8", "weight": 1},
+                tooltip=f"{g}-{i}",
+            ).add_to(fg)
+            folium.Marker([lat, lon], popup=f"<b>{g}-{i}</b>").add_to(fg)
+    folium.LayerControl().add_to(m)
+    m.get_root().render()
+    return m
+
+
+def run(groups: int, layers: int, workers: int) -> tuple[float, str]:
+    m = build_map(groups, layers)
+    streamlit_folium._clear_script_cache()
+    start = time.perf_counter()
+    leaflet = generate_leaflet_string(m, workers=workers)
+    return time.perf_counter() - start, _RANDOM_ID.sub("<id>", leaflet)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=32)
+    parser.add_argument("--layers", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    print(
+        f"Python {sys.version.split()[0]}"
+        f"{' (free-threaded)' if free_threaded else ''}, {os.cpu_count()} CPUs, "
+        f"{args.groups} groups x {args.layers} layers"
+    )
+    baseline = None
+    reference = None
+    for workers in WORKERS:
+        timings = []
+        for _ in range(args.repeat):
+            elapsed, leaflet = run(args.groups, args.layers, workers)
+            timings.append(elapsed)
+            if reference is None:
+                reference = leaflet
+            elif leaflet != reference:
+                print(f"workers={workers}: output differs from serial")
+                return 1
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(
+            f"workers={workers}: median {median * 1000:7.1f} ms"
+            f"  speedup {baseline / median:4.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
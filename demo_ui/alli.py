@@ -0,0 +1,292 @@
+"""Streaming client for the Alli app ``/run`` endpoint.
+
+The pages used to wait for the complete agent response (``mode: sync`` or
+``mode: background`` plus polling). :class:`AlliClient.stream` instead asks for
+``mode: stream`` and yields chat events as soon as the server flushes them, so
+partial answers can be rendered with ``st.write_stream``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, cast
+
+from demo_ui.http_client import HttpClient
+
+ALLI_BASE_URL = os.environ.get("ALLI_BASE_URL", "https://backend.alli.ai")
+ALLI_API_KEY = os.environ.get("ALLI_API_KEY")
+
+# Alli app ids used by the demo pages, overridable per deployment
+ALLI_APPS = {
+    "invoice_reconciliation": os.environ.get(
+        "ALLI_APP_INVOICE_RECONCILIATION",
+        "TExNQXBwOjY5OWQzZmNjMWEzMTQ0Zjc2N2ZlMTg5MA==",
+    ),
+    "supplier_risk": os.environ.get(
+        "ALLI_APP_SUPPLIER_RISK", "TExNQXBwOjY5OTQyM2M0ZjgyNTQ2MTVkM2RhYzMxYg=="
+    ),
+    "audit_manager": os.environ.get(
+        "ALLI_APP_AUDIT_MANAGER", "TExNQXBwOjY5OTNmNzY1NGIwODRkM2FiNzVhNjY1Nw=="
+    ),
+}
+
+_http_client: HttpClient | None = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """The process-wide pooled client for the Alli backend."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            if not ALLI_API_KEY:
+                raise RuntimeError(
+                    "ALLI_API_KEY is not set; export the Alli API key before "
+                    "starting the app"
+                )
+            _http_client = HttpClient(ALLI_BASE_URL, headers={"API-KEY": ALLI_API_KEY})
+        return _http_client
+
+
+@dataclass
+class ChatEvent:
+    """A single event received from the stream."""
+
+    event: str
+    data: dict[str, Any]
+
+    @property
+    def conversation_id(self) -> str:
+        result = self.data.get("result")
+        if isinstance(result, dict):
+            conversation = result.get("conversation") or {}
+            if conversation.get("id"):
+                return conversation["id"]
+        conversation = self.data.get("conversation")
+        if isinstance(conversation, dict) and conversation.get("id"):
+            return conversation["id"]
+        return self.data.get("conversationId", "") or ""
+
+    @property
+    def chats(self) -> list[dict[str, Any]]:
+        """Chat objects carried by this event, whatever envelope they came in."""
+        result = self.data.get("result")
+        if isinstance(result, dict) and isinstance(result.get("responses"), list):
+            return result["responses"]
+        if isinstance(self.data.get("chats"), list):
+            return self.data["chats"]
+        if "sender" in self.data or "message" in self.data:
+            return [self.data]
+        return []
+
+
+def iter_sse(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """
+    Parse server-sent events from an iterable of decoded lines, yielding
+    ``(event, data)`` pairs.
+
+    Lines that are not SSE fields but look like JSON documents are treated as
+    chunked JSON (one document per line) and dispatched immediately.
+    """
+    event = "message"
+    data: list[str] = []
+    for line in lines:
+        if line == "":
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        field, sep, value = line.partition(":")
+        if sep and field in ("event", "data", "id", "retry"):
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+            continue
+        if line.lstrip().startswith(("{", "[")):
+            yield "message", line
+    if data:
+        yield event, "\n".join(data)
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[ChatEvent]:
+    """Decode the JSON payload of every SSE message, skipping keep-alives."""
+    for event, raw in iter_sse(lines):
+        if raw.strip() in ("", "[DONE]"):
+            continue
+        try:
+            payload = json.loads(raw)
+        except json.JSONDecodeError:
+            payload = {"delta": raw}
+        if isinstance(payload, dict):
+            yield ChatEvent(event, payload)
+
+
+class ChatStream:
+    """
+    Iterate over the text produced by a stream of :class:`ChatEvent`.
+
+    Iterating yields text increments (suitable for ``st.write_stream``). While
+    doing so the stream records the conversation id and the latest version of
+    each chat so callers can inspect the full responses afterwards.
+    """
+
+    def __init__(self, events: Iterable[ChatEvent]):
+        self._events = events
+        self.conversation_id = ""
+        self.responses: dict[str, dict[str, Any]] = {}
+
+    def __iter__(self) -> Iterator[str]:
+        emitted: dict[str, str] = {}
+        for event in self._events:
+            self.conversation_id = event.conversation_id or self.conversation_id
+            delta = event.data.get("delta") or event.data.get("token")
+            if isinstance(delta, str):
+                yield delta
+                continue
+            for idx, chat in enumerate(event.chats):
+                chat_id = chat.get("id") or f"{event.event}_{idx}"
+                self.responses[chat_id] = chat
+                if chat.get("sender") != "BOT":
+                    continue
+                message = chat.get("message") or ""
+                previous = emitted.get(chat_id)
+                if previous is None:
+                    emitted[chat_id] = message
+                    if message:
+                        yield message if len(emitted) == 1 else "\n" + message
+                elif message.startswith(previous) and message != previous:
+                    emitted[chat_id] = message
+                    yield message[len(previous) :]
+
+    @property
+    def bot_messages(self) -> list[str]:
+        return [
+            chat.get("message", "")
+            for chat in self.responses.values()
+            if chat.get("sender") == "BOT" and chat.get("message")
+        ]
+
+
+class AlliClient:
+    """Client for one Alli app, sending every request through a pooled
+    :class:`~demo_ui.http_client.HttpClient`."""
+
+    def __init__(self, app_id: str, http: HttpClient | None = None):
+        self.app_id = app_id
+        self.http = http or get_http_client()
+
+    @classmethod
+    def for_app(cls, name: str, http: HttpClient | None = None) -> AlliClient:
+        """Client for one of the apps registered in :data:`ALLI_APPS`."""
+        return cls(ALLI_APPS[name], http=http)
+
+    @property
+    def run_path(self) -> str:
+        return f"/webapi/apps/{self.app_id}/run"
+
+    def run(
+        self,
+        payload: dict[str, Any],
+        files: dict[str, tuple] | None = None,
+        **kwargs,
+    ) -> dict[str, Any]:
+        """Run the app with a raw payload and return the decoded response."""
+        if files:
+            request = {"data": {"json": json.dumps(payload)}, "files": files}
+        else:
+            request = {"json": payload}
+        response = self.http.post("run", self.run_path, **request, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def start_conversation(self) -> str:
+        """Open a stateful conversation with an empty message and return its id."""
+        data = self.run(
+            {
+                "mode": "sync",
+                "isStateful": True,
+                "chat": {"message": ""},
+                "conversationId": "",
+            }
+        )
+        return ChatEvent("response", data).conversation_id
+
+    def ask(self, message: str, conversation_id: str) -> list[dict[str, Any]]:
+        """Send ``message`` in ``sync`` mode and return the chats of the answer."""
+        data = self.run(
+            {
+                "mode": "sync",
+                "isStateful": True,
+                "chat": {"message": message},
+                "conversationId": conversation_id,
+            }
+        )
+        return ChatEvent("response", data).chats
+
+    def stream(
+        self,
+        message: str,
+        conversation_id: str = "",
+        inputs: dict[str, Any] | None = None,
+        files: dict[str, tuple] | None = None,
+        is_stateful: bool = True,
+        timeout: tuple[float, float] | None = None,
+    ) -> Iterator[ChatEvent]:
+        """
+        Start a run in ``stream`` mode and yield events as they arrive.
+
+        ``timeout`` is ``(connect, read)``; the read timeout applies between
+        chunks rather than to the whole response.
+        """
+        payload: dict[str, Any] = {
+            "mode": "stream",
+            "isStateful": is_stateful,
+            "chat": {"message": message},
+            "conversationId": conversation_id,
+        }
+        if inputs:
+            payload["inputs"] = inputs
+        if files:
+            request = {"data": {"json": json.dumps(payload)}, "files": files}
+        else:
+            request = {"json": payload}
+        if timeout is not None:
+            request["timeout"] = timeout
+
+        with self.http.post(
+            "run",
+            self.run_path,
+            headers={"Accept": "text/event-stream"},
+            stream=True,
+            **request,
+        ) as response:
+            response.raise_for_status()
+            # event streams are always UTF-8, whatever the content type says
+            response.encoding = "utf-8"
+            lines = cast(Iterator[str], response.iter_lines(decode_unicode=True))
+            yield from iter_events(lines)
+
+    def stream_chat(self, message: str, **kwargs) -> ChatStream:
+        """Shorthand for ``ChatStream(self.stream(message, **kwargs))``."""
+        return ChatStream(self.stream(message, **kwargs))
+
+    def chats(self, conversation_id: str) -> dict[str, Any]:
+        response = self.http.get(
+            "chats", f"/webapi/v2/conversations/{conversation_id}/chats"
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def is_running(self, conversation_id: str) -> bool:
+        response = self.http.get(
+            "running", f"/webapi/v2/conversations/{conversation_id}/running"
+        )
+        response.raise_for_status()
+        return response.json().get("isRunning", False)
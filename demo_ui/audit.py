@@ -0,0 +1,71 @@
+"""Parsing of the audit manager agent's responses.
+
+The agent answers an expense id with BOT messages, the last of which embeds
+the violations it found as a Python dict literal::
+
+    ... {'success': True, 'columns': [...], 'rows': [[...], ...]}
+
+Page 03 and the batch scorer in :mod:`demo_ui.risk_scoring` both read it
+through the helpers here.
+"""
+
+from __future__ import annotations
+
+import ast
+from typing import Any
+
+_VIOLATION_MARKERS = ("{'success'", '{"success"')
+
+
+def bot_messages(responses: list[dict[str, Any]]) -> list[str]:
+    """Non-empty BOT messages in order, each chat id counted once."""
+    seen: set[str] = set()
+    messages = []
+    for response in responses:
+        if response.get("sender") != "BOT":
+            continue
+        chat_id = response.get("id", "")
+        message = response.get("message", "")
+        if message and chat_id not in seen:
+            seen.add(chat_id)
+            messages.append(message)
+    return messages
+
+
+def last_bot_message(responses: list[dict[str, Any]]) -> str:
+    for response in reversed(responses):
+        if response.get("sender") == "BOT":
+            return response.get("message", "")
+    return ""
+
+
+def parse_violation_data(message: str) -> dict[str, Any] | None:
+    """
+    The violation dict embedded in ``message``, or ``None`` if there is none.
+
+    Raises ``ValueError`` or ``SyntaxError`` when the dict is present but is
+    not a valid literal.
+    """
+    starts = [message.find(marker) for marker in _VIOLATION_MARKERS]
+    starts = [start for start in starts if start != -1]
+    if not starts:
+        return None
+    text = message[min(starts) :]
+
+    depth = 0
+    for idx, char in enumerate(text):
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                data = ast.literal_eval(text[: idx + 1])
+                return data if isinstance(data, dict) else None
+    return None
+
+
+def risk_score(violation_data: dict[str, Any] | None) -> int:
+    """Number of violations the agent reported; 0 when it reported none."""
+    if not violation_data or not violation_data.get("success"):
+        return 0
+    return len(violation_data.get("rows") or [])
@@ -0,0 +1,132 @@
+"""Durable store for audit agent results.
+
+Page 03 kept audit results, conversation ids and the "review complete" flag
+in ``st.session_state``, so a reload, or a second auditor opening the same
+expense, ran the whole agent analysis again. :class:`AuditResultStore` keeps
+them in a local SQLite file instead, keyed by expense id and a hash of the
+expense row, so a result is reused until the expense itself changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from demo_ui.singleflight import SingleFlight
+
+STORE_PATH = Path(
+    os.environ.get(
+        "AUDIT_STORE_PATH",
+        Path(__file__).resolve().parent.parent / ".cache" / "audit_results.sqlite3",
+    )
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_results (
+    expense_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    record TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (expense_id, version)
+)
+"""
+
+
+def content_version(expense: dict[str, Any] | None) -> str:
+    """Stable hash of an expense row; changes whenever any column changes."""
+    encoded = json.dumps(expense or {}, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+class AuditResultStore:
+    """
+    SQLite-backed results keyed by ``(expense_id, version)``.
+
+    :meth:`get_or_compute` runs ``compute`` at most once per key at a time in
+    this process: concurrent callers for the same key wait for the first one
+    and share its result.
+    """
+
+    def __init__(self, path: Path = STORE_PATH):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._flight = SingleFlight()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # one connection per thread; Streamlit runs each session in its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, expense_id: str, version: str) -> dict[str, Any] | None:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT record FROM audit_results WHERE expense_id = ? AND version = ?",
+                (expense_id, version),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def put(self, expense_id: str, version: str, record: dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO audit_results VALUES (?, ?, ?, ?)",
+                (
+                    expense_id,
+                    version,
+                    json.dumps(record, ensure_ascii=False, default=str),
+                    time.time(),
+                ),
+            )
+
+    def get_or_compute(
+        self,
+        expense_id: str,
+        version: str,
+        compute: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        """The stored record, or ``compute()``'s result after storing it."""
+        stored = self.get(expense_id, version)
+        if stored is not None:
+            return stored
+
+        def load() -> dict[str, Any]:
+            record = self.get(expense_id, version)
+            if record is None:
+                record = compute()
+                self.put(expense_id, version, record)
+            return record
+
+        computed, _ = self._flight.do((expense_id, version), load)
+        return computed
+
+    def snapshot(self) -> dict[str, int]:
+        """Coalescing counters of :meth:`get_or_compute`."""
+        return self._flight.snapshot()
+
+
+_store: AuditResultStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_audit_store() -> AuditResultStore:
+    """The process-wide store at :data:`STORE_PATH`."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AuditResultStore()
+        return _store
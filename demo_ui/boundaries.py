@@ -0,0 +1,147 @@
+"""Local store of US state boundaries.
+
+The state page used to download ``us-states.json`` from GitHub on every cold
+process and scan its features by name. :class:`BoundaryStore` reads a compact
+file shipped next to the pages instead: an uncompressed Arrow IPC file with
+one row per state, memory-mapped so opening it costs no parse and only the
+rows actually used are touched. Zoom-dependent simplification is left to
+``streamlit_folium.MultiResolutionGeoJson``. The file is never downloaded at
+runtime; without it the page still starts, just without state outlines.
+Build (or rebuild) it, which needs network access once, and ship it with the
+app::
+
+    python -m demo_ui.boundaries [--source URL_OR_PATH] [--output PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import requests
+
+logger = logging.getLogger(__name__)
+
+SOURCE_URL = "https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json"
+STORE_PATH = Path(__file__).resolve().parent.parent / "pages" / "us_states.arrow"
+
+SCHEMA = pa.schema(
+    [
+        ("name", pa.string()),
+        ("properties", pa.string()),
+        ("geometry", pa.string()),
+    ]
+)
+
+
+def build_store(
+    data: dict,
+    path: Path = STORE_PATH,
+    name_property: str = "name",
+) -> int:
+    """Write a FeatureCollection to ``path``; returns the row count."""
+    rows: dict[str, list] = {field: [] for field in SCHEMA.names}
+    for feature in sorted(
+        data["features"], key=lambda f: f["properties"][name_property]
+    ):
+        rows["name"].append(feature["properties"][name_property])
+        rows["properties"].append(json.dumps(feature["properties"], ensure_ascii=False))
+        rows["geometry"].append(json.dumps(feature["geometry"], separators=(",", ":")))
+    table = pa.table(rows, schema=SCHEMA)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+        writer.write_table(table)
+    tmp.replace(path)
+    return table.num_rows
+
+
+class BoundaryStore:
+    """Name -> feature lookups over a file written by :func:`build_store`."""
+
+    def __init__(self, path: Path = STORE_PATH):
+        self.path = path
+        self._table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        self._rows = {
+            name: row for row, name in enumerate(self._table.column("name").to_pylist())
+        }
+        self._features: dict[int, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def names(self) -> list[str]:
+        return list(self._rows)
+
+    def feature(self, name: str) -> dict[str, Any]:
+        """GeoJSON Feature for ``name``; raises ``KeyError`` for an unknown name."""
+        row = self._rows[name]
+        with self._lock:
+            feature = self._features.get(row)
+        if feature is None:
+            feature = {
+                "type": "Feature",
+                "properties": json.loads(self._table["properties"][row].as_py()),
+                "geometry": json.loads(self._table["geometry"][row].as_py()),
+            }
+            with self._lock:
+                self._features[row] = feature
+        return feature
+
+    def feature_collection(self, name: str) -> dict:
+        return {"type": "FeatureCollection", "features": [self.feature(name)]}
+
+
+def _load_source(source: str) -> dict:
+    if source.startswith(("http://", "https://")):
+        response = requests.get(source, timeout=(10, 60))
+        response.raise_for_status()
+        return response.json()
+    return json.loads(Path(source).read_text(encoding="utf-8"))
+
+
+_store: BoundaryStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_boundary_store() -> BoundaryStore | None:
+    """
+    The process-wide store, read from the file shipped at :data:`STORE_PATH`,
+    or ``None`` if it was not deployed; it is never downloaded at runtime.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            if not STORE_PATH.exists():
+                logger.warning(
+                    "%s is missing; build it with `python -m demo_ui.boundaries` "
+                    "and deploy it with the app",
+                    STORE_PATH,
+                )
+                return None
+            _store = BoundaryStore(STORE_PATH)
+        return _store
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SOURCE_URL)
+    parser.add_argument("--output", type=Path, default=STORE_PATH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    rows = build_store(_load_source(args.source), args.output)
+    logger.info("%s written: %d rows", args.output, rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""Content-addressed store for the HTML canvas reports produced by agents.
+
+A canvas can be several MB and used to be kept verbatim in session state for
+every user. It is now written once to disk under its content hash, and the
+session only holds the key; the process keeps a gzip-compressed copy, bounded
+in total size, so rendering it with ``components.html`` rarely touches disk.
+
+The report is not embedded by URL: Streamlit's static file handler serves
+``.html`` as ``text/plain`` with ``nosniff``, so an iframe shows its source.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import html
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "canvas"
+
+MAX_CANVAS_BYTES = 20 * 1024 * 1024
+MAX_FILES = 200
+MAX_MEMORY_BYTES = 32 * 1024 * 1024
+
+_DOCUMENT = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body style="margin: 0;">
+<div style="background-color: white; color: black; padding: 20px; border-radius: 10px;">{body}</div>
+</body></html>
+"""
+
+
+class CanvasTooLargeError(ValueError):
+    pass
+
+
+class CanvasStore:
+    def __init__(
+        self,
+        root: Path,
+        max_canvas_bytes: int = MAX_CANVAS_BYTES,
+        max_files: int = MAX_FILES,
+        max_memory_bytes: int = MAX_MEMORY_BYTES,
+    ):
+        self.root = root
+        self.max_canvas_bytes = max_canvas_bytes
+        self.max_files = max_files
+        self.max_memory_bytes = max_memory_bytes
+        self._compressed: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.html"
+
+    def put(self, body: str, title: str = "Report") -> str:
+        """Store a canvas and return its key; storing the same canvas again is free."""
+        document = _DOCUMENT.format(title=html.escape(title), body=body).encode()
+        if len(document) > self.max_canvas_bytes:
+            raise CanvasTooLargeError(
+                f"canvas is {len(document):,} bytes, limit {self.max_canvas_bytes:,}"
+            )
+        key = hashlib.sha256(document).hexdigest()[:32]
+
+        with self._lock:
+            path = self._path(key)
+            if not path.exists():
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(document)
+                tmp.replace(path)
+                self._prune_files()
+            self._remember(key, gzip.compress(document))
+        return key
+
+    def get(self, key: str) -> str | None:
+        """The stored document, from memory if possible, else from disk."""
+        with self._lock:
+            compressed = self._compressed.get(key)
+            if compressed is not None:
+                self._compressed.move_to_end(key)
+                return gzip.decompress(compressed).decode()
+        path = self._path(key)
+        return path.read_text(encoding="utf-8") if path.exists() else None
+
+    def _remember(self, key: str, compressed: bytes) -> None:
+        if key in self._compressed:
+            self._compressed.move_to_end(key)
+            return
+        self._compressed[key] = compressed
+        self._memory_bytes += len(compressed)
+        while self._memory_bytes > self.max_memory_bytes and len(self._compressed) > 1:
+            _, evicted = self._compressed.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _prune_files(self) -> None:
+        files = sorted(self.root.glob("*.html"), key=lambda p: p.stat().st_mtime)
+        for path in files[: max(0, len(files) - self.max_files)]:
+            path.unlink(missing_ok=True)
+
+
+_store: CanvasStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_canvas_store() -> CanvasStore:
+    """The process-wide store, writing under ``.cache/canvas``."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CanvasStore(CACHE_DIR)
+        return _store
@@ -0,0 +1,185 @@
+"""Pre-created Alli conversations.
+
+Opening a stateful conversation costs a full agent round trip (an empty
+``sync`` run), which page 03 used to pay on every row click before sending the
+expense id. :class:`ConversationPool` opens conversations ahead of time on a
+background thread, so a click only waits for the call that matters.
+
+The pool only refills while the page is in use: once nothing has been acquired
+for ``idle_timeout`` seconds it lets its ids expire instead of replacing them,
+and a failing backend is retried with capped exponential backoff.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from demo_ui.alli import AlliClient
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("ALLI_CONVERSATION_POOL_SIZE", "4"))
+# conversations older than this are not handed out; the server may expire them
+MAX_AGE = float(os.environ.get("ALLI_CONVERSATION_MAX_AGE", "600"))
+# stop replacing expired ids when nothing was acquired for this long
+IDLE_TIMEOUT = float(os.environ.get("ALLI_CONVERSATION_IDLE_TIMEOUT", "900"))
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0
+    misses: int = 0
+    created: int = 0
+    expired: int = 0
+    failures: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ConversationPool:
+    """
+    Keeps up to ``size`` fresh conversation ids created by ``factory``.
+
+    :meth:`acquire` hands out a pooled id (a hit) or, when the pool is empty,
+    creates one synchronously (a miss); either way the refill thread is woken
+    to top the pool back up. Each id is handed out at most once. Starting the
+    pool counts as demand, so a page can warm it up before the first click.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], str],
+        size: int = POOL_SIZE,
+        max_age: float = MAX_AGE,
+        idle_timeout: float = IDLE_TIMEOUT,
+        retry_delay: float = RETRY_DELAY,
+        max_retry_delay: float = MAX_RETRY_DELAY,
+    ):
+        self.factory = factory
+        self.size = size
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.stats = PoolStats()
+        self._ready: deque[tuple[float, str]] = deque()
+        self._last_demand = time.monotonic()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> ConversationPool:
+        with self._cond:
+            self._last_demand = time.monotonic()
+            if self._thread is None and self.size > 0:
+                self._thread = threading.Thread(
+                    target=self._refill, name="conversation-pool", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def acquire(self) -> str:
+        with self._cond:
+            self._last_demand = time.monotonic()
+            self._drop_expired()
+            if self._ready:
+                self.stats.hits += 1
+                _, conversation_id = self._ready.popleft()
+                self._cond.notify_all()
+                return conversation_id
+            self.stats.misses += 1
+            self._cond.notify_all()
+        return self.factory()
+
+    def available(self) -> int:
+        with self._cond:
+            self._drop_expired()
+            return len(self._ready)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._cond:
+            return {
+                **asdict(self.stats),
+                "hit_rate": self.stats.hit_rate,
+                "available": len(self._ready),
+            }
+
+    def _drop_expired(self) -> None:
+        cutoff = time.monotonic() - self.max_age
+        while self._ready and self._ready[0][0] < cutoff:
+            self._ready.popleft()
+            self.stats.expired += 1
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self._last_demand > self.idle_timeout
+
+    def _wait_for_demand(self) -> None:
+        """Block until the pool is closed or should create another id."""
+        while not self._closed:
+            self._drop_expired()
+            if self._idle():
+                # acquire() notifies when demand comes back
+                self._cond.wait()
+            elif len(self._ready) >= self.size:
+                # wake up in time to replace the oldest id before it expires
+                timeout = self._ready[0][0] + self.max_age - time.monotonic()
+                self._cond.wait(timeout=max(timeout, 0.01))
+            else:
+                return
+
+    def _backoff(self, failures: int) -> None:
+        delay = min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay)
+        deadline = time.monotonic() + delay
+        while not self._closed and (remaining := deadline - time.monotonic()) > 0:
+            self._cond.wait(timeout=remaining)
+
+    def _refill(self) -> None:
+        failures = 0
+        while True:
+            with self._cond:
+                self._wait_for_demand()
+                if self._closed:
+                    return
+            try:
+                conversation_id = self.factory()
+            except Exception:
+                logger.warning("could not pre-create a conversation", exc_info=True)
+                conversation_id = ""
+            with self._cond:
+                if conversation_id:
+                    self._ready.append((time.monotonic(), conversation_id))
+                    self.stats.created += 1
+                    failures = 0
+                    continue
+                self.stats.failures += 1
+                failures += 1
+                self._backoff(failures)
+
+
+_pools: dict[str, ConversationPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_conversation_pool(app: str, size: int = POOL_SIZE) -> ConversationPool:
+    """The process-wide, already started pool for an app in ``ALLI_APPS``."""
+    with _pools_lock:
+        if app not in _pools:
+            alli = AlliClient.for_app(app)
+            _pools[app] = ConversationPool(alli.start_conversation, size=size).start()
+        return _pools[app]
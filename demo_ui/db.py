@@ -0,0 +1,112 @@
+"""Pooled PostgreSQL access for the demo pages.
+
+Opening a TLS connection to Azure Postgres costs far more than the queries the
+pages run, so connections are kept in a process-wide pool and handed out per
+query. Every connection uses ``RealDictCursor`` so rows come back as dicts.
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import pandas as pd
+import psycopg2
+import pyarrow.csv as pa_csv
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+CONNECT_KWARGS = ("host", "port", "user", "password", "database", "sslmode")
+
+
+class Database:
+    def __init__(
+        self,
+        config: dict[str, Any],
+        minconn: int = 1,
+        maxconn: int = 10,
+        connect_timeout: int = 10,
+    ):
+        kwargs = {k: v for k, v in config.items() if k in CONNECT_KWARGS}
+        self._pool = ThreadedConnectionPool(
+            minconn,
+            maxconn,
+            connect_timeout=connect_timeout,
+            cursor_factory=RealDictCursor,
+            **kwargs,
+        )
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg2.extensions.connection]:
+        """
+        Borrow a connection in autocommit mode. Connections that fail with a
+        connection-level error are discarded instead of returned to the pool.
+        """
+        conn = self._pool.getconn()
+        broken = False
+        try:
+            conn.autocommit = True
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._pool.putconn(conn, close=broken or conn.closed != 0)
+
+    @contextmanager
+    def cursor(self) -> Iterator[RealDictCursor]:
+        with self.connection() as conn, conn.cursor() as cursor:
+            yield cursor
+
+    def fetch_all(self, query: str, params: Any = None) -> list[dict[str, Any]]:
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def fetch_one(self, query: str, params: Any = None) -> dict[str, Any] | None:
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            return dict(row) if row is not None else None
+
+    def fetch_frame(
+        self, query: str, params: Any = None, column_types: dict | None = None
+    ) -> pd.DataFrame:
+        """
+        Run ``query`` through ``COPY ... TO STDOUT`` and parse the CSV stream
+        straight into columns with pyarrow, without building a Python object
+        per row. ``column_types`` maps column names to pyarrow types; text
+        columns that may look numeric (ids) should be listed as ``pa.string()``.
+        """
+        buffer = io.BytesIO()
+        with self.cursor() as cursor:
+            sql = cursor.mogrify(query, params).decode()
+            cursor.copy_expert(
+                f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer
+            )
+        buffer.seek(0)
+        table = pa_csv.read_csv(
+            buffer,
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types or {}, strings_can_be_null=True
+            ),
+        )
+        return table.to_pandas()
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+
+_databases: dict[tuple, Database] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(config: dict[str, Any], **kwargs) -> Database:
+    """The process-wide pool for ``config``, created on first use."""
+    key = tuple(sorted((k, str(v)) for k, v in config.items() if k in CONNECT_KWARGS))
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = Database(config, **kwargs)
+        return _databases[key]
@@ -0,0 +1,276 @@
+"""Data access for the corporate card expense audit page."""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+
+from demo_ui.cache import TTLCache
+from demo_ui.db import Database
+
+# expense audit database, shared by page 03 and the batch risk scorer
+EXPENSE_DB_CONFIG = {
+    "host": os.environ.get(
+        "EXPENSE_DB_HOST", "dify-ctc-postgre.postgres.database.azure.com"
+    ),
+    "port": int(os.environ.get("EXPENSE_DB_PORT", "5432")),
+    "user": os.environ.get("EXPENSE_DB_USER", "adminuser"),
+    "password": os.environ.get("EXPENSE_DB_PASSWORD", "Passw0rd!"),
+    "database": os.environ.get("EXPENSE_DB_NAME", "eca_demo"),
+    "db_type": "postgresql",
+    "table": os.environ.get("EXPENSE_DB_TABLE", "expenses"),
+}
+
+RISK_SCORES_TABLE = "expense_risk_scores"
+VIOLATION_SUMMARY_TABLE = "expense_violation_summary"
+
+DATETIME_FIELDS = ("payment_datetime", "created_at")
+PAGE_SIZE = 50
+
+# columns shown in the list, read as a columnar frame; the timestamp is
+# formatted by the database so it stays in the session's time zone
+LIST_COLUMNS = """
+    id, user_name, business_name, business_type, amount,
+    to_char(payment_datetime, 'YYYY-MM-DD HH24:MI:SS') AS payment_datetime
+"""
+LIST_COLUMN_TYPES = {
+    "id": pa.string(),
+    "user_name": pa.string(),
+    "business_name": pa.string(),
+    "business_type": pa.string(),
+    "amount": pa.float64(),
+    "payment_datetime": pa.string(),
+    "risk_score": pa.int32(),
+    "violation_count": pa.int32(),
+    "top_types": pa.string(),
+}
+# added to the list when the violation summary table is installed
+SUMMARY_COLUMNS = """,
+    COALESCE(v.violation_count, 0) AS violation_count,
+    array_to_string(v.top_types, ' / ') AS top_types
+"""
+
+# list column -> header shown on the page
+DISPLAY_COLUMNS = {
+    "id": "精算 ID",
+    "user_name": "申請者",
+    "business_name": "加盟店",
+    "business_type": "分類",
+    "amount": "金額",
+    "payment_datetime": "利用日",
+    "risk_score": "リスク",
+    "violation_count": "違反",
+    "top_types": "主な違反",
+}
+
+
+def format_dates(expense: dict[str, Any]) -> dict[str, Any]:
+    """Render datetime values as strings (timestamps with time, others as dates)."""
+    for key, value in expense.items():
+        if isinstance(value, datetime):
+            if key in DATETIME_FIELDS:
+                expense[key] = value.strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                expense[key] = value.strftime("%Y-%m-%d")
+    return expense
+
+
+def to_display_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    The list frame with Japanese headers. Values are left as they are; the
+    amount stays numeric and is formatted by the table in the browser. The
+    violation count becomes a badge.
+    """
+    if "violation_count" in frame.columns:
+        count = frame["violation_count"].fillna(0).astype("int64")
+        badge = ("⚠️ " + count.astype("string")).where(count > 0, "✅")
+        frame = frame.assign(
+            violation_count=badge, top_types=frame["top_types"].fillna("")
+        )
+    columns = [c for c in DISPLAY_COLUMNS if c in frame.columns]
+    return frame[columns].rename(columns=DISPLAY_COLUMNS)
+
+
+class ExpenseRepository:
+    """
+    Reads expenses and their violations through a pooled :class:`Database`,
+    with a read-through TTL cache per expense id. The list is paginated by
+    keyset and :meth:`prefetch_violations` loads the violations of a whole page
+    in one query.
+    """
+
+    def __init__(self, db: Database, table: str = "expenses", ttl: float = 60.0):
+        self.db = db
+        self.table = table
+        self.expenses: TTLCache[dict[str, Any] | None] = TTLCache(ttl)
+        self.violations: TTLCache[list[dict[str, Any]]] = TTLCache(ttl)
+        self.summaries: TTLCache[dict[str, Any]] = TTLCache(ttl)
+        self.scored_counts: TTLCache[int] = TTLCache(ttl)
+        self.tables: TTLCache[bool] = TTLCache(ttl)
+
+    def invalidate(self) -> None:
+        self.expenses.invalidate()
+        self.violations.invalidate()
+        self.summaries.invalidate()
+        self.scored_counts.invalidate()
+        self.tables.invalidate()
+
+    def summary(self) -> dict[str, Any]:
+        """Count, total and average amount, aggregated in a single query."""
+        return self.summaries.get_or_load(
+            self.table,
+            lambda: self.db.fetch_one(
+                f"""
+                SELECT COUNT(*) AS count,
+                       COALESCE(SUM(amount), 0) AS total_amount,
+                       COALESCE(AVG(amount), 0) AS average_amount
+                FROM {self.table}
+                """
+            ),
+        )
+
+    def list_page(
+        self, after_id: str | None = None, limit: int = PAGE_SIZE
+    ) -> tuple[pd.DataFrame, str | None]:
+        """
+        One page of the list, ordered by id, starting after ``after_id``.
+
+        Keyset pagination keeps the cost of every page constant regardless of
+        table size. Returns the page as a columnar frame and the cursor of the
+        next page (``None`` on the last page).
+        """
+        where = "WHERE e.id > %s" if after_id is not None else ""
+        params = (after_id, limit + 1) if after_id is not None else (limit + 1,)
+        columns, join = self._summary_join()
+        frame = self.db.fetch_frame(
+            f"""
+            SELECT {LIST_COLUMNS}{columns}
+            FROM {self.table} e
+            {join}
+            {where}
+            ORDER BY e.id
+            LIMIT %s
+            """,
+            params,
+            column_types=LIST_COLUMN_TYPES,
+        )
+        if len(frame) > limit:
+            frame = frame.iloc[:limit]
+            return frame, str(frame["id"].iloc[-1])
+        return frame, None
+
+    def _table_exists(self, name: str) -> bool:
+        row = self.db.fetch_one("SELECT to_regclass(%s) IS NOT NULL AS exists", (name,))
+        return bool(row and row["exists"])
+
+    def has_violation_summary(self) -> bool:
+        """Whether ``python -m demo_ui.violation_summary`` has been run."""
+        return self.tables.get_or_load(
+            VIOLATION_SUMMARY_TABLE,
+            lambda: self._table_exists(VIOLATION_SUMMARY_TABLE),
+        )
+
+    def _summary_join(self) -> tuple[str, str]:
+        """Extra list columns and join for violation badges, if available."""
+        if not self.has_violation_summary():
+            return "", ""
+        return (
+            SUMMARY_COLUMNS,
+            f"LEFT JOIN {VIOLATION_SUMMARY_TABLE} v ON v.expense_id = e.id",
+        )
+
+    def scored_count(self) -> int:
+        """Rows in the risk score table, 0 if the batch scorer has never run."""
+
+        def load():
+            if not self._table_exists(RISK_SCORES_TABLE):
+                return 0
+            return self.db.fetch_one(
+                f"SELECT COUNT(*) AS count FROM {RISK_SCORES_TABLE}"
+            )["count"]
+
+        return self.scored_counts.get_or_load(RISK_SCORES_TABLE, load)
+
+    def list_risk_page(
+        self,
+        after: tuple[int, str] | None = None,
+        limit: int = PAGE_SIZE,
+        min_score: int = 1,
+    ) -> tuple[pd.DataFrame, tuple[int, str] | None]:
+        """
+        One page of scored expenses with ``risk_score >= min_score``, highest
+        score first, resuming after the ``(risk_score, id)`` cursor ``after``.
+
+        The scan is driven by the ``(risk_score, expense_id)`` index of the
+        score table.
+        """
+        where = "s.risk_score >= %s"
+        params: tuple = (min_score,)
+        if after is not None:
+            where += " AND (s.risk_score, s.expense_id) < (%s, %s)"
+            params += tuple(after)
+        columns, join = self._summary_join()
+        frame = self.db.fetch_frame(
+            f"""
+            SELECT {LIST_COLUMNS}, s.risk_score{columns}
+            FROM {RISK_SCORES_TABLE} s
+            JOIN {self.table} e ON e.id = s.expense_id
+            {join}
+            WHERE {where}
+            ORDER BY s.risk_score DESC, s.expense_id DESC
+            LIMIT %s
+            """,
+            (*params, limit + 1),
+            column_types=LIST_COLUMN_TYPES,
+        )
+        if len(frame) > limit:
+            frame = frame.iloc[:limit]
+            last = frame.iloc[-1]
+            return frame, (int(last["risk_score"]), str(last["id"]))
+        return frame, None
+
+    def get_expense(self, expense_id: str) -> dict[str, Any] | None:
+        def load():
+            row = self.db.fetch_one(
+                f"SELECT * FROM {self.table} WHERE id = %s", (expense_id,)
+            )
+            return format_dates(row) if row else None
+
+        expense = self.expenses.get_or_load(expense_id, load)
+        return dict(expense) if expense else None
+
+    def get_violations(self, expense_id: str) -> list[dict[str, Any]]:
+        if expense_id not in self.violations:
+            self.prefetch_violations([expense_id])
+        return list(self.violations.get(expense_id, []))
+
+    def prefetch_violations(self, expense_ids: list[str]) -> None:
+        """Load and cache the violations of every uncached id in one query."""
+        missing = [i for i in dict.fromkeys(expense_ids) if i not in self.violations]
+        if not missing:
+            return
+        rows = self.db.fetch_all(
+            """
+            SELECT expense_id, violation_type, description, reference
+            FROM violations
+            WHERE expense_id IN %s
+            ORDER BY id
+            """,
+            # a tuple adapts to untyped literals, which works for text and uuid ids
+            (tuple(missing),),
+        )
+        grouped: dict[str, list[dict[str, Any]]] = {i: [] for i in missing}
+        for row in rows:
+            grouped.setdefault(str(row.pop("expense_id")), []).append(
+                {
+                    "violation_type": row.get("violation_type", ""),
+                    "description": row.get("description", ""),
+                    "reference": row.get("reference", ""),
+                }
+            )
+        for expense_id, violations in grouped.items():
+            self.violations.set(expense_id, violations)
@@ -0,0 +1,227 @@
+"""Pooled HTTP client shared by every page that talks to the agent backend.
+
+One :class:`HttpClient` per process keeps connections alive across reruns and
+sessions, applies per-endpoint timeouts, retries transient failures with
+exponential backoff, trips a circuit breaker when an endpoint keeps failing,
+and records latency histograms per endpoint.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds, keyed by logical endpoint name
+DEFAULT_TIMEOUTS: dict[str, tuple[float, float]] = {
+    "run": (10, 300),
+    "running": (5, 30),
+    "chats": (5, 60),
+}
+FALLBACK_TIMEOUT = (10, 60)
+
+# upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while an endpoint's circuit is open."""
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; cheap to update from any thread."""
+
+    def __init__(self, buckets_ms: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-th quantile (inf if overflow)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip((*self.buckets_ms, float("inf")), self.counts, strict=True):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "buckets": dict(
+                zip(
+                    [*map(str, self.buckets_ms), "+Inf"], list(self.counts), strict=True
+                )
+            ),
+        }
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker: after ``failure_threshold`` consecutive
+    failures the circuit opens and calls fail fast for ``reset_timeout``
+    seconds, after which a single trial call is let through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self, name: str = "") -> None:
+        with self._lock:
+            state = self.state
+            if state == "open":
+                raise CircuitOpenError(f"circuit open for endpoint {name!r}")
+            if state == "half-open":
+                # let exactly one trial call through; others keep failing fast
+                self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    """
+    Thread-safe, connection-pooled client for one backend.
+
+    Requests are addressed by a logical ``endpoint`` name (used to pick the
+    timeout, breaker and histogram) plus a path relative to ``base_url``.
+    Retries only re-send requests that are safe to repeat: connection
+    failures for any method, and 502/503/504 responses for idempotent ones.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: dict[str, str] | None = None,
+        timeouts: dict[str, tuple[float, float]] | None = None,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_maxsize: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers or {})
+
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _instruments(self, endpoint: str) -> tuple[CircuitBreaker, LatencyHistogram]:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+                self._histograms[endpoint] = LatencyHistogram()
+            return self._breakers[endpoint], self._histograms[endpoint]
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(
+        self, method: str, endpoint: str, path: str, **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the pool. The response is returned as-is (call
+        ``raise_for_status`` as needed); 5xx responses and transport errors
+        count as failures for the endpoint's circuit breaker.
+        """
+        breaker, histogram = self._instruments(endpoint)
+        breaker.before_call(endpoint)
+        kwargs.setdefault("timeout", self.timeouts.get(endpoint, FALLBACK_TIMEOUT))
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+        except requests.exceptions.RequestException:
+            breaker.record_failure()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def get(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", endpoint, path, **kwargs)
+
+    def post(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", endpoint, path, **kwargs)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Latency histogram and breaker state for every endpoint used so far."""
+        with self._lock:
+            endpoints = list(self._histograms)
+        return {
+            name: {
+                **self._histograms[name].snapshot(),
+                "circuit": self._breakers[name].state,
+            }
+            for name in endpoints
+        }
@@ -0,0 +1,94 @@
+"""Shrink uploaded documents before they are sent anywhere.
+
+Phone photos of business cards or registration certificates are often 5-10 MB,
+far more resolution than OCR needs. :func:`prepare_upload` auto-orients them,
+downsizes them to a target DPI on an A4 page and recompresses them as JPEG;
+PDFs are reduced to a raster of their first page.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from dataclasses import dataclass
+
+import pymupdf
+from PIL import Image, ImageOps
+
+# A4 portrait, in inches
+PAGE_SIZE_IN = (8.27, 11.69)
+DEFAULT_DPI = 200
+DEFAULT_JPEG_QUALITY = 85
+
+
+@dataclass
+class PreparedUpload:
+    name: str
+    data: bytes
+    mime_type: str
+    original_size: int
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_size - self.size
+
+
+def _max_pixels(dpi: int) -> int:
+    """Longest side, in pixels, of a page scanned at ``dpi``."""
+    return round(max(PAGE_SIZE_IN) * dpi)
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _rasterize_first_page(data: bytes, dpi: int) -> Image.Image:
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        pix = doc[0].get_pixmap(dpi=dpi)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def prepare_upload(
+    name: str,
+    data: bytes,
+    mime_type: str,
+    dpi: int = DEFAULT_DPI,
+    quality: int = DEFAULT_JPEG_QUALITY,
+) -> PreparedUpload:
+    """
+    Return a smaller, upright JPEG version of an uploaded image or PDF.
+
+    The original bytes are returned unchanged when the file is not an image we
+    can decode or re-encode (truncated or corrupt files may only fail once the
+    pixels are loaded), or when re-encoding would not make it smaller.
+    """
+    original = PreparedUpload(name, data, mime_type, len(data))
+    try:
+        if mime_type == "application/pdf" or name.lower().endswith(".pdf"):
+            image = _rasterize_first_page(data, dpi)
+        else:
+            image = Image.open(io.BytesIO(data))
+            image = ImageOps.exif_transpose(image)
+        image.thumbnail((_max_pixels(dpi),) * 2, Image.Resampling.LANCZOS)
+        encoded = _encode_jpeg(image, quality)
+    except Exception:
+        return original
+
+    if len(encoded) >= len(data):
+        return original
+
+    stem = os.path.splitext(name)[0]
+    return PreparedUpload(f"{stem}.jpg", encoded, "image/jpeg", len(data))
@@ -0,0 +1,187 @@
+"""Logging helpers that keep formatting off the request path.
+
+The audit page logged every agent call with f-strings and full
+``json.dumps`` previews, paying for serialization even when the level would
+drop the record. Here:
+
+* :class:`Lazy`, :class:`Truncated` and :class:`JsonDump` are ``%s``
+  arguments that are only rendered when a handler actually formats the
+  record; :class:`JsonDump` also samples large payload dumps.
+* :func:`event` attaches structured fields to a record for the JSON-lines sink.
+* :func:`configure_logging` routes records through a bounded queue to a
+  listener thread, which does all formatting and I/O. When the queue is full,
+  records are dropped and counted instead of blocking the caller.
+
+Usage::
+
+    logger.info(
+        "[API 호출] expense_id: %s, payload: %s",
+        expense_id,
+        JsonDump(payload),
+        extra=event("api.call", expense_id=expense_id),
+    )
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from typing import Any, Callable
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+JSONL_PATH = os.environ.get("LOG_JSONL_PATH")
+QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# share of non-error payload dumps that are rendered at all
+DUMP_SAMPLE_RATE = float(os.environ.get("LOG_DUMP_SAMPLE_RATE", "0.1"))
+
+
+class Lazy:
+    """Renders ``fn()`` when the record is formatted, not when it is logged."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+
+    def __str__(self) -> str:
+        return str(self.fn())
+
+
+class Truncated:
+    """``value`` cut to ``limit`` characters, or ``empty`` if it is falsy."""
+
+    __slots__ = ("empty", "limit", "value")
+
+    def __init__(self, value: Any, limit: int = 50, empty: str = "빈 값"):
+        self.value = value
+        self.limit = limit
+        self.empty = empty
+
+    def __str__(self) -> str:
+        if not self.value:
+            return self.empty
+        text = str(self.value)
+        return text if len(text) <= self.limit else f"{text[: self.limit]}..."
+
+
+class JsonDump:
+    """
+    JSON of ``obj`` cut to ``limit`` characters, serialized only if the record
+    is emitted. Unless ``sample_rate`` is 1, only that share of dumps is
+    rendered; the rest show a placeholder, decided up front so a dropped dump
+    costs nothing.
+    """
+
+    __slots__ = ("limit", "obj", "sampled")
+
+    def __init__(
+        self, obj: Any, limit: int | None = 1000, sample_rate: float | None = None
+    ):
+        self.obj = obj
+        self.limit = limit
+        rate = DUMP_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.sampled = rate >= 1 or random.random() < rate
+
+    def __str__(self) -> str:
+        if not self.sampled:
+            return "<omitted by sampling>"
+        text = json.dumps(self.obj, ensure_ascii=False, default=str)
+        if self.limit is not None and len(text) > self.limit:
+            return f"{text[: self.limit]}..."
+        return text
+
+
+def event(name: str, **fields: Any) -> dict[str, Any]:
+    """``extra=`` for a record carrying an event name and structured fields."""
+    return {"event": name, "fields": fields}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry[key] = value if isinstance(value, (int, float, bool)) else str(value)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a listener thread as they are. Formatting is left to the
+    listener's handlers, and a full queue drops the record instead of blocking.
+    """
+
+    def __init__(self, maxsize: int = QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: BoundedQueueHandler | None = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    jsonl_path: str | None = JSONL_PATH,
+    queue_size: int = QUEUE_SIZE,
+) -> BoundedQueueHandler:
+    """
+    Send root logging through a bounded queue to a console handler and, if
+    ``jsonl_path`` is set, a JSON-lines file. Safe to call on every rerun.
+    """
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers: list[logging.Handler] = [console]
+        if jsonl_path:
+            sink = logging.FileHandler(jsonl_path, encoding="utf-8")
+            sink.setFormatter(JsonLinesFormatter())
+            handlers.append(sink)
+
+        _queue_handler = BoundedQueueHandler(queue_size)
+        _listener = logging.handlers.QueueListener(
+            _queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+        return _queue_handler
+
+
+def stop_logging() -> None:
+    """Flush the queue and detach the handler installed by :func:`configure_logging`."""
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+        _listener = _queue_handler = None
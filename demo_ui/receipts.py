@@ -0,0 +1,150 @@
+"""Downsized receipt images for the audit pages.
+
+The receipt scans in ``pages/data`` are full-resolution RGBA PNGs that the
+detail page sent to the browser on every rerun. :class:`ReceiptImages` serves
+WebP renditions instead, generated on first access (or by :meth:`warm`) and
+cached on disk under ``.cache/receipts`` and in a bounded in-memory LRU.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+RECEIPT_DIR = Path(__file__).resolve().parent.parent / "pages" / "data"
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "receipts"
+
+# rendition name -> maximum width in pixels
+RENDITIONS = {"thumb": 320, "preview": 640}
+WEBP_QUALITY = 80
+MAX_MEMORY_BYTES = 16 * 1024 * 1024
+# page id sets remembered by warm_async, so list reruns don't warm again
+WARMED_PAGES = 64
+
+_EXPENSE_ID = re.compile(r"^[\w-]+$")
+
+
+class ReceiptImages:
+    def __init__(
+        self,
+        source_dir: Path = RECEIPT_DIR,
+        cache_dir: Path = CACHE_DIR,
+        max_memory_bytes: int = MAX_MEMORY_BYTES,
+        quality: int = WEBP_QUALITY,
+    ):
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.quality = quality
+        self._memory: OrderedDict[tuple[str, str, int], bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._warmer: ThreadPoolExecutor | None = None
+        self._warmed: OrderedDict[frozenset[str], None] = OrderedDict()
+
+    def original_path(self, expense_id: str) -> Path | None:
+        if not _EXPENSE_ID.match(expense_id or ""):
+            return None
+        path = self.source_dir / f"{expense_id}.png"
+        return path if path.exists() else None
+
+    def get(self, expense_id: str, rendition: str = "preview") -> bytes | None:
+        """WebP bytes of a rendition, or ``None`` if there is no receipt."""
+        source = self.original_path(expense_id)
+        if source is None:
+            return None
+        # the source mtime is part of the key, so a replaced scan is re-rendered
+        key = (expense_id, rendition, source.stat().st_mtime_ns)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+        cached = self.cache_dir / rendition / f"{expense_id}-{key[2]}.webp"
+        if cached.exists():
+            data = cached.read_bytes()
+        else:
+            data = self._render(source, RENDITIONS[rendition])
+            self._write(cached, data)
+        self._remember(key, data)
+        return data
+
+    def warm(self, expense_ids: list[str], renditions=tuple(RENDITIONS)) -> None:
+        """Generate renditions ahead of the first detail view."""
+        for expense_id in expense_ids:
+            for rendition in renditions:
+                self.get(expense_id, rendition)
+
+    def warm_async(self, expense_ids: list[str]) -> None:
+        """:meth:`warm` on a single background worker, once per set of ids."""
+        page = frozenset(expense_ids)
+        with self._lock:
+            if page in self._warmed:
+                self._warmed.move_to_end(page)
+                return
+            self._warmed[page] = None
+            while len(self._warmed) > WARMED_PAGES:
+                self._warmed.popitem(last=False)
+            if self._warmer is None:
+                self._warmer = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="receipt-warm"
+                )
+            warmer = self._warmer
+        warmer.submit(self.warm, list(expense_ids))
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        # a unique temporary file, so concurrent renders of the same receipt
+        # each replace the cached file atomically
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _render(self, source: Path, max_width: int) -> bytes:
+        with Image.open(source) as image:
+            image.thumbnail((max_width, max_width * 4), Image.Resampling.LANCZOS)
+            # receipts are scans on paper; flatten onto white and drop alpha
+            rgba = image.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, "white")
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+        buffer = io.BytesIO()
+        flat.save(buffer, format="WEBP", quality=self.quality, method=4)
+        return buffer.getvalue()
+
+    def _remember(self, key: tuple[str, str, int], data: bytes) -> None:
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+
+_images: ReceiptImages | None = None
+_images_lock = threading.Lock()
+
+
+def get_receipt_images() -> ReceiptImages:
+    """The process-wide receipt image service."""
+    global _images
+    with _images_lock:
+        if _images is None:
+            _images = ReceiptImages()
+        return _images
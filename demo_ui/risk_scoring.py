@@ -0,0 +1,216 @@
+"""Batch risk scoring of card expenses by the audit manager agent.
+
+Page 03 used to call the agent only when an auditor clicked a row. This module
+scores every expense that has no score yet, a bounded number at a time, and
+stores the result in ``expense_risk_scores`` so the list can be filtered and
+sorted by risk without waiting on the agent::
+
+    python -m demo_ui.risk_scoring --concurrency 4
+
+Run it from cron or after each import of new expenses. Database settings come
+from :data:`demo_ui.expenses.EXPENSE_DB_CONFIG`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from demo_ui.alli import AlliClient
+from demo_ui.audit import (
+    bot_messages,
+    last_bot_message,
+    parse_violation_data,
+    risk_score,
+)
+from demo_ui.db import Database, get_database
+from demo_ui.expenses import EXPENSE_DB_CONFIG, RISK_SCORES_TABLE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass
+class RiskScore:
+    expense_id: str
+    risk_score: int
+    violations: dict[str, Any] = field(default_factory=dict)
+    message: str = ""
+
+
+@dataclass
+class BatchResult:
+    scored: int = 0
+    failed: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def ensure_schema(db: Database, table: str = "expenses") -> None:
+    """
+    Create the score table if needed. ``expense_id`` gets the same type as
+    ``{table}.id`` so the join with the expense table stays index-friendly.
+    """
+    row = db.fetch_one(
+        """
+        SELECT format_type(atttypid, atttypmod) AS id_type
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attname = 'id'
+        """,
+        (table,),
+    )
+    id_type = row["id_type"] if row else "text"
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {RISK_SCORES_TABLE} (
+                expense_id {id_type} PRIMARY KEY,
+                risk_score integer NOT NULL,
+                violations jsonb NOT NULL DEFAULT '{{}}'::jsonb,
+                message text NOT NULL DEFAULT '',
+                scored_at timestamptz NOT NULL DEFAULT now()
+            )
+            """
+        )
+        cursor.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS {RISK_SCORES_TABLE}_score_idx
+            ON {RISK_SCORES_TABLE} (risk_score, expense_id)
+            """
+        )
+
+
+def unscored_expense_ids(
+    db: Database, table: str = "expenses", limit: int | None = None
+) -> list[str]:
+    query = f"""
+        SELECT e.id
+        FROM {table} e
+        LEFT JOIN {RISK_SCORES_TABLE} s ON s.expense_id = e.id
+        WHERE s.expense_id IS NULL
+        ORDER BY e.id
+    """
+    params: tuple = ()
+    if limit is not None:
+        query += " LIMIT %s"
+        params = (limit,)
+    return [str(row["id"]) for row in db.fetch_all(query, params)]
+
+
+def score_expense(alli: AlliClient, expense_id: str) -> RiskScore:
+    """Ask the agent about one expense, the same way page 03 does."""
+    conversation_id = alli.start_conversation()
+    if not conversation_id:
+        raise RuntimeError("the agent did not return a conversation id")
+    responses = alli.ask(expense_id, conversation_id)
+    violations = parse_violation_data(last_bot_message(responses)) or {}
+    return RiskScore(
+        expense_id,
+        risk_score(violations),
+        {k: violations[k] for k in ("columns", "rows") if k in violations},
+        "\n".join(bot_messages(responses)),
+    )
+
+
+def save_score(db: Database, score: RiskScore) -> None:
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {RISK_SCORES_TABLE}
+                (expense_id, risk_score, violations, message, scored_at)
+            VALUES (%s, %s, %s, %s, now())
+            ON CONFLICT (expense_id) DO UPDATE SET
+                risk_score = EXCLUDED.risk_score,
+                violations = EXCLUDED.violations,
+                message = EXCLUDED.message,
+                scored_at = EXCLUDED.scored_at
+            """,
+            (
+                score.expense_id,
+                score.risk_score,
+                json.dumps(score.violations, ensure_ascii=False, default=str),
+                score.message,
+            ),
+        )
+
+
+def score_expenses(
+    expense_ids: list[str],
+    scorer: Callable[[str], RiskScore],
+    saver: Callable[[RiskScore], None],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> BatchResult:
+    """
+    Score ``expense_ids`` with at most ``concurrency`` agent calls in flight,
+    saving each score as soon as it arrives. A failing expense is logged and
+    left unscored so the next run picks it up again.
+    """
+    result = BatchResult()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(scorer, i): i for i in expense_ids}
+        for future in as_completed(futures):
+            expense_id = futures[future]
+            try:
+                saver(future.result())
+                result.scored += 1
+            except Exception:
+                logger.exception("scoring failed for expense %s", expense_id)
+                result.failed.append(expense_id)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run(
+    config: dict[str, Any] = EXPENSE_DB_CONFIG,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    limit: int | None = None,
+) -> BatchResult:
+    table = config.get("table", "expenses")
+    db = get_database(config, maxconn=concurrency + 1)
+    ensure_schema(db, table)
+    expense_ids = unscored_expense_ids(db, table, limit)
+    logger.info("%d expenses to score", len(expense_ids))
+
+    alli = AlliClient.for_app("audit_manager")
+    result = score_expenses(
+        expense_ids,
+        scorer=lambda expense_id: score_expense(alli, expense_id),
+        saver=lambda score: save_score(db, score),
+        concurrency=concurrency,
+    )
+    logger.info(
+        "scored %d expenses in %.1fs, %d failed",
+        result.scored,
+        result.seconds,
+        len(result.failed),
+    )
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="agent calls in flight at once",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="score at most this many expenses"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    result = run(concurrency=args.concurrency, limit=args.limit)
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
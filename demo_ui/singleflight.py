@@ -0,0 +1,102 @@
+"""Process-wide request coalescing.
+
+Streamlit runs every browser session in its own thread of one process, so
+when several auditors open the same expense, identical agent calls of up to
+300s run side by side. :class:`SingleFlight` lets the first caller for a key
+do the work while later callers for the same key wait for its result.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlightStats:
+    executions: int = 0
+    coalesced: int = 0
+
+
+class _AbandonedError(Exception):
+    """The leader stopped without a result, e.g. its session was rerun."""
+
+
+class SingleFlight:
+    """
+    Runs at most one ``fn`` per key at a time.
+
+    The first caller runs ``fn`` in its own thread, so Streamlit calls made by
+    ``fn`` render in that caller's session. Callers arriving while it runs
+    block until it finishes and get the same result, or the same exception.
+    If the leader is interrupted by a ``BaseException`` that isn't an
+    ``Exception`` (Streamlit's rerun and stop signals), that is not shared:
+    the waiters start over and one of them becomes the new leader.
+    """
+
+    def __init__(self) -> None:
+        self.stats = FlightStats()
+        self._calls: dict[Hashable, Future] = {}
+        self._waiting: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        """``fn()``'s result and whether it was shared with an earlier caller."""
+        while True:
+            with self._lock:
+                running = self._calls.get(key)
+                if running is None:
+                    future: Future = Future()
+                    self._calls[key] = future
+                    self.stats.executions += 1
+                    break
+                self.stats.coalesced += 1
+                self._waiting[key] = self._waiting.get(key, 0) + 1
+            try:
+                return running.result(), True
+            except _AbandonedError:
+                continue
+
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            self._finish(key)
+            future.set_exception(_AbandonedError())
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result, False
+
+    def _finish(self, key: Hashable) -> None:
+        # before the waiters wake, so a retrying waiter can take the key over
+        with self._lock:
+            del self._calls[key]
+            self._waiting.pop(key, None)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                **asdict(self.stats),
+                "in_flight": len(self._calls),
+                "waiting": sum(self._waiting.values()),
+            }
+
+
+_flights: dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str = "agent") -> SingleFlight:
+    """The process-wide :class:`SingleFlight` registered under ``name``."""
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight()
+        return _flights[name]
@@ -0,0 +1,188 @@
+"""Per-expense violation summary, maintained by a trigger on ``violations``.
+
+The expense list had no violation counts at all; computing them on every
+rerun would mean aggregating ``violations`` for each page. Instead
+``expense_violation_summary`` holds one row per expense with violations
+(its count and most frequent types), and statement-level triggers refresh
+each expense touched by a statement on ``violations`` once. A refresh takes a
+per-expense advisory lock before counting, so concurrent writers to the same
+expense cannot interleave their count and upsert. Install it once, which also
+backfills existing rows::
+
+    python -m demo_ui.violation_summary
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+
+from demo_ui.db import Database, get_database
+from demo_ui.expenses import EXPENSE_DB_CONFIG, VIOLATION_SUMMARY_TABLE
+
+logger = logging.getLogger(__name__)
+
+TOP_TYPES = 3
+
+
+def _id_type(db: Database) -> str:
+    row = db.fetch_one(
+        """
+        SELECT format_type(atttypid, atttypmod) AS id_type
+        FROM pg_attribute
+        WHERE attrelid = 'violations'::regclass AND attname = 'expense_id'
+        """
+    )
+    return row["id_type"] if row else "text"
+
+
+def install(db: Database, top_types: int = TOP_TYPES) -> None:
+    """Create the summary table, its refresh triggers, and backfill it."""
+    id_type = _id_type(db)
+    top = f"""
+        ARRAY(
+            SELECT violation_type FROM violations
+            WHERE expense_id = {{id}}
+            GROUP BY violation_type
+            ORDER BY COUNT(*) DESC, violation_type
+            LIMIT {int(top_types)}
+        )
+    """
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {VIOLATION_SUMMARY_TABLE} (
+                expense_id {id_type} PRIMARY KEY,
+                violation_count integer NOT NULL,
+                top_types text[] NOT NULL DEFAULT '{{}}',
+                updated_at timestamptz NOT NULL DEFAULT now()
+            )
+            """
+        )
+        cursor.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION refresh_{VIOLATION_SUMMARY_TABLE}(
+                p_expense_id {id_type}
+            ) RETURNS void AS $$
+            DECLARE
+                n integer;
+            BEGIN
+                -- held until commit: a concurrent refresh of this expense waits
+                -- here and then counts with a snapshot that includes our rows
+                PERFORM pg_advisory_xact_lock(
+                    hashtext('{VIOLATION_SUMMARY_TABLE}:' || p_expense_id::text)
+                );
+                SELECT COUNT(*) INTO n FROM violations WHERE expense_id = p_expense_id;
+                IF n = 0 THEN
+                    DELETE FROM {VIOLATION_SUMMARY_TABLE}
+                    WHERE expense_id = p_expense_id;
+                    RETURN;
+                END IF;
+                INSERT INTO {VIOLATION_SUMMARY_TABLE}
+                    (expense_id, violation_count, top_types, updated_at)
+                VALUES (p_expense_id, n, {top.format(id="p_expense_id")}, now())
+                ON CONFLICT (expense_id) DO UPDATE SET
+                    violation_count = EXCLUDED.violation_count,
+                    top_types = EXCLUDED.top_types,
+                    updated_at = EXCLUDED.updated_at;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+        cursor.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {VIOLATION_SUMMARY_TABLE}_trigger()
+            RETURNS trigger AS $$
+            DECLARE
+                changed {id_type};
+            BEGIN
+                IF TG_OP = 'TRUNCATE' THEN
+                    TRUNCATE {VIOLATION_SUMMARY_TABLE};
+                    RETURN NULL;
+                END IF;
+                -- each branch only reads the transition tables its trigger
+                -- defines; ids are visited in order so advisory locks can't
+                -- deadlock between two multi-row statements
+                IF TG_OP = 'INSERT' THEN
+                    FOR changed IN
+                        SELECT DISTINCT expense_id FROM new_rows
+                        WHERE expense_id IS NOT NULL ORDER BY 1
+                    LOOP
+                        PERFORM refresh_{VIOLATION_SUMMARY_TABLE}(changed);
+                    END LOOP;
+                ELSIF TG_OP = 'DELETE' THEN
+                    FOR changed IN
+                        SELECT DISTINCT expense_id FROM old_rows
+                        WHERE expense_id IS NOT NULL ORDER BY 1
+                    LOOP
+                        PERFORM refresh_{VIOLATION_SUMMARY_TABLE}(changed);
+                    END LOOP;
+                ELSE
+                    FOR changed IN
+                        SELECT expense_id FROM old_rows WHERE expense_id IS NOT NULL
+                        UNION
+                        SELECT expense_id FROM new_rows WHERE expense_id IS NOT NULL
+                        ORDER BY 1
+                    LOOP
+                        PERFORM refresh_{VIOLATION_SUMMARY_TABLE}(changed);
+                    END LOOP;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+        cursor.execute(
+            f"""
+            DROP TRIGGER IF EXISTS {VIOLATION_SUMMARY_TABLE}_rows ON violations;
+            DROP TRIGGER IF EXISTS {VIOLATION_SUMMARY_TABLE}_insert ON violations;
+            CREATE TRIGGER {VIOLATION_SUMMARY_TABLE}_insert
+                AFTER INSERT ON violations
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION {VIOLATION_SUMMARY_TABLE}_trigger();
+            DROP TRIGGER IF EXISTS {VIOLATION_SUMMARY_TABLE}_update ON violations;
+            CREATE TRIGGER {VIOLATION_SUMMARY_TABLE}_update
+                AFTER UPDATE ON violations
+                REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION {VIOLATION_SUMMARY_TABLE}_trigger();
+            DROP TRIGGER IF EXISTS {VIOLATION_SUMMARY_TABLE}_delete ON violations;
+            CREATE TRIGGER {VIOLATION_SUMMARY_TABLE}_delete
+                AFTER DELETE ON violations
+                REFERENCING OLD TABLE AS old_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION {VIOLATION_SUMMARY_TABLE}_trigger();
+            DROP TRIGGER IF EXISTS {VIOLATION_SUMMARY_TABLE}_truncate ON violations;
+            CREATE TRIGGER {VIOLATION_SUMMARY_TABLE}_truncate
+                AFTER TRUNCATE ON violations
+                FOR EACH STATEMENT EXECUTE FUNCTION {VIOLATION_SUMMARY_TABLE}_trigger();
+            """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {VIOLATION_SUMMARY_TABLE}
+                (expense_id, violation_count, top_types, updated_at)
+            SELECT v.expense_id, COUNT(*), {top.format(id="v.expense_id")}, now()
+            FROM violations v
+            GROUP BY v.expense_id
+            ON CONFLICT (expense_id) DO UPDATE SET
+                violation_count = EXCLUDED.violation_count,
+                top_types = EXCLUDED.top_types,
+                updated_at = EXCLUDED.updated_at
+            """
+        )
+        logger.info(
+            "%s backfilled: %d expenses", VIOLATION_SUMMARY_TABLE, cursor.rowcount
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    install(get_database(EXPENSE_DB_CONFIG))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
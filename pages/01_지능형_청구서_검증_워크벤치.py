@@ -5,6 +5,8 @@ from azure.storage.blob import BlobServiceClient
 import fitz  # pymupdf
 import os
 
+from demo_ui.alli import AlliClient
+
 conn_str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 if conn_str is None: conn_str = os.environ.get("AZURE_CONNECTION_STRING")
 
@@ -248,7 +250,6 @@ elif sub == "청구서 검증 요청 현황":
                 with st.spinner("청구서 분석 중..."):
                     try:
                         import json
-                        import requests
 
                         # 1. Azure Blob Storage 업로드
                         file_path = upload_pdf_to_blob(uploaded_file)
@@ -256,9 +257,10 @@ elif sub == "청구서 검증 요청 현황":
 
                         # 2. Alli 호출
                         uploaded_file.seek(0)  # 파일 포인터 초기화
-                        alli_response = requests.post(
-                            "https://backend.alli.ai/webapi/apps/TExNQXBwOjY5OWQzZmNjMWEzMTQ0Zjc2N2ZlMTg5MA==/run",
-                            headers={"API-KEY": "SUKYXKTTRPYVAHHOFTSWQYWS3QFSONQJYA"},
+                        alli = AlliClient.for_app("invoice_reconciliation")
+                        alli_response = alli.http.post(
+                            "run",
+                            alli.run_path,
                             files={"PDF_FILE": (uploaded_file.name, uploaded_file.read(), "application/pdf")},
                             data={"json": json.dumps({"mode": "sync"})}
                         )
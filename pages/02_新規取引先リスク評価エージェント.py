@@ -8,8 +8,13 @@ import pytz
 import streamlit.components.v1 as components
 from azure.storage.blob import BlobServiceClient
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from streamlit.runtime.scriptrunner import add_script_run_ctx
 
+from demo_ui.alli import AlliClient, ChatStream
+from demo_ui.canvas_store import CanvasTooLargeError, get_canvas_store
+from demo_ui.ingest import prepare_upload
+
 conn_str = os.environ.get("AZURE_CONNECTION_STRING")
 
 def upload_file_to_blob(file_name, file_bytes):
@@ -27,6 +32,8 @@ if "eval_logs" not in st.session_state:
     st.session_state.eval_logs = []
 if "eval_results" not in st.session_state:
     st.session_state.eval_results = {}
+if "eval_partial" not in st.session_state:
+    st.session_state.eval_partial = ""
 
 def get_jst_time():
     return datetime.now(pytz.timezone("Asia/Tokyo")).strftime('%H:%M:%S')
@@ -43,90 +50,107 @@ def add_log(msg):
         st.session_state.eval_logs.append(f"✅ {get_jst_time()} - {msg}")
 
 def background_task(file_name, file_bytes, file_type, situation_desc):
-    app_id = "TExNQXBwOjY5OTQyM2M0ZjgyNTQ2MTVkM2RhYzMxYg=="
-    api_key = "SUKYXKTTRPYVAHHOFTSWQYWS3QFSONQJYA"
-    base_url = "https://backend.alli.ai"
+    alli = AlliClient.for_app("supplier_risk")
     
     seen_chat_ids = set()
     
-    def get_headers():
-        return {"API-KEY": api_key}
-        
-    def poll_until_done(conversation_id, label=""):
-        url_run = f"{base_url}/webapi/v2/conversations/{conversation_id}/running"
-        url_chats = f"{base_url}/webapi/v2/conversations/{conversation_id}/chats"
-        headers = get_headers()
-        start = time.time()
-        while True:
-            res = requests.get(url_run, headers=headers, timeout=30)
-            res.raise_for_status()
-            is_running = res.json().get("isRunning", False)
-            
-            # Fetch intermediate chats to display AI progress
-            try:
-                c = requests.get(url_chats, headers=headers, timeout=30)
-                chats = c.json().get("chats", [])
-                for chat in chats:
-                    cid = chat.get("id")
-                    if cid and cid not in seen_chat_ids:
-                        seen_chat_ids.add(cid)
-                        ctype = chat.get("type", "")
-                        msg = chat.get("message", "")
-                        
-                        if ctype == "llm" and "Company_Name" in msg:
-                            add_log("📄 AI画像データ抽出中...")
-                        elif ctype == "llm":
-                            add_log("🧠 AI取引状況およびコンテキスト分析中...")
-                        elif ctype == "tn":
-                            add_log("🌐 Master AI 会社評価中...")
-            except Exception:
-                pass
+    def log_progress(chats):
+        # Surface AI progress as new chats arrive on the stream
+        for chat in chats:
+            cid = chat.get("id")
+            if cid and cid not in seen_chat_ids:
+                seen_chat_ids.add(cid)
+                ctype = chat.get("type", "")
+                msg = chat.get("message", "")
                 
-            if not is_running:
-                return time.time() - start
-            time.sleep(5)
+                if ctype == "llm" and "Company_Name" in msg:
+                    add_log("📄 AI画像データ抽出中...")
+                elif ctype == "llm":
+                    add_log("🧠 AI取引状況およびコンテキスト分析中...")
+                elif ctype == "tn":
+                    add_log("🌐 Master AI 会社評価中...")
+
+    # Per-step latency (seconds), written to the job log when the task ends
+    timings = {}
+    task_start = time.perf_counter()
+
+    def timed(step, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[step] = time.perf_counter() - start
+
+    def log_timings():
+        labels = {
+            "blob_upload": "アップロード（並行）",
+            "first_event": "最初の応答",
+            "agent_run": "分析",
+            "fetch_result": "結果取得",
+        }
+        parts = [f"{label} {timings[step]:.1f}秒" for step, label in labels.items() if step in timings]
+        parts.append(f"合計 {time.perf_counter() - task_start:.1f}秒")
+        add_log("所要時間: " + " / ".join(parts))
+
+    # The /run request carries the file itself, so the blob copy is only kept
+    # for the record and runs off the critical path, joined after the analysis.
+    executor = ThreadPoolExecutor(max_workers=1)
+    blob_future = None
+
+    def join_upload(error=None):
+        # Wait for the upload; its failure is reported alongside the analysis
+        # outcome instead of discarding a finished analysis
+        nonlocal blob_future
+        if blob_future is None:
+            return
+        upload_error = blob_future.exception()
+        blob_future = None
+        if upload_error is None:
+            add_log(f"ファイルが正常に処理されました。（ファイル名：{file_name}）")
+        elif upload_error is not error:
+            add_log(f"⚠️ ファイルアップロードに失敗しました: {str(upload_error)}")
 
     try:
         if file_name and file_bytes:
-            add_log("ファイルアップロードの準備中...")
-            upload_file_to_blob(file_name, file_bytes)
-            add_log(f"ファイルが正常に処理されました。（ファイル名：{file_name}）")
+            add_log("ファイルアップロードを開始（分析と並行実行）...")
+            blob_future = executor.submit(timed, "blob_upload", upload_file_to_blob, file_name, file_bytes)
             
         add_log("APIサーバーに分析データを送信中...")
-        url_start = f"{base_url}/webapi/apps/{app_id}/run"
-        
-        data = {
-            "json": json.dumps({
-                "mode": "background",
-                "isStateful": True,
-                "chat": {
-                    "message": "Start Evaluation"
-                },
-                "inputs": {
-                    "DEAL_CONTEXT_TEXT": situation_desc
-                }
-            })
-        }
 
         files = {}
         if file_name and file_bytes:
             files["COMPANY_ID_IMAGE"] = (file_name, file_bytes, file_type)
 
-        res_start = requests.post(url_start, headers=get_headers(), data=data, files=files, timeout=60)
-        res_start.raise_for_status()
-        
-        conversation_id = res_start.json()["result"]["conversation"]["id"]
-        
-        # Step 2: Poll till processed (wait for background tasks)
-        poll_until_done(conversation_id, label="バックグラウンド処理")
+        # Step 2: Stream the run; partial output is rendered while it arrives
+        events = alli.stream(
+            "Start Evaluation",
+            inputs={"DEAL_CONTEXT_TEXT": situation_desc},
+            files=files,
+            timeout=(10, 300),
+        )
+
+        def track(events):
+            for event in events:
+                timings.setdefault("first_event", time.perf_counter() - run_start)
+                log_progress(event.chats)
+                yield event
+
+        def consume(stream):
+            for token in stream:
+                st.session_state.eval_partial += token
+
+        run_start = time.perf_counter()
+        stream = ChatStream(track(events))
+        timed("agent_run", consume, stream)
+
+        conversation_id = stream.conversation_id
+        if not conversation_id:
+            raise ValueError("conversation id not found in stream")
 
         # Step 3: Fetch chats for result
         add_log("分析完了。結果を取得しています...")
-        url_chats = f"{base_url}/webapi/v2/conversations/{conversation_id}/chats"
-        res_chats = requests.get(url_chats, headers=get_headers(), timeout=60)
-        res_chats.raise_for_status()
-        
-        chats_data = res_chats.json()
+        chats_data = timed("fetch_result", alli.chats, conversation_id)
+        join_upload()
         chats = chats_data.get("chats", [])
         
         bot_message = ""
@@ -157,21 +181,32 @@ def background_task(file_name, file_bytes, file_type, situation_desc):
             bot_message = "BOTから有効なメッセージを受け取れませんでした。"
             
         add_log("パース成功！分析結果を生成します。")
+        
+        # Store the canvas once; the session keeps only its key
+        canvas_key = ""
+        if html_content:
+            try:
+                canvas_key = get_canvas_store().put(html_content, title="リスク評価レポート")
+            except CanvasTooLargeError as e:
+                add_log(f"⚠️ HTMLレポートが大きすぎるため表示を省略します: {str(e)}")
                 
         st.session_state.eval_results = {
-            "html_content": html_content,
+            "canvas_key": canvas_key,
             "bot_message": bot_message,
             "result_data": result_data
         }
-        st.session_state.eval_status = "done"
 
     except requests.exceptions.Timeout:
+        join_upload()
         add_log("❌ 応答制限時間を超過しました。サーバー側の処理が遅延しています。")
-        st.session_state.eval_results = {"bot_message": "❌ API呼び出し中にエラーが発生しました: リクエストがタイムアウトしました。", "html_content": "", "result_data": {}}
-        st.session_state.eval_status = "done"
+        st.session_state.eval_results = {"bot_message": "❌ API呼び出し中にエラーが発生しました: リクエストがタイムアウトしました。", "canvas_key": "", "result_data": {}}
     except Exception as e:
+        join_upload(e)
         add_log(f"❌ エラー発生: {str(e)}")
-        st.session_state.eval_results = {"bot_message": f"❌ API呼び出し中にエラーが発生しました: {str(e)}", "html_content": "", "result_data": {}}
+        st.session_state.eval_results = {"bot_message": f"❌ API呼び出し中にエラーが発生しました: {str(e)}", "canvas_key": "", "result_data": {}}
+    finally:
+        executor.shutdown(wait=True)
+        log_timings()
         st.session_state.eval_status = "done"
 
 
@@ -210,6 +245,7 @@ if st.button("リスク評価分析を開始", type="primary"):
     st.session_state.eval_status = "running"
     st.session_state.eval_logs = []
     st.session_state.eval_results = {}
+    st.session_state.eval_partial = ""
     st.session_state.eval_start_time = time.time()
     
     if not uploaded_file and not situation_description:
@@ -219,6 +255,15 @@ if st.button("リスク評価分析を開始", type="primary"):
     file_bytes = uploaded_file.getvalue() if uploaded_file else None
     file_type = uploaded_file.type if uploaded_file else None
     
+    # Auto-orient, downscale and recompress before uploading anywhere
+    if uploaded_file:
+        prepared = prepare_upload(file_name, file_bytes, file_type)
+        file_name, file_bytes, file_type = prepared.name, prepared.data, prepared.mime_type
+        add_log(
+            f"画像を最適化しました（{prepared.original_size / 1024:,.0f} KB → "
+            f"{prepared.size / 1024:,.0f} KB、{prepared.bytes_saved / 1024:,.0f} KB 削減）"
+        )
+    
     t = threading.Thread(target=background_task, args=(file_name, file_bytes, file_type, situation_description))
     add_script_run_ctx(t)
     t.start()
@@ -237,6 +282,10 @@ if st.session_state.get("eval_status") == "running":
         st.progress(progress_val)
         
         st.code("\n".join(st.session_state.eval_logs) if st.session_state.eval_logs else "待機中...", language="plaintext")
+        
+        # Partial AI output received so far from the stream
+        if st.session_state.eval_partial:
+            st.markdown(st.session_state.eval_partial)
     
         time.sleep(1)
         st.rerun()
@@ -245,7 +294,7 @@ elif st.session_state.get("eval_status") == "done":
     with display_container.container():
         results = st.session_state.eval_results
         bot_message = results.get("bot_message", "")
-        html_content = results.get("html_content", "")
+        canvas_key = results.get("canvas_key", "")
         result_data = results.get("result_data", {})
         
         if "❌" in bot_message:
@@ -258,8 +307,8 @@ elif st.session_state.get("eval_status") == "done":
             st.success("リスク評価分析が正常に完了しました。")
             st.subheader("🤖 分析結果レポート")
             
-            if html_content:
-                components.html(f'<div style="background-color: white; color: black; padding: 20px; border-radius: 10px;">{html_content}</div>', height=800, scrolling=True)
+            if canvas_key and (canvas_html := get_canvas_store().get(canvas_key)):
+                components.html(canvas_html, height=800, scrolling=True)
             elif bot_message.strip():
                 st.markdown(f'<div style="background-color: white; color: black; padding: 20px; border-radius: 10px;">\n\n{bot_message}\n\n</div>', unsafe_allow_html=True)
             else:
@@ -4,22 +4,30 @@
 import streamlit as st
 import pandas as pd
 import time
-from datetime import datetime
 from typing import Dict, Any
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import requests
-from pathlib import Path
 import base64
 import json
 import logging
-import ast
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+from demo_ui.alli import AlliClient, ChatStream
+from demo_ui.audit import bot_messages, last_bot_message, parse_violation_data
+from demo_ui.audit_store import content_version, get_audit_store
+from demo_ui.conversations import get_conversation_pool
+from demo_ui.db import get_database
+from demo_ui.expenses import (
+    DISPLAY_COLUMNS,
+    EXPENSE_DB_CONFIG,
+    ExpenseRepository,
+    to_display_frame,
 )
+from demo_ui.log import JsonDump, Lazy, Truncated, configure_logging, event
+from demo_ui.receipts import get_receipt_images
+from demo_ui.singleflight import get_single_flight
+
+# 로깅 설정
+# 출력은 bounded queue 를 거쳐 로깅 스레드에서 수행 (LOG_JSONL_PATH 지정 시 JSON lines 도 기록)
+configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ページ設定
@@ -111,77 +119,55 @@ st.markdown("""
 # DB 설정
 # ============================================================================
 
-DB_CONFIG = {
-    'host': 'dify-ctc-postgre.postgres.database.azure.com',
-    'port': 5432,
-    'user': 'adminuser',
-    'password': 'Passw0rd!',
-    'database': 'eca_demo',
-    'db_type': 'postgresql',
-    'table': 'expenses'
-}
-
-# 영수증 데이터 폴더 경로
-RECEIPT_DATA_DIR = Path(__file__).parent / "data"
+# 배치 리스크 스코어러(demo_ui.risk_scoring)와 같은 설정을 공유
+DB_CONFIG = EXPENSE_DB_CONFIG
 
 
 # ============================================================================
 # DB 연결 및 조회 함수들
 # ============================================================================
 
-def get_db_connection():
-    """PostgreSQL データベース接続"""
-    try:
-        conn = psycopg2.connect(
-            host=DB_CONFIG['host'],
-            port=DB_CONFIG['port'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password'],
-            database=DB_CONFIG['database'],
-            connect_timeout=10
-        )
-        return conn
-    except Exception as e:
-        st.error(f"データベース接続エラー: {str(e)}")
-        return None
+@st.cache_resource
+def get_expense_repository() -> ExpenseRepository:
+    """プロセス共有のコネクションプールと TTL キャッシュ付きリポジトリ"""
+    db = get_database(DB_CONFIG, maxconn=10)
+    return ExpenseRepository(db, table=DB_CONFIG['table'], ttl=60)
 
 
-def get_expense_list():
-    """法人カード精算一覧照会（DB から全件取得）"""
-    conn = get_db_connection()
-    if conn is None:
-        return []
+def get_expense_page(after=None, high_risk_only=False):
+    """法人カード精算一覧照会（キーセット方式で 1 ページ分のみ取得）
+    
+    high_risk_only の場合はバッチで事前計算したリスクスコアの高い順に、
+    違反のある精算のみを返します。
     
+    Returns:
+        (精算一覧の DataFrame, 次ページのカーソル)
+    """
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            # 전체 목록 조회 (id 기준 정렬)
-            query = f"""
-                SELECT * FROM {DB_CONFIG['table']}
-                ORDER BY id
-            """
-            cursor.execute(query)
-            results = cursor.fetchall()
-            
-            # 딕셔너리 리스트로 변환
-            expenses = []
-            for row in results:
-                expense = dict(row)
-                # 날짜 필드가 datetime 객체인 경우 문자열로 변환
-                for key, value in expense.items():
-                    if isinstance(value, datetime):
-                        # timestamp 필드는 날짜와 시간 모두 표시
-                        if key in ['payment_datetime', 'created_at']:
-                            expense[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            expense[key] = value.strftime('%Y-%m-%d')
-                expenses.append(expense)
-            
-            return expenses
+        repo = get_expense_repository()
+        if high_risk_only:
+            expenses, next_cursor = repo.list_risk_page(after)
+        else:
+            expenses, next_cursor = repo.list_page(after)
+        page_ids = expenses['id'].tolist()
+        st.session_state.expense_page_ids = page_ids
+        # 表示中のページの違反項目を 1 クエリでまとめて先読み
+        repo.prefetch_violations(page_ids)
+        # 詳細表示に備えて領収書のプレビューをバックグラウンドで生成
+        get_receipt_images().warm_async(page_ids)
+        return expenses, next_cursor
     except Exception as e:
         st.error(f"データ取得エラー: {str(e)}")
-        return []
-    finally:
-        conn.close()
+        return pd.DataFrame(columns=list(DISPLAY_COLUMNS)), None
+
+
+def get_expense_summary():
+    """件数・金額合計・平均金額を SQL 集計 1 回で取得"""
+    try:
+        return get_expense_repository().summary()
+    except Exception as e:
+        st.error(f"集計取得エラー: {str(e)}")
+        return {'count': 0, 'total_amount': 0, 'average_amount': 0}
 
 
 def get_violations(expense_id: str) -> list:
@@ -193,36 +179,15 @@ def get_violations(expense_id: str) -> list:
     Returns:
         違反項目のリスト
     """
-    conn = get_db_connection()
-    if conn is None:
-        return []
-    
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            query = """
-                SELECT violation_type, description, reference
-                FROM violations
-                WHERE expense_id = %s
-                ORDER BY id
-            """
-            cursor.execute(query, (expense_id,))
-            results = cursor.fetchall()
-            
-            # 딕셔너리 리스트로 변환
-            violations = []
-            for row in results:
-                violations.append({
-                    'violation_type': row.get('violation_type', ''),
-                    'description': row.get('description', ''),
-                    'reference': row.get('reference', '')
-                })
-            
-            return violations
+        repo = get_expense_repository()
+        # キャッシュ切れの場合も、一覧で表示中のページ分を 1 クエリでまとめて取得
+        page_ids = st.session_state.get('expense_page_ids', [])
+        repo.prefetch_violations([expense_id, *page_ids])
+        return repo.get_violations(expense_id)
     except Exception as e:
         st.error(f"違反項目の取得エラー: {str(e)}")
         return []
-    finally:
-        conn.close()
 
 
 def get_expense_detail(expense_id: str) -> Dict[str, Any]:
@@ -234,36 +199,11 @@ def get_expense_detail(expense_id: str) -> Dict[str, Any]:
     Returns:
         精算詳細情報のディクショナリ
     """
-    conn = get_db_connection()
-    if conn is None:
-        return None
-    
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            query = f"""
-                SELECT * FROM {DB_CONFIG['table']}
-                WHERE id = %s
-            """
-            cursor.execute(query, (expense_id,))
-            result = cursor.fetchone()
-            
-            if result:
-                expense = dict(result)
-                # 날짜 필드가 datetime 객체인 경우 문자열로 변환
-                for key, value in expense.items():
-                    if isinstance(value, datetime):
-                        if key in ['payment_datetime', 'created_at']:
-                            expense[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-                        else:
-                            expense[key] = value.strftime('%Y-%m-%d')
-                return expense
-            else:
-                return None
+        return get_expense_repository().get_expense(expense_id)
     except Exception as e:
         st.error(f"精算詳細の取得エラー: {str(e)}")
         return None
-    finally:
-        conn.close()
 
 
 def get_receipt_path(expense_id: str) -> str:
@@ -275,9 +215,9 @@ def get_receipt_path(expense_id: str) -> str:
     Returns:
         領収書 PNG ファイルの絶対パス（文字列）
     """
-    png_path = RECEIPT_DATA_DIR / f"{expense_id}.png"
+    png_path = get_receipt_images().original_path(expense_id)
     
-    if png_path.exists():
+    if png_path:
         return str(png_path)
     else:
         # ファイルがない場合は None を返す
@@ -285,16 +225,22 @@ def get_receipt_path(expense_id: str) -> str:
         return None
 
 
-def display_png(file_path: str):
-    """PNG ファイルを画像として表示
+def display_receipt(expense_id: str):
+    """領収書を表示（既定は WebP プレビュー、クリックで原寸表示）
     
     Args:
-        file_path: PNG ファイルパス
+        expense_id: 精算 ID
     """
-    if file_path and Path(file_path).exists():
-        st.image(file_path, use_container_width=True)
-    else:
+    preview = get_receipt_images().get(expense_id, "preview")
+    if preview is None:
         st.error("領収書ファイルが見つかりません。")
+        return
+    
+    # 原寸 PNG は明示的に開いたときだけ送信する
+    if st.toggle("🔍 原寸で表示", key=f"receipt_full_{expense_id}"):
+        st.image(get_receipt_path(expense_id), use_container_width=True)
+    else:
+        st.image(preview, use_container_width=True)
 
 
 def extract_bot_message(json_data: Dict[str, Any]) -> str:
@@ -337,11 +283,8 @@ def _make_api_call(
     expense_id: str
 ) -> Dict[str, Any]:
     """API 호출 헬퍼 함수 (동기 방식)"""
-    app_id = "TExNQXBwOjY5OTNmNzY1NGIwODRkM2FiNzVhNjY1Nw=="
-    api_url = (
-        f"https://backend.alli.ai/webapi/apps/{app_id}/run"
-    )
-    api_key = "SUKYXKTTRPYVAHHOFTSWQYWS3QFSONQJYA"
+    alli = AlliClient.for_app("audit_manager")
+    api_url = alli.http.url(alli.run_path)
     
     payload = {
         "chat": {
@@ -352,83 +295,120 @@ def _make_api_call(
         "model": "sync"
     }
     
-    headers = {
-        "Content-Type": "application/json",
-        "API-KEY": api_key
-    }
-    
-    msg_preview = (
-        f"{message[:50]}..." if message else "빈 값"
-    )
-    conv_preview = (
-        f"{conversation_id[:50]}..." if conversation_id else "빈 값"
-    )
+    # 포맷팅은 로그가 실제로 출력될 때 로깅 스레드에서만 수행된다
     logger.info(
-        f"[API 호출] expense_id: {expense_id}, "
-        f"message: {msg_preview}, "
-        f"conversationId: {conv_preview}"
+        "[API 호출] expense_id: %s, message: %s, conversationId: %s",
+        expense_id,
+        Truncated(message),
+        Truncated(conversation_id),
+        extra=event("api.call", expense_id=expense_id, app_id=alli.app_id),
     )
     
-    # 동기 방식으로 API 호출
-    try:
-        response = requests.post(
-            api_url,
-            json=payload,
-            headers=headers,
-            timeout=300
-        )
+    def send() -> Dict[str, Any]:
+        # 동기 방식으로 API 호출 (공유 커넥션 풀 경유)
+        response = alli.http.post("run", alli.run_path, json=payload)
         
         logger.info(
-            f"[API 응답 상태] expense_id: {expense_id}, "
-            f"상태 코드: {response.status_code}"
+            "[API 응답 상태] expense_id: %s, 상태 코드: %s",
+            expense_id,
+            response.status_code,
+            extra=event(
+                "api.status", expense_id=expense_id, status=response.status_code
+            ),
         )
         
         # 에러 응답인 경우 상세 로그
         if response.status_code >= 400:
             logger.error(
-                f"[API 호출 에러] expense_id: {expense_id}, "
-                f"상태 코드: {response.status_code}, "
-                f"응답 헤더: {dict(response.headers)}, "
-                f"응답 내용: {response.text[:1000]}"
+                "[API 호출 에러] expense_id: %s, 상태 코드: %s, "
+                "응답 헤더: %s, 응답 내용: %s",
+                expense_id,
+                response.status_code,
+                Lazy(lambda: dict(response.headers)),
+                Truncated(response.text, 1000),
+                extra=event(
+                    "api.error", expense_id=expense_id, status=response.status_code
+                ),
             )
         
         response.raise_for_status()
         
         # JSON 응답 파싱
-        result = response.json()
+        return response.json()
+    
+    try:
+        # 같은 대화에서 같은 요청이 진행 중이면 그 결과를 함께 받는다
+        # (대화가 다르면 상태가 다르므로 합치지 않는다)
+        flight = get_single_flight()
+        result, shared = flight.do(
+            (alli.app_id, conversation_id, expense_id, message), send
+        )
         logger.info(
-            f"[API 응답] expense_id: {expense_id}, "
-            f"응답 수신 완료"
+            "[API 응답] expense_id: %s, 응답 수신 완료%s, single-flight: %s",
+            expense_id,
+            " (진행 중이던 동일 요청에 합류)" if shared else "",
+            Lazy(flight.snapshot),
+            extra=event("api.response", expense_id=expense_id, shared=shared),
         )
         
         return result
         
     except requests.exceptions.HTTPError as e:
+        response = e.response
         logger.error(
-            f"[API HTTP 에러] expense_id: {expense_id}, "
-            f"상태 코드: {e.response.status_code if e.response else 'N/A'}, "
-            f"응답 내용: {e.response.text[:1000] if e.response else str(e)}, "
-            f"요청 URL: {api_url}, "
-            f"요청 페이로드: {json.dumps(payload, ensure_ascii=False)}"
+            "[API HTTP 에러] expense_id: %s, 상태 코드: %s, 응답 내용: %s, "
+            "요청 URL: %s, 요청 페이로드: %s",
+            expense_id,
+            response.status_code if response is not None else "N/A",
+            Truncated(response.text if response is not None else e, 1000),
+            api_url,
+            JsonDump(payload, sample_rate=1),
+            extra=event("api.http_error", expense_id=expense_id),
         )
         raise
     except requests.exceptions.RequestException as e:
         logger.error(
-            f"[API 요청 에러] expense_id: {expense_id}, "
-            f"에러: {str(e)}, "
-            f"요청 URL: {api_url}, "
-            f"요청 페이로드: {json.dumps(payload, ensure_ascii=False)}"
+            "[API 요청 에러] expense_id: %s, 에러: %s, 요청 URL: %s, 요청 페이로드: %s",
+            expense_id,
+            e,
+            api_url,
+            JsonDump(payload, sample_rate=1),
+            extra=event("api.request_error", expense_id=expense_id),
         )
         raise
     except Exception as e:
         logger.error(
-            f"[API 기타 에러] expense_id: {expense_id}, "
-            f"에러: {str(e)}, "
-            f"요청 URL: {api_url}"
+            "[API 기타 에러] expense_id: %s, 에러: %s, 요청 URL: %s",
+            expense_id,
+            e,
+            api_url,
+            extra=event("api.unexpected_error", expense_id=expense_id),
         )
         raise
 
 
+def _stream_api_call(
+    message: str,
+    conversation_id: str,
+    expense_id: str
+) -> ChatStream:
+    """API 호출 헬퍼 함수 (스트리밍 방식)
+
+    응답을 끝까지 기다리지 않고, 도착하는 대로 텍스트를 yield 하는
+    ChatStream 을 반환합니다. st.write_stream 으로 그대로 렌더링할 수 있습니다.
+    """
+    logger.info(
+        "[API 스트림 호출] expense_id: %s, message: %s, conversationId: %s",
+        expense_id,
+        Truncated(message),
+        Truncated(conversation_id),
+        extra=event("api.stream", expense_id=expense_id),
+    )
+    return AlliClient.for_app("audit_manager").stream_chat(
+        message, conversation_id=conversation_id
+    )
+
+
 def _extract_conversation_id(
     response_data: Dict[str, Any],
     expense_id: str
@@ -445,34 +425,60 @@ def _extract_conversation_id(
                     conv_ids[expense_id] != conv_id):
                 conv_ids[expense_id] = conv_id
                 logger.info(
-                    f"[Conversation ID 저장] "
-                    f"expense_id: {expense_id}, "
-                    f"conversation_id: {conv_id[:50]}..."
+                    "[Conversation ID 저장] expense_id: %s, conversation_id: %s",
+                    expense_id,
+                    Truncated(conv_id),
+                    extra=event("conversation.saved", expense_id=expense_id),
                 )
             return conv_id
         else:
+            # 응답 덤프는 샘플링하고, 출력될 때만 직렬화한다
             logger.warning(
-                f"[Conversation ID 추출 실패] "
-                f"응답에서 conversation ID를 찾을 수 없습니다. "
-                f"응답: {json.dumps(response_data, ensure_ascii=False)[:500]}..."
+                "[Conversation ID 추출 실패] "
+                "응답에서 conversation ID를 찾을 수 없습니다. 응답: %s",
+                JsonDump(response_data, 500),
+                extra=event("conversation.missing", expense_id=expense_id),
             )
             return ""
     except Exception as e:
         logger.error(
-            f"[Conversation ID 추출 실패] {str(e)}, "
-            f"응답: {json.dumps(response_data, ensure_ascii=False)[:500]}..."
+            "[Conversation ID 추출 실패] %s, 응답: %s",
+            e,
+            JsonDump(response_data, 500, sample_rate=1),
+            extra=event("conversation.error", expense_id=expense_id),
         )
         return ""
 
 
+def _session_conversation(expense_id: str) -> str:
+    """このセッションでこの精算に使う conversation ID
+    
+    まだなければ事前に作成しておいたプールから新しい conversation を取得します
+    （プールが空ならその場で同期的に作成）。保存済みの審査結果は別の監査担当者の
+    conversation で作られた可能性があるため、その ID は引き継ぎません。
+    """
+    conversation_id = st.session_state.conversation_ids.get(expense_id, "")
+    if not conversation_id:
+        pool = get_conversation_pool("audit_manager")
+        conversation_id = pool.acquire()
+        logger.info(
+            "[Conversation プール] expense_id: %s, 統計: %s",
+            expense_id,
+            Lazy(pool.snapshot),
+        )
+        if conversation_id:
+            st.session_state.conversation_ids[expense_id] = conversation_id
+    return conversation_id
+
+
 def call_audit_agent(expense_id: str) -> str:
-    """감사 에이전트 호출 (동기 방식)
+    """감사 에이전트 호출
     
-    1차 호출: message와 conversationId를 비운 상태로 보내 conversation ID만 확보합니다.
-    2차 호출: 확보한 conversation ID를 사용해 expense_id를 message로 전송하고,
-    그 응답에서 BOT 메시지를 반환합니다.
+    conversation ID는 백그라운드에서 미리 만들어 둔 풀(ConversationPool)에서
+    꺼내므로, 행 클릭 시에는 expense_id를 message로 전송하는 호출 1회만 기다립니다.
+    스트리밍으로 수신한 BOT 메시지를 화면에 바로 표시한 뒤 반환합니다.
     
-    두 번의 호출이 완료되면 더 이상 호출하지 않습니다.
+    호출이 완료되면 더 이상 호출하지 않습니다.
     
     Returns:
         str: BOT 메시지들을 합친 문자열
@@ -480,8 +486,7 @@ def call_audit_agent(expense_id: str) -> str:
     # 반복 호출 방지: 이미 호출 중이면 중단
     if st.session_state.api_call_in_progress.get(expense_id, False):
         logger.warning(
-            f"[호출 중단] expense_id: {expense_id}, "
-            f"이미 호출이 진행 중입니다."
+            "[호출 중단] expense_id: %s, 이미 호출이 진행 중입니다.", expense_id
         )
         return "⏳ すでに呼び出しが進行中です。しばらくお待ちください。"
     
@@ -493,162 +498,87 @@ def call_audit_agent(expense_id: str) -> str:
     
     # 호출 시작 플래그 설정
     st.session_state.api_call_in_progress[expense_id] = True
-    
+    # 이전에 연 정산의 위반항목이 이 정산의 결과로 저장되지 않도록 초기화
+    st.session_state.violation_data = None
+
     try:
-        # Conversation ID 조회 (expense_id별로 관리)
-        conversation_id = st.session_state.conversation_ids.get(expense_id, "")
+        # Conversation ID 조회 (expense_id별로 관리, 없으면 풀에서 꺼낸다)
+        try:
+            conversation_id = _session_conversation(expense_id)
+        except Exception as e:
+            # 실패 플래그 설정
+            st.session_state.conversation_init_failed[expense_id] = True
+            logger.error(
+                "[Conversation 取得エラー] expense_id: %s, エラー: %s", expense_id, e
+            )
+            return f"❌ Conversation 取得エラー: {str(e)}"
         
-        # 첫 호출: conversation ID가 없으면 먼저 conversation ID 획득
         if not conversation_id:
-            logger.info(
-                f"[1回目呼び出し] expense_id: {expense_id}, "
-                f"message: 空, conversationId: 空"
+            # 실패 플래그 설정
+            st.session_state.conversation_init_failed[expense_id] = True
+            logger.error(
+                "[Conversation 取得失敗] expense_id: %s, "
+                "Conversation ID を取得できませんでした。",
+                expense_id,
+            )
+            return (
+                "❌ Conversation ID を取得できませんでした。"
+                "レスポンスを確認してください."
             )
-            
-            try:
-                # 첫 호출: message와 conversationId를 빈 값으로
-                response_data = _make_api_call("", "", expense_id)
-                
-                # 응답 전체 로그
-                response_str = json.dumps(
-                    response_data, ensure_ascii=False
-                )[:1000]
-                logger.info(
-                    f"[1回目応答] expense_id: {expense_id}, "
-                    f"レスポンス: {response_str}..."
-                )
-                
-                # Conversation ID 추출
-                conversation_id = _extract_conversation_id(
-                    response_data, expense_id
-                )
-                
-                if not conversation_id:
-                    # 실패 플래그 설정
-                    failed = st.session_state.conversation_init_failed
-                    failed[expense_id] = True
-                    response_str = json.dumps(
-                        response_data, ensure_ascii=False
-                    )
-                    logger.error(
-                        f"[1回目失敗] expense_id: {expense_id}, "
-                        f"Conversation ID を取得できませんでした。 "
-                        f"全レスポンス: {response_str}"
-                    )
-                    error_msg = (
-                        "❌ Conversation ID を取得できませんでした。"
-                        "レスポンスを確認してください."
-                    )
-                    # 플래그 해제
-                    st.session_state.api_call_in_progress[expense_id] = False
-                    return error_msg
-                
-                logger.info(
-                    f"[첫 호출 완료] expense_id: {expense_id}, "
-                    f"conversation_id 획득: {conversation_id[:50]}..."
-                )
-                
-            except Exception as e:
-                # 실패 플래그 설정
-                st.session_state.conversation_init_failed[expense_id] = True
-                logger.error(
-                    f"[1回目エラー] expense_id: {expense_id}, "
-                    f"エラー: {str(e)}"
-                )
-                error_msg = f"❌ 1回目呼び出しエラー: {str(e)}"
-                # 플래그 해제
-                st.session_state.api_call_in_progress[expense_id] = False
-                return error_msg
         
-        # 두 번째 호출: conversation ID를 사용하여 expense_id를 메시지로 전송
+        # conversation ID를 사용하여 expense_id를 메시지로 전송
         logger.info(
-            f"[2回目呼び出し] expense_id: {expense_id}, "
-            f"message: {expense_id}, "
-            f"conversationId: {conversation_id[:50]}..."
+            "[エージェント呼び出し] expense_id: %s, message: %s, conversationId: %s",
+            expense_id,
+            expense_id,
+            Truncated(conversation_id),
         )
         
-        # 두 번째 호출: conversation ID와 expense_id를 메시지로 전송
-        response_data = _make_api_call(expense_id, conversation_id, expense_id)
+        # conversation ID와 expense_id를 메시지로 전송 (스트리밍)
+        # 도착한 토큰은 다이얼로그에 바로 렌더링한다.
+        # 같은 정산에 대한 동시 호출은 AuditResultStore.get_or_compute 가 한 번으로 묶는다
+        stream = _stream_api_call(expense_id, conversation_id, expense_id)
+        st.write_stream(stream)
+        response_data = {
+            'result': {
+                'conversation': {'id': stream.conversation_id},
+                'responses': list(stream.responses.values()),
+            }
+        }
+        # 서버가 돌려준 conversation ID로 세션 상태를 맞춘다
+        if stream.conversation_id:
+            _extract_conversation_id(response_data, expense_id)
         
         # 응답 파싱 및 BOT 메시지 추출
-        logger.info(
-            f"[2回目応答] expense_id: {expense_id}, "
-            f"レスポンス受信完了"
-        )
-        
-        # BOT 메시지 추출
-        result = response_data.get('result', {})
-        responses = result.get('responses', [])
-        
-        seen_message_ids = set()  # 중복 메세지 ID 방지
-        bot_messages = []
-        last_bot_message = None
-        
-        # 마지막 BOT 응답 찾기
-        for resp in reversed(responses):
-            if resp.get('sender') == 'BOT':
-                last_bot_message = resp.get('message', '')
-                break
+        logger.info("[エージェント応答] expense_id: %s, レスポンス受信完了", expense_id)
         
-        # 모든 BOT 메세지 수집
-        for resp in responses:
-            if resp.get('sender') == 'BOT':
-                msg_id = resp.get('id', '')
-                message = resp.get('message', '')
-                
-                if message and msg_id not in seen_message_ids:
-                    seen_message_ids.add(msg_id)
-                    bot_messages.append(message)
-                    
-                    logger.info(
-                        f"[BOT メッセージ検出] ID: {msg_id}, "
-                        f"メッセージ: {message[:100]}..."
-                    )
+        # BOT 메시지 추출 (배치 스코어러와 같은 파서 사용)
+        responses = response_data.get('result', {}).get('responses', [])
+        bot_message_list = bot_messages(responses)
+        for message in bot_message_list:
+            logger.info("[BOT メッセージ検出] メッセージ: %s", Truncated(message, 100))
         
         logger.info(
-            f"[応答完了] expense_id: {expense_id}, "
-            f"合計 {len(bot_messages)} 件の BOT メッセージ"
+            "[応答完了] expense_id: %s, 合計 %d 件の BOT メッセージ",
+            expense_id,
+            len(bot_message_list),
         )
         
         # 마지막 메시지에서 위반항목 데이터 추출
         violation_data = None
-        if last_bot_message:
-            try:
-                # message에서 딕셔너리 형태의 문자열 찾기
-                # {'success': True, 'columns': [...], 'rows': [...]} 형태
-                start_idx = last_bot_message.find("{'success'")
-                if start_idx == -1:
-                    start_idx = last_bot_message.find('{"success"')
-                
-                if start_idx != -1:
-                    # ディクショナリ文字列を抽出
-                    dict_str = last_bot_message[start_idx:]
-                    # 閉じカッコを探索
-                    brace_count = 0
-                    end_idx = -1
-                    for i, char in enumerate(dict_str):
-                        if char == '{':
-                            brace_count += 1
-                        elif char == '}':
-                            brace_count -= 1
-                            if brace_count == 0:
-                                end_idx = i + 1
-                                break
-                    
-                    if end_idx > 0:
-                        dict_str = dict_str[:end_idx]
-                        # 문자열을 딕셔너리로 변환
-                        violation_data = ast.literal_eval(dict_str)
-                        logger.info(
-                            f"[위반항목 데이터 추출] expense_id: {expense_id}, "
-                            f"columns: {violation_data.get('columns', [])}, "
-                            f"rows 수: {len(violation_data.get('rows', []))}"
-                        )
-            except Exception as e:
-                logger.warning(
-                    f"[위반항목 파싱 실패] expense_id: {expense_id}, "
-                    f"오류: {str(e)}"
+        try:
+            violation_data = parse_violation_data(last_bot_message(responses))
+            if violation_data:
+                logger.info(
+                    "[위반항목 데이터 추출] expense_id: %s, columns: %s, rows 수: %d",
+                    expense_id,
+                    violation_data.get('columns', []),
+                    len(violation_data.get('rows', [])),
                 )
+        except Exception as e:
+            logger.warning(
+                "[위반항목 파싱 실패] expense_id: %s, 오류: %s", expense_id, e
+            )
         
         # 위반항목 데이터를 세션 상태에 저장
         if violation_data and violation_data.get('success'):
@@ -658,58 +588,54 @@ def call_audit_agent(expense_id: str) -> str:
             }
         
         # BOT 메세지를 하나의 문자열로 결합
-        result_text = "\n".join(bot_messages)
+        result_text = "\n".join(bot_message_list)
         
         # 완료 메세지 추가
-        if bot_messages:
+        if bot_message_list:
             result_text += "\n\n✅ 応答完了"
         else:
             result_text = "✅ 応答完了（BOT メッセージなし）"
         
-        # 두 번째 호출 완료 플래그 설정 (재호출 방지)
+        # 호출 완료 플래그 설정 (재호출 방지)
         st.session_state.api_call_completed[expense_id] = True
         logger.info(
-            f"[호출 완료] expense_id: {expense_id}, "
-            f"두 번의 호출이 완료되어 더 이상 호출하지 않음"
+            "[호출 완료] expense_id: %s, 호출이 완료되어 더 이상 호출하지 않음",
+            expense_id,
         )
         
         return result_text
             
     except requests.exceptions.RequestException as e:
-        logger.error(f"[API 호출 오류] {str(e)}")
+        logger.error("[API 호출 오류] %s", e)
         return f"❌ API 호출 오류: {str(e)}"
     except Exception as e:
-        logger.error(f"[처리 오류] {str(e)}")
+        logger.error("[처리 오류] %s", e)
         return f"❌ 처리 오류: {str(e)}"
     finally:
         # 호출 완료 플래그 해제 (반복 호출 방지)
         st.session_state.api_call_in_progress[expense_id] = False
-        logger.info(
-            f"[호출 완료] expense_id: {expense_id}, "
-            f"플래그 해제"
-        )
+        logger.info("[호출 완료] expense_id: %s, 플래그 해제", expense_id)
 
 
 def call_clarification_request(expense_id: str) -> str:
     """소명 요청 메일 초안 생성 API 호출
     
-    기존 conversation_id를 사용하여 message \"YES\"를 전송하고,
+    이 세션의 conversation_id(없으면 새 conversation)를 사용하여 message \"YES\"를 전송하고,
     응답에서 type이 \"llm\"인 message를 반환합니다.
     
     Returns:
         str: 메일 초안 내용 (type이 \"llm\"인 message)
     """
-    # Conversation ID 조회
-    conversation_id = st.session_state.conversation_ids.get(expense_id, "")
-    
-    if not conversation_id:
-        logger.error(
-            f"[소명 요청 실패] expense_id: {expense_id}, "
-            f"Conversation ID가 없습니다."
-        )
-        return ""
-    
     try:
+        # Conversation ID 조회 (복원된 심사 결과라면 새 conversation 을 연다)
+        conversation_id = _session_conversation(expense_id)
+        if not conversation_id:
+            logger.error(
+                f"[소명 요청 실패] expense_id: {expense_id}, "
+                f"Conversation ID가 없습니다."
+            )
+            return ""
+        
         # API 호출: message를 \"YES\"로 전송
         logger.info(
             f"[소명 요청 호출] expense_id: {expense_id}, "
@@ -806,6 +732,31 @@ def get_audit_result(expense_id: str, stream_content: str = "") -> Dict[str, Any
         }
 
 
+def run_audit(expense_id: str) -> Dict[str, Any]:
+    """監査エージェントを呼び出し、永続化する審査結果レコードを返す
+    
+    エージェント呼び出しが完了しなかった場合は例外を送出し、結果は保存されません。
+    """
+    result_content = call_audit_agent(expense_id)
+    if not st.session_state.api_call_completed.get(expense_id, False):
+        raise RuntimeError(result_content)
+    # conversation ID は保存しない（別セッションの follow-up に流用させない）
+    return {
+        "audit_result": get_audit_result(expense_id, result_content),
+        "violation_data": st.session_state.violation_data,
+    }
+
+
+def restore_audit_record(expense_id: str, record: Dict[str, Any]):
+    """保存済みの審査結果レコードをセッション状態に展開"""
+    st.session_state.audit_result = record["audit_result"]
+    # 記録を作った監査担当者の conversation は引き継がない。follow-up は
+    # _session_conversation がこのセッション用の新しい conversation で行う
+    st.session_state.violation_data = record.get("violation_data")
+    # 審査完了フラグ設定（expense_id ごと）
+    st.session_state.review_complete[expense_id] = True
+
+
 # ============================================================================
 # Session State 초기화
 # ============================================================================
@@ -822,6 +773,10 @@ if 'audit_result' not in st.session_state:
 if 'stream_complete' not in st.session_state:
     st.session_state.stream_complete = False
 
+# 목록 페이지 커서 (키셋 페이지네이션, 각 페이지의 시작 직전 id)
+if 'expense_page_cursors' not in st.session_state:
+    st.session_state.expense_page_cursors = [None]
+
 # 다이얼로그 관련 상태
 if 'show_review_dialog' not in st.session_state:
     st.session_state.show_review_dialog = False
@@ -871,23 +826,42 @@ def show_expense_list():
     col1, col2 = st.columns([6, 1])
     with col2:
         if st.button("🔄 再読み込み"):
+            get_expense_repository().invalidate()
             st.rerun()
     
     st.markdown("---")
     
-    # 精算一覧取得（DB から取得）
-    expenses = get_expense_list()
+    # 高リスクのみ表示（バッチ採点結果がある場合のみ既定でオン）
+    try:
+        scored = get_expense_repository().scored_count()
+    except Exception:
+        scored = 0
+    high_risk_only = st.toggle(
+        "🚨 高リスクのみ表示（リスクスコア順）",
+        value=scored > 0,
+        disabled=scored == 0,
+        key="high_risk_only",
+        help="python -m demo_ui.risk_scoring で事前採点した結果を使います",
+        on_change=lambda: st.session_state.update(expense_page_cursors=[None]),
+    )
+    
+    # 行クリック前に conversation プールを温めておく
+    get_conversation_pool("audit_manager")
+    
+    # 精算一覧取得（現在のページのみ DB から取得）
+    cursors = st.session_state.expense_page_cursors
+    expenses, next_cursor = get_expense_page(cursors[-1], high_risk_only)
+    summary = get_expense_summary()
     
     # 統計情報
     st.markdown("### 📊 審査待ち状況")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("件数（合計）", len(expenses))
+        st.metric("件数（合計）", summary['count'])
     with col2:
-        total_amount = sum(exp['amount'] for exp in expenses)
-        st.metric("金額合計", f"{total_amount:,}円")
+        st.metric("金額合計", f"{int(summary['total_amount']):,}円")
     with col3:
-        st.metric("平均金額", f"{int(total_amount/len(expenses)):,}円")
+        st.metric("平均金額", f"{int(summary['average_amount']):,}円")
     with col4:
         st.metric("待機期間", "1〜5日")
     
@@ -936,21 +910,8 @@ def show_expense_list():
     </style>
     """, unsafe_allow_html=True)
     
-    # テーブルデータ準備（精算 ID はフル表示）
-    table_data = []
-    for expense in expenses:
-        expense_id = expense.get('id', '')
-        table_data.append({
-            "精算 ID": expense_id,
-            "申請者": expense.get('user_name', ''),
-            "加盟店": expense.get('business_name', ''),
-            "分類": expense.get('business_type', ''),
-            "金額": f"{expense.get('amount', 0):,}円",
-            "利用日": expense.get('payment_datetime', '')
-        })
-    
-    # データフレーム生成
-    df = pd.DataFrame(table_data)
+    # テーブルデータ準備（列名のみ変換、金額の書式はブラウザ側で適用）
+    df = to_display_frame(expenses)
     
     # テーブル表示（行選択可能）
     event = st.dataframe(
@@ -958,15 +919,31 @@ def show_expense_list():
         use_container_width=True,
         hide_index=True,
         height=400,
+        column_config={
+            "金額": st.column_config.NumberColumn(format="%,d円"),
+        },
         on_select="rerun",
         selection_mode="single-row"
     )
     
+    # ページ送り
+    col1, col2, col3 = st.columns([1, 1, 6])
+    with col1:
+        if st.button("◀ 前へ", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("次へ ▶", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with col3:
+        st.caption(f"ページ {len(cursors)}")
+    
     # 行が選択されているか確認
     if len(event.selection.rows) > 0:
         selected_row_idx = event.selection.rows[0]
         if selected_row_idx < len(expenses):
-            expense_id = expenses[selected_row_idx].get('id', '')
+            expense_id = expenses['id'].iloc[selected_row_idx]
             st.session_state.selected_expense_id = expense_id
             st.session_state.show_review_dialog = True
             # 審査完了フラグは expense_id ごとに管理するためここではリセットしない
@@ -992,30 +969,33 @@ def show_review_dialog(expense_id: str):
     review_complete = st.session_state.review_complete.get(expense_id, False)
     
     if not review_complete:
-        # API 呼び出しと結果受信（スピナー表示）
-        with st.spinner("🤖 AI 監査エージェント分析中..."):
-            try:
-                result_content = call_audit_agent(expense_id)
-                
-                # 최종 결과 파싱
-                st.session_state.audit_result = get_audit_result(
-                    expense_id, result_content
+        # 保存済みの審査結果があれば再利用（精算データが変わっていない場合のみ）
+        version = content_version(get_expense_detail(expense_id))
+        store = get_audit_store()
+        try:
+            with st.spinner("🤖 AI 監査エージェント分析中..."):
+                # 同じ精算への同時リクエストはエージェント呼び出し 1 回にまとめる
+                record = store.get_or_compute(
+                    expense_id, version, lambda: run_audit(expense_id)
                 )
-                # 審査完了フラグ設定（expense_id ごと）
-                st.session_state.review_complete[expense_id] = True
-            except Exception as e:
-                st.error(f"処理エラー: {str(e)}")
-                # エラー発生時は空の結果を設定
-                st.session_state.audit_result = get_audit_result(
-                    expense_id, ""
-                )
-                st.session_state.review_complete[expense_id] = True
-                st.rerun()
+            restore_audit_record(expense_id, record)
+        except Exception as e:
+            st.error(f"処理エラー: {str(e)}")
+            # エラー発生時は空の結果を設定（保存はしない）
+            st.session_state.audit_result = get_audit_result(
+                expense_id, ""
+            )
+            st.session_state.review_complete[expense_id] = True
+            st.rerun()
     
     # 審査完了後はボタンのみ表示
     if st.session_state.review_complete.get(expense_id, False):
         st.success("✅ 審査が完了しました。")
         
+        thumb = get_receipt_images().get(expense_id, "thumb")
+        if thumb:
+            st.image(thumb, width=160, caption="領収書")
+        
         col1, col2 = st.columns(2)
         with col1:
             if st.button(
@@ -1090,12 +1070,7 @@ def show_expense_detail():
         
         with col2:
             st.markdown("### 🧾 領収書")
-            # 精算 ID に対応する PNG ファイルパス取得
-            receipt_path = get_receipt_path(expense_id)
-            if receipt_path:
-                display_png(receipt_path)
-            else:
-                st.error("領収書が見つかりません。")
+            display_receipt(expense_id)
         
         st.markdown("---")
         
@@ -1212,8 +1187,7 @@ def show_expense_detail():
                         with st.spinner("メール送信中..."):
                             try:
                                 # Conversation ID 조회
-                                conv_ids = st.session_state.conversation_ids
-                                conversation_id = conv_ids.get(expense_id, "")
+                                conversation_id = _session_conversation(expense_id)
                                 
                                 if not conversation_id:
                                     st.error("Conversation ID がありません。")
@@ -3,14 +3,19 @@ from __future__ import annotations
 from pathlib import Path
 
 import folium
-import folium.features
 import geopandas as gpd
 import pandas as pd
-import requests
 import shapely
 import streamlit as st
 
-from streamlit_folium import st_folium
+from demo_ui.boundaries import get_boundary_store
+from streamlit_folium import (
+    MarkerArray,
+    MultiResolutionGeoJson,
+    PointIndex,
+    PolygonIndex,
+    st_folium,
+)
 
 p = Path(__file__).parent / "states.csv"
 STATE_DATA = pd.read_csv(p)
@@ -26,29 +31,45 @@ st.subheader(
 )
 
 
-@st.cache_data
-def _get_all_state_bounds() -> dict:
-    url = "https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json"
-    return requests.get(url).json()
+def get_state_bounds(state: str) -> dict | None:
+    # the boundary file is optional; without it only the capitals are drawn
+    store = get_boundary_store()
+    if store is None or state not in store:
+        return None
+    return store.feature_collection(state)
+
+
+@st.cache_resource
+def _get_capital_index() -> PointIndex:
+    return PointIndex.from_dataframe(STATE_DATA, key="state")
 
 
-@st.cache_data
-def get_state_bounds(state: str) -> dict:
-    data = _get_all_state_bounds()
-    state_entry = next(f for f in data["features"] if f["properties"]["name"] == state)
-    return {"type": "FeatureCollection", "features": [state_entry]}
+@st.cache_resource
+def _get_populations() -> dict[str, int]:
+    return dict(zip(STATE_DATA["state"], STATE_DATA["population"], strict=True))
 
 
-def get_state_from_lat_lon(lat: float, lon: float) -> str:
-    state_row = STATE_DATA[
-        STATE_DATA.latitude.between(lat - 0.0001, lat + 0.0001)
-        & STATE_DATA.longitude.between(lon - 0.0001, lon + 0.0001)
-    ].iloc[0]
-    return state_row["state"]
+@st.cache_resource
+def _get_state_index() -> PolygonIndex | None:
+    store = get_boundary_store()
+    if store is None:
+        return None
+    return PolygonIndex(
+        (store.feature(name) for name in store.names()),
+        key=lambda feature: feature["properties"]["name"],
+    )
+
+
+def get_state_from_lat_lon(lat: float, lon: float) -> str | None:
+    # a capital marker, or else the state polygon that was clicked
+    state = _get_capital_index().nearest(lat, lon, max_distance=0.0001)
+    if state is None and (index := _get_state_index()) is not None:
+        state = index.locate(lat, lon)
+    return state
 
 
 def get_population(state: str) -> int:
-    return STATE_DATA.set_index("state").loc[state]["population"]
+    return _get_populations()[state]
 
 
 def main():
@@ -58,6 +79,11 @@ def main():
         st.session_state["selected_state"] = "Indiana"
 
     bounds = get_state_bounds(st.session_state["selected_state"])
+    if bounds is None:
+        st.info(
+            "State outlines are unavailable: build them with "
+            "`python -m demo_ui.boundaries`."
+        )
 
     st.write(f"## {st.session_state['selected_state']}")
     population = get_population(st.session_state["selected_state"])
@@ -73,21 +99,19 @@ def main():
         # If you want to dynamically add or remove items from the map,
         # add them to a FeatureGroup and pass it to st_folium
         fg = folium.FeatureGroup(name="State bounds")
-        fg.add_child(folium.features.GeoJson(bounds))
-
-        capitals = STATE_DATA
-
-        for capital in capitals.itertuples():
-            fg.add_child(
-                folium.Marker(
-                    location=[capital.latitude, capital.longitude],
-                    popup=f"{capital.capital}, {capital.state}",
-                    tooltip=f"{capital.capital}, {capital.state}",
-                    icon=folium.Icon(color="green")
-                    if capital.state == st.session_state["selected_state"]
-                    else None,
-                )
-            )
+        if bounds is not None:
+            fg.add_child(MultiResolutionGeoJson(bounds))
+
+        capitals = STATE_DATA.assign(
+            label=STATE_DATA["capital"] + ", " + STATE_DATA["state"],
+            color=STATE_DATA["state"]
+            .eq(st.session_state["selected_state"])
+            .map({True: "green", False: None}),
+        )
+        # one layer for all capitals, instead of a folium.Marker per row
+        fg.add_child(
+            MarkerArray(capitals, tooltip="label", popup="label", color="color")
+        )
 
         out = st_folium(
             m,
@@ -103,8 +127,9 @@ def main():
     ):
         st.session_state["last_object_clicked"] = out["last_object_clicked"]
         state = get_state_from_lat_lon(*out["last_object_clicked"].values())
-        st.session_state["selected_state"] = state
-        st.rerun()
+        if state is not None:
+            st.session_state["selected_state"] = state
+            st.rerun()
 
     st.write("## Dynamic feature group updates")
 
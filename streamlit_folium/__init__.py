@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-import contextlib
 import hashlib
+import marshal
 import os
 import re
+import threading
+import time
 import warnings
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from textwrap import dedent
-from typing import Callable, Iterable
+from typing import Any, Callable, Iterable, Iterator, cast
 
 import branca
 import folium
@@ -16,6 +22,9 @@ import streamlit as st
 import streamlit.components.v1 as components
 from jinja2 import UndefinedError
 
+from streamlit_folium.layers import MarkerArray, MultiResolutionGeoJson  # noqa: F401
+from streamlit_folium.spatial import PointIndex, PolygonIndex  # noqa: F401
+
 # Create a _RELEASE constant. We'll set this to False while we're developing
 # the component, and True when we're ready to package and distribute it.
 _RELEASE = True
@@ -42,6 +51,9 @@ def generate_js_hash(
     the hash.
 
     Also strip maps/<random_hash>, which is generated by google earth engine
+
+    st_folium itself now keys the component with :func:`structural_key`;
+    this is kept for code that calls it directly.
     """
     pattern = r"(_[a-z0-9]+)"
     standardized_js = re.sub(pattern, "", js_string) + str(key)
@@ -95,10 +107,9 @@ def folium_static(
     )
     # if Map, wrap in Figure
     if isinstance(fig, folium.Map):
-        fig = folium.Figure().add_child(fig)
-        return components.html(
-            fig.render(), height=(fig.height or height) + 10, width=width
-        )
+        figure = folium.Figure()
+        figure.add_child(fig)
+        return components.html(figure.render(), height=height + 10, width=width)
 
     # if DualMap, get HTML representation
     if isinstance(fig, (folium.plugins.DualMap, branca.element.Figure)):
@@ -106,29 +117,77 @@ def folium_static(
     return st_folium(fig, width=width, height=height, returned_objects=[])
 
 
+@contextmanager
+def _timed(timings: dict[str, float] | None, stage: str) -> Iterator[None]:
+    """Add the block's wall time, in ms, to ``timings[stage]`` if profiling."""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def _root_figure(fig: folium.MacroElement) -> branca.element.Figure:
+    """The figure whose header, html and script sections the map renders into."""
+    root = fig.get_root()
+    if not isinstance(root, branca.element.Figure):
+        raise TypeError(f"{fig.get_name()} is not part of a folium Figure")
+    return root
+
+
+def _render_root(fig: folium.MacroElement) -> None:
+    """
+    Render the map's elements once. Each element adds its header, html and
+    script parts to the root figure's sections; the figure's own document
+    template, which st_folium doesn't use, is not rendered.
+    """
+    if isinstance(fig, folium.plugins.DualMap):
+        fig.render()
+        return
+    for child in _root_figure(fig)._children.values():
+        child.render()
+
+
 def _get_header(fig: folium.MacroElement) -> str:
     """Get the header string for the map"""
-    header = fig.get_root().header.render()
-    header = re.sub(r'<script src=".*?"></script>', "", header)
-    header = re.sub(r'<link rel="stylesheet" href=".*?"/>', "", header)
-    # Fix Leaflet default marker icon path issue
+    map_id = get_full_id(fig)
+    parts = []
+    for part in _root_figure(fig).header._children.values():
+        # css and js links are loaded separately, see get_dependencies
+        if isinstance(part, (branca.element.CssLink, branca.element.JavascriptLink)):
+            continue
+        header = part.render()
+        if "L.Icon.Default.imagePath" in header:
+            header = _fix_icon_image_path(header)
+        parts.append(header.replace(map_id, "map_div"))
+    return "\n".join(parts)
+
+
+def _fix_icon_image_path(header: str) -> str:
     # Folium may generate incorrect imagePath missing "/images/" directory
     # See: https://github.com/randyzwitch/streamlit-folium/issues/275
     # See: https://github.com/Leaflet/Leaflet/issues/4968
-    header = re.sub(
+    return re.sub(
         r'(L\.Icon\.Default\.imagePath\s*=\s*["\'])([^"\']*?/dist)(["\'])',
         r"\1\2/images/\3",
         header,
     )
-    map_id = get_full_id(fig)
-    return header.replace(map_id, "map_div")
 
 
 def _get_html(fig: folium.MacroElement) -> str:
     """Get the html string for the map"""
-    html = fig.get_root().html.render()
-    html = re.sub(r'<div class="folium-map" id=".*" ></div>', "", html)
-    return html.strip()
+    # the frontend creates the map containers itself
+    maps = (fig.m1, fig.m2) if isinstance(fig, folium.plugins.DualMap) else (fig,)
+    containers = {m.get_name() for m in maps}
+    return "\n".join(
+        part.render().strip()
+        for name, part in _root_figure(fig).html._children.items()
+        if name not in containers
+    ).strip()
 
 
 def get_full_id(m: folium.MacroElement) -> str:
@@ -138,9 +197,22 @@ def get_full_id(m: folium.MacroElement) -> str:
     return f"{m._name.lower()}_{m._id}"
 
 
-def _get_map_string(fig: folium.Map) -> str:
-    leaflet = generate_leaflet_string(fig)
+def _get_map_string(
+    fig: folium.Map,
+    workers: int | None = None,
+    signatures: list[bytes] | None = None,
+    element_types: dict | None = None,
+    timings: dict[str, float] | None = None,
+) -> str:
+    with _timed(timings, "script_render"):
+        leaflet = generate_leaflet_string(
+            fig, workers=workers, signatures=signatures, element_types=element_types
+        )
+    with _timed(timings, "script_rewrite"):
+        return _rewrite_map_string(fig, leaflet)
 
+
+def _rewrite_map_string(fig: folium.Map, leaflet: str) -> str:
     # Get rid of the annoying popup
     leaflet = leaflet.replace("alert(coords);", "")
 
@@ -167,12 +239,17 @@ def _get_feature_group_string(
     feature_group_to_add: folium.FeatureGroup,
     map: folium.Map,
     idx: int = 0,
+    workers: int | None = None,
+    element_types: dict | None = None,
 ) -> str:
     feature_group_to_add._id = f"feature_group_{idx}"
     feature_group_to_add.add_to(map)
     feature_group_to_add.render()
     feature_group_string = generate_leaflet_string(
-        feature_group_to_add, base_id=f"feature_group_{idx}"
+        feature_group_to_add,
+        base_id=f"feature_group_{idx}",
+        workers=workers,
+        element_types=element_types,
     )
     m_id = get_full_id(map)
     feature_group_string = feature_group_string.replace(m_id, "map_div")
@@ -192,11 +269,14 @@ def _get_feature_group_string(
 def _get_layer_control_string(
     control: folium.LayerControl,
     map: folium.Map,
+    element_types: dict | None = None,
 ) -> str:
     control._id = "layer_control"
     control.add_to(map)
     control.render()
-    control_string = generate_leaflet_string(control, base_id="layer_control")
+    control_string = generate_leaflet_string(
+        control, base_id="layer_control", element_types=element_types
+    )
     m_id = get_full_id(map)
     control_string = control_string.replace(m_id, "map_div")
     control_string = dedent(control_string)
@@ -226,6 +306,8 @@ def st_folium(
     render: bool = True,
     on_change: Callable | None = None,
     wrap_longitude: bool = False,
+    render_workers: int | None = None,
+    profile: bool = False,
 ):
     """Display a Folium object in Streamlit, returning data as user interacts
     with app.
@@ -282,6 +364,17 @@ def st_folium(
         If True, normalize longitude values to be within -180 to 180 degrees.
         This is useful when panning around the world causes longitude values to
         exceed the standard bounds.
+    render_workers: int or None
+        If greater than 1, render the map's and feature groups' child layers
+        on a thread pool of this size. Only worth it for maps with many
+        large layers, and mostly on free-threaded Python builds, since
+        template rendering holds the GIL.
+    profile: bool
+        If True, time each stage of preparing the map and measure the
+        payload sent to the browser, and have the browser time loading the
+        scripts, evaluating the map script, loading the first tile and the
+        round trip of its last returned value. The numbers are shown in an
+        expander and returned under the ``"profile"`` key.
     Returns
     -------
     dict
@@ -297,30 +390,49 @@ def st_folium(
     if use_container_width:
         width = None
 
+    # stage -> ms, only when profiling
+    timings: dict[str, float] | None = {} if profile else None
+    start = time.perf_counter()
+
     folium_map: folium.Map = fig  # type: ignore
-    if render:
-        if isinstance(fig, folium.plugins.DualMap):
-            folium_map.render()
-        else:
-            folium_map.get_root().render()
 
     # handle the case where you pass in a figure rather than a map
     # this assumes that a map is the first child
     if not (isinstance(fig, (folium.Map, folium.plugins.DualMap))):
-        folium_map = next(iter(fig._children.values()))
+        folium_map = cast(folium.Map, next(iter(fig._children.values())))
 
-    folium_map.render()
+    with _timed(timings, "render"):
+        if render:
+            _render_root(fig)
+        else:
+            # the map itself is always rendered: that puts its viewport meta
+            # tag and container css in the header; only the walk over the
+            # root's other elements is skipped
+            folium_map.render()
 
     # we need to do this before _get_map_string, because
     # _get_map_string alters the folium structure
-    html = _get_html(folium_map)
-    header = _get_header(folium_map)
-
-    leaflet = _get_map_string(folium_map)  # type: ignore
+    with _timed(timings, "html_header"):
+        html = _get_html(folium_map)
+        header = _get_header(folium_map)
+
+    signatures: list[bytes] = []
+    # every element type in the map, feature groups and layer control, in
+    # tree order; the css/js links are looked up once per type
+    element_types: dict = {}
+    leaflet = _get_map_string(
+        folium_map,  # type: ignore
+        workers=render_workers,
+        signatures=signatures,
+        element_types=element_types,
+        timings=timings,
+    )
 
     m_id = get_full_id(folium_map)
 
-    def bounds_to_dict(bounds_list: list[list[float]]) -> dict[str, dict[str, float]]:
+    def bounds_to_dict(
+        bounds_list: list[list[float | None]],
+    ) -> dict[str, dict[str, float | None]]:
         southwest, northeast = bounds_list
         return {
             "_southWest": {
@@ -369,16 +481,22 @@ def st_folium(
         if isinstance(feature_group_to_add, folium.FeatureGroup):
             feature_group_to_add = [feature_group_to_add]
         feature_group_string = ""
-        for idx, feature_group in enumerate(feature_group_to_add):
-            feature_group_string += _get_feature_group_string(
-                feature_group,
-                map=folium_map,
-                idx=idx,
-            )
+        with _timed(timings, "feature_groups"):
+            for idx, feature_group in enumerate(feature_group_to_add):
+                feature_group_string += _get_feature_group_string(
+                    feature_group,
+                    map=folium_map,
+                    idx=idx,
+                    workers=render_workers,
+                    element_types=element_types,
+                )
 
     layer_control_string = None
     if layer_control is not None:
-        layer_control_string = _get_layer_control_string(layer_control, folium_map)
+        with _timed(timings, "layer_control"):
+            layer_control_string = _get_layer_control_string(
+                layer_control, folium_map, element_types
+            )
 
     if debug:
         with st.expander("Show generated code"):
@@ -401,36 +519,24 @@ def st_folium(
                 st.info("Layer control js:")
                 st.code(layer_control_string)
 
-    def walk(fig):
-        if isinstance(fig, branca.colormap.ColorMap):
-            yield fig
-        if isinstance(fig, folium.plugins.DualMap):
-            yield from walk(fig.m1)
-            yield from walk(fig.m2)
-        if isinstance(fig, folium.elements.JSCSSMixin):
-            yield fig
-        if hasattr(fig, "_children"):
-            for child in fig._children.values():
-                yield from walk(child)
-
-    css_links: list[str] = []
-    js_links: list[str] = []
-
-    for elem in walk(folium_map):
-        if isinstance(elem, branca.colormap.ColorMap):
-            # manually add d3.js
-            js_links.insert(
-                0, "https://cdnjs.cloudflare.com/ajax/libs/d3/3.5.5/d3.min.js"
-            )
-            js_links.insert(0, "https://d3js.org/d3.v4.min.js")
-        css_links.extend([href for _, href in getattr(elem, "default_css", [])])
-        js_links.extend([src for _, src in getattr(elem, "default_js", [])])
-
-    # deduplicate links
-    css_links = list(dict.fromkeys(css_links))
-    js_links = list(dict.fromkeys(js_links))
-
-    hash_key = generate_js_hash(leaflet, key, return_on_hover)
+    with _timed(timings, "dependencies"):
+        css_links, js_links = get_dependencies(element_types)
+
+    with _timed(timings, "hashing"):
+        hash_key = structural_key(signatures, key, return_on_hover)
+
+    report = None
+    if timings is not None:
+        timings["total"] = (time.perf_counter() - start) * 1000
+        report = _profile_report(
+            timings,
+            script=leaflet,
+            header=header,
+            html=html,
+            feature_group=feature_group_string,
+            layer_control=layer_control_string,
+            links="".join(css_links + js_links),
+        )
 
     def _on_change():
         if key is not None:
@@ -438,7 +544,7 @@ def st_folium(
         if on_change is not None:
             on_change()
 
-    return _component_func(
+    value = _component_func(
         script=leaflet,
         header=header,
         html=html,
@@ -458,74 +564,457 @@ def st_folium(
         js_links=js_links,
         on_change=_on_change,
         wrap_longitude=wrap_longitude,
+        profile=profile,
     )
 
+    if report is None:
+        return value
+    # the browser's timings arrive with the last value it sent
+    value = dict(value or {})
+    report["frontend"] = value.pop("profile", None)
+    with st.expander("Render profile"):
+        st.json(report)
+    value["profile"] = report
+    return value
+
+
+def _profile_report(timings: dict[str, float], **payload: str | None) -> dict:
+    """Python stage timings (ms) and payload sizes (bytes) for ``profile=True``."""
+    sizes = {
+        name: len(text.encode()) for name, text in payload.items() if text is not None
+    }
+    sizes["total"] = sum(sizes.values())
+    return {
+        "python_ms": {stage: round(ms, 3) for stage, ms in timings.items()},
+        "bytes": sizes,
+    }
 
-def _generate_leaflet_string(
-    m: folium.MacroElement,
-    nested: bool = True,
-    base_id: str = "0",
-    mappings: dict[str, str] | None = None,
-) -> tuple[str, dict[str, str]]:
-    if mappings is None:
-        mappings = {}
 
-    mappings[m._id] = base_id
+# attributes that are structure rather than element state
+_STRUCTURAL_ATTRS = frozenset({"_children", "_parent", "_template", "_env"})
+_SCRIPT_CACHE_SIZE = 16384
+# total script bytes kept, and the largest script worth keeping; very large
+# scripts (e.g. a MarkerArray's rows) cost more to hold than to re-render
+_SCRIPT_CACHE_BYTES = 64 * 1024 * 1024
+_SCRIPT_CACHE_MAX_ENTRY = 1024 * 1024
+_MAX_OBJECT_DEPTH = 3
+# folium's random element ids (uuid4 hex) and Earth Engine's per-request map
+# ids; neither says anything about the map's structure
+_VOLATILE_IDS = re.compile(rb"[0-9a-f]{32}|maps/[-a-z0-9]+/")
+
+_D3_LINKS = (
+    "https://d3js.org/d3.v4.min.js",
+    "https://cdnjs.cloudflare.com/ajax/libs/d3/3.5.5/d3.min.js",
+)
+
+# element type -> (default_css, default_js, css links, js links, needs d3)
+_dependency_cache: dict[type, tuple] = {}
+_dependency_cache_lock = threading.Lock()
+
+# template -> digest of its compiled code
+_template_digests: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_template_digests_lock = threading.Lock()
+
+# script cache key -> (script, structural signature)
+_script_cache: OrderedDict[tuple, tuple[str, bytes]] = OrderedDict()
+_script_cache_bytes = 0
+_script_cache_lock = threading.Lock()
+
+
+def _clear_script_cache() -> None:
+    global _script_cache_bytes
+    with _script_cache_lock:
+        _script_cache.clear()
+        _script_cache_bytes = 0
+
+
+def _state_bytes(m: folium.MacroElement) -> bytes | None:
+    """
+    The element's state once ids are standardized. ``marshal`` only accepts
+    builtin data (exactly, not subclasses), so elements that hold other
+    elements, functions or other objects whose output can't be judged from
+    their state give ``None``.
+    """
+    state = [(k, v) for k, v in vars(m).items() if k not in _STRUCTURAL_ATTRS]
+    parent = m._parent.get_name() if m._parent is not None else None
     try:
-        element_id = m.element_name.replace("map_", "").replace("tile_layer_", "")
-        parent_id = m.element_parent_name.replace("map_", "").replace("tile_layer_", "")
-        if element_id not in mappings:
-            mappings[element_id] = m._parent._id
-        if parent_id not in mappings:
-            mappings[parent_id] = m._parent._parent._id
-    except AttributeError:
-        pass
+        return marshal.dumps((type(m).__qualname__, parent, state))
+    except ValueError:
+        return None
 
-    m._id = base_id
 
-    if isinstance(m, folium.plugins.DualMap):
-        m.render()
-        m.m1.render()
-        m.m2.render()
-        if not nested:
-            return _generate_leaflet_string(
-                m.m1, nested=False, mappings=mappings, base_id=base_id
-            )
-        # Generate the script for map1
-        leaflet, _ = _generate_leaflet_string(
-            m.m1, nested=nested, mappings=mappings, base_id=base_id
-        )
-        # Add the script for map2
-        leaflet += (
-            "\n"
-            + _generate_leaflet_string(
-                m.m2, nested=nested, mappings=mappings, base_id="div2"
-            )[0]
+def _script_key(m: folium.MacroElement, state_bytes: bytes) -> tuple:
+    """Cache key for an element's script: its template plus a state digest."""
+    return (
+        m._template,
+        hashlib.blake2b(state_bytes, digest_size=32, usedforsecurity=False).digest(),
+    )
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(
+        _VOLATILE_IDS.sub(b"", data), digest_size=16, usedforsecurity=False
+    ).digest()
+
+
+def _template_digest(template: Any) -> bytes:
+    """
+    Digest of a template's text. Templates often embed values directly (a
+    ``MacroElement`` with ``Template(f"...")``), so the element's state alone
+    doesn't determine its script. Jinja doesn't keep the text, but compiles
+    it into constants of the template's code, so that code is hashed instead.
+    """
+    with _template_digests_lock:
+        digest = _template_digests.get(template)
+    if digest is None:
+        code = getattr(getattr(template, "root_render_func", None), "__code__", None)
+        data = marshal.dumps(code) if code is not None else repr(template).encode()
+        digest = hashlib.blake2b(data, digest_size=16, usedforsecurity=False).digest()
+        with _template_digests_lock:
+            _template_digests[template] = digest
+    return digest
+
+
+def _value_bytes(value, depth: int = 0) -> bytes:
+    """
+    Stable bytes for any attribute value, for structural signatures. Plain
+    data is marshalled; elements and other objects are followed up to
+    ``_MAX_OBJECT_DEPTH`` objects deep.
+    """
+    try:
+        return marshal.dumps(value)
+    except ValueError:
+        pass
+    if isinstance(value, (list, tuple)):
+        return b"[" + b",".join(_value_bytes(v, depth) for v in value) + b"]"
+    if isinstance(value, dict):
+        return _value_bytes(list(value.items()), depth)
+    name = getattr(value, "__qualname__", type(value).__qualname__).encode()
+    if depth >= _MAX_OBJECT_DEPTH or callable(value):
+        # a style/highlight function's effect is in the state it computed
+        return name
+    if isinstance(value, branca.element.Element):
+        return name + _value_bytes(
+            [*_element_state(value), list(value._children.values())], depth + 1
         )
-        # Add the script that syncs them together
-        leaflet += m._template.module.script(m)
-        return leaflet, mappings
+    if hasattr(value, "__dict__"):
+        return name + _value_bytes(vars(value), depth + 1)
+    return name
+
+
+def _element_state(m: branca.element.Element) -> list[tuple[str, Any]]:
+    # parent_map points back up the tree; the parent is covered by its name
+    return [
+        (k, v)
+        for k, v in vars(m).items()
+        if k not in _STRUCTURAL_ATTRS and k != "parent_map"
+    ]
+
+
+def _structure_signature(m: folium.MacroElement) -> bytes:
+    """Signature of an element whose state isn't plain data."""
+    parent = m._parent.get_name() if m._parent is not None else None
+    return _template_digest(m._template) + _digest(
+        type(m).__qualname__.encode()
+        + str(parent).encode()
+        + b"".join(k.encode() + _value_bytes(v) for k, v in _element_state(m))
+    )
+
 
+def _render_script(m: folium.MacroElement) -> str:
     try:
-        leaflet = m._template.module.script(m)
+        return m._template.module.script(m)
     except UndefinedError:
         # Correctly render Popup elements, and perhaps others. Not sure why
         # this is necessary. Some deep magic related to jinja2 templating, perhaps.
-        leaflet = m._template.render(this=m, kwargs={})
-
-    if not nested:
-        return leaflet, mappings
-
-    for idx, child in enumerate(m._children.values()):
-        with contextlib.suppress(UndefinedError, AttributeError):
-            leaflet += (
-                "\n"
-                + _generate_leaflet_string(
-                    child, base_id=f"{base_id}_{idx}", mappings=mappings
-                )[0]
-            )
+        return m._template.render(this=m, kwargs={})
+
+
+def _element_script(
+    m: folium.MacroElement, sign: bool = False
+) -> tuple[str, bytes | None]:
+    """
+    The element's script and, if ``sign``, its structural signature, memoized
+    across identical elements and reruns.
+    """
+    global _script_cache_bytes
+    state_bytes = _state_bytes(m)
+    if state_bytes is None:
+        return _render_script(m), _structure_signature(m) if sign else None
+    key = _script_key(m, state_bytes)
+    with _script_cache_lock:
+        cached = _script_cache.get(key)
+        if cached is not None:
+            _script_cache.move_to_end(key)
+            return cached
+    script = _render_script(m)
+    cached = (script, _template_digest(m._template) + _digest(state_bytes))
+    if len(script) > _SCRIPT_CACHE_MAX_ENTRY:
+        return cached
+    with _script_cache_lock:
+        if key not in _script_cache:
+            _script_cache[key] = cached
+            _script_cache_bytes += len(script)
+        while _script_cache and (
+            len(_script_cache) > _SCRIPT_CACHE_SIZE
+            or _script_cache_bytes > _SCRIPT_CACHE_BYTES
+        ):
+            _, (evicted, _) = _script_cache.popitem(last=False)
+            _script_cache_bytes -= len(evicted)
+    return cached
+
+
+def structural_key(
+    signatures: Iterable[bytes], key: str | None = None, return_on_hover: bool = False
+) -> str:
+    """
+    Component key from the per-element signatures collected while rendering
+    the map. Ids folium randomizes are not part of it, so the same map
+    structure gives the same key on every rerun.
+    """
+    digest = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+    for signature in signatures:
+        digest.update(signature)
+    digest.update(repr((key, return_on_hover)).encode())
+    return digest.hexdigest()
 
-    return leaflet, mappings
+
+def _standardize_id(
+    m: folium.MacroElement, base_id: str, mappings: dict[str, str]
+) -> None:
+    mappings[m._id] = base_id
+    # folium.elements.ElementAddToElement names the element and its parent
+    element_name = getattr(m, "element_name", None)
+    parent_name = getattr(m, "element_parent_name", None)
+    parent = m._parent
+    if element_name is not None and parent_name is not None and parent is not None:
+        element_id = element_name.replace("map_", "").replace("tile_layer_", "")
+        parent_id = parent_name.replace("map_", "").replace("tile_layer_", "")
+        if element_id not in mappings:
+            mappings[element_id] = parent._id
+        if parent_id not in mappings and parent._parent is not None:
+            mappings[parent_id] = parent._parent._id
+
+    m._id = base_id
+
+
+def _walk(
+    m: folium.MacroElement,
+    base_id: str,
+    nested: bool,
+    mappings: dict[str, str],
+    suppress: bool = False,
+    signatures: list[bytes] | None = None,
+    element_types: dict | None = None,
+) -> list[str]:
+    """
+    Walk the element tree depth-first, giving every element a standardized
+    id (``base_id``, then ``{base_id}_{child index}``...) and collecting its
+    script. Children whose script can't be rendered are skipped along with
+    their own children; errors on ``m`` itself are raised unless ``suppress``.
+    Each rendered element's structural signature is appended to
+    ``signatures``, and every element's type (see :func:`_dependency_key`)
+    is added to ``element_types``, if given.
+    """
+    chunks: list[str] = []
+    # (element, base_id, nested, skip on error) to visit, or a callable that
+    # produces a chunk once everything before it has been visited
+    stack: list = [(m, base_id, nested, suppress)]
+    while stack:
+        item = stack.pop()
+        if callable(item):
+            chunks.append(item())
+            continue
+        element, element_id, element_nested, element_suppress = item
+        dual = isinstance(element, folium.plugins.DualMap)
+        if element_types is not None and not dual:
+            element_types[_dependency_key(element)] = None
+        try:
+            _standardize_id(element, element_id, mappings)
+
+            if dual:
+                element.render()
+                element.m1.render()
+                element.m2.render()
+                if not element_nested:
+                    stack.append((element.m1, element_id, False, element_suppress))
+                    continue
+                # map1, then map2, then the script that syncs them together
+                if signatures is not None:
+                    signatures.append(type(element).__qualname__.encode())
+                stack.append(lambda dual=element: _dual_map_script(dual, element_types))
+                stack.append((element.m2, "div2", True, element_suppress))
+                stack.append((element.m1, element_id, True, element_suppress))
+                continue
+
+            script, signature = _element_script(element, signatures is not None)
+        except (UndefinedError, AttributeError):
+            if not element_suppress:
+                raise
+            if element_types is not None:
+                # the subtree renders nothing, but its dependencies still load
+                _collect_types(element, element_types)
+            continue
+
+        if chunks:
+            chunks.append("\n")
+        chunks.append(script)
+        if signatures is not None and signature is not None:
+            signatures.append(signature)
+        if element_nested:
+            children = list(element._children.values())
+            for idx in reversed(range(len(children))):
+                stack.append((children[idx], f"{element_id}_{idx}", True, True))
+
+    return chunks
+
+
+def _dependency_key(element: folium.Element) -> Any:
+    """
+    What an element's css/js dependencies depend on: its type, unless the
+    instance overrides ``default_css``/``default_js`` itself.
+    """
+    state = vars(element)
+    if "default_js" in state or "default_css" in state:
+        return element
+    return type(element)
+
+
+def _dependencies(owner: Any) -> tuple[tuple[str, ...], tuple[str, ...], bool]:
+    """(css links, js links, needs d3) of a type, or of an overriding instance."""
+    cls = owner if isinstance(owner, type) else type(owner)
+    is_colormap = issubclass(cls, branca.colormap.ColorMap)
+    if not (is_colormap or issubclass(cls, folium.elements.JSCSSMixin)):
+        return (), (), False
+    default_css = tuple(getattr(owner, "default_css", ()))
+    default_js = tuple(getattr(owner, "default_js", ()))
+    if owner is not cls:
+        return (
+            tuple(href for _, href in default_css),
+            tuple(src for _, src in default_js),
+            is_colormap,
+        )
+    # folium's add_js_link/add_css_link edit the class lists in place, so an
+    # entry is only reused while the lists it was built from are unchanged
+    with _dependency_cache_lock:
+        cached = _dependency_cache.get(cls)
+    if cached is not None and cached[0] == default_css and cached[1] == default_js:
+        return cached[2:]
+    css = tuple(href for _, href in default_css)
+    js = tuple(src for _, src in default_js)
+    with _dependency_cache_lock:
+        _dependency_cache[cls] = (default_css, default_js, css, js, is_colormap)
+    return css, js, is_colormap
+
+
+def get_dependencies(element_types: Iterable) -> tuple[list[str], list[str]]:
+    """
+    Deduplicated css and js links needed by ``element_types``, as collected
+    by :func:`generate_leaflet_string`, in first-use order. d3 comes first
+    whenever a branca colormap is present.
+    """
+    css_links: dict[str, None] = {}
+    js_links: dict[str, None] = {}
+    needs_d3 = False
+    for owner in element_types:
+        css, js, d3 = _dependencies(owner)
+        css_links.update(dict.fromkeys(css))
+        js_links.update(dict.fromkeys(js))
+        needs_d3 = needs_d3 or d3
+    if needs_d3:
+        js_links = {**dict.fromkeys(_D3_LINKS), **js_links}
+    return list(css_links), list(js_links)
+
+
+def _dual_map_script(dual: folium.plugins.DualMap, element_types: dict | None) -> str:
+    # recorded after both maps, so the sync plugin loads after Leaflet itself
+    if element_types is not None:
+        element_types[_dependency_key(dual)] = None
+    return dual._template.module.script(dual)
+
+
+def _collect_types(m: folium.MacroElement, element_types: dict) -> None:
+    stack = [m]
+    while stack:
+        element = stack.pop()
+        element_types[_dependency_key(element)] = None
+        stack.extend(reversed(list(getattr(element, "_children", {}).values())))
+
+
+def _walk_subtree(
+    child: folium.MacroElement, base_id: str, signed: bool, typed: bool
+) -> tuple[list[str], dict[str, str], list[bytes] | None, dict | None]:
+    mappings: dict[str, str] = {}
+    signatures: list[bytes] | None = [] if signed else None
+    element_types: dict | None = {} if typed else None
+    chunks = _walk(child, base_id, True, mappings, True, signatures, element_types)
+    return chunks, mappings, signatures, element_types
+
+
+def _generate_leaflet_string(
+    m: folium.MacroElement,
+    nested: bool = True,
+    base_id: str = "0",
+    mappings: dict[str, str] | None = None,
+    workers: int | None = None,
+    signatures: list[bytes] | None = None,
+    element_types: dict | None = None,
+) -> tuple[str, dict[str, str]]:
+    if mappings is None:
+        mappings = {}
+
+    children = list(m._children.values()) if nested else []
+    if (
+        not workers
+        or workers < 2
+        or len(children) < 2
+        or isinstance(m, folium.plugins.DualMap)
+    ):
+        chunks = _walk(
+            m,
+            base_id,
+            nested,
+            mappings,
+            signatures=signatures,
+            element_types=element_types,
+        )
+        return "".join(chunks), mappings
+
+    # The root's script first, then each child subtree on the pool. Subtrees
+    # are disjoint, get their ids from their position alone and keep their
+    # own mappings, so assembling them in child order gives the serial output.
+    chunks = _walk(
+        m,
+        base_id,
+        False,
+        mappings,
+        signatures=signatures,
+        element_types=element_types,
+    )
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        subtrees = pool.map(
+            _walk_subtree,
+            children,
+            [f"{base_id}_{idx}" for idx in range(len(children))],
+            [signatures is not None] * len(children),
+            [element_types is not None] * len(children),
+        )
+        for (
+            subtree_chunks,
+            subtree_mappings,
+            subtree_signatures,
+            subtree_types,
+        ) in subtrees:
+            if subtree_chunks:
+                chunks.append("\n")
+                chunks.extend(subtree_chunks)
+            if signatures is not None and subtree_signatures is not None:
+                signatures.extend(subtree_signatures)
+            if element_types is not None and subtree_types is not None:
+                element_types.update(subtree_types)
+            for leaflet_id, replacement in subtree_mappings.items():
+                mappings.setdefault(leaflet_id, replacement)
+    return "".join(chunks), mappings
 
 
 _FOLIUM_VAR_SUFFIX_PATTERN = re.compile("_[a-z0-9]+(?!_)")
@@ -544,7 +1033,12 @@ def _replace_folium_vars(leaflet: str, mappings: dict[str, str]) -> str:
 
 
 def generate_leaflet_string(
-    m: folium.MacroElement, nested: bool = True, base_id: str = "div"
+    m: folium.MacroElement,
+    nested: bool = True,
+    base_id: str = "div",
+    workers: int | None = None,
+    signatures: list[bytes] | None = None,
+    element_types: dict | None = None,
 ) -> str:
     """
     Call the _generate_leaflet_string function, and then replace the
@@ -555,7 +1049,23 @@ def generate_leaflet_string(
 
     This also allows the output to be more testable, since the
     variable names are consistent.
+
+    With ``workers`` > 1, the subtrees under ``m``'s direct children are
+    rendered concurrently on a thread pool; the output is the same as
+    rendering them serially.
+
+    If ``signatures`` is given, every rendered element's structural
+    signature is appended to it, in render order (see :func:`structural_key`).
+    Likewise ``element_types`` collects the element types found, for
+    :func:`get_dependencies`.
     """
-    leaflet, mappings = _generate_leaflet_string(m, nested=nested, base_id=base_id)
+    leaflet, mappings = _generate_leaflet_string(
+        m,
+        nested=nested,
+        base_id=base_id,
+        workers=workers,
+        signatures=signatures,
+        element_types=element_types,
+    )
 
     return _replace_folium_vars(leaflet, mappings)
@@ -30,6 +30,9 @@ type GlobalData = {
   height: any
   selected_layers: Record<string, { name: string; url: string }>
   wrap_longitude: boolean
+  profile: boolean
+  timings: Record<string, number>
+  value_sent_at: number | null
 }
 
 declare global {
@@ -100,7 +103,39 @@ function updateComponentValue(map: any) {
   }
   if (JSON.stringify(previous_data) !== JSON.stringify(data)) {
     global_data.previous_data = data
-    Streamlit.setComponentValue(data)
+    if (global_data.profile) {
+      // timings ride along with values that are sent anyway; only the
+      // first tile's load sends a value of its own (see timeFirstTile)
+      global_data.value_sent_at = performance.now()
+      Streamlit.setComponentValue({ ...data, profile: { ...global_data.timings } })
+    } else {
+      Streamlit.setComponentValue(data)
+    }
+  }
+}
+
+function recordTiming(name: string, start: number) {
+  window.__GLOBAL_DATA__.timings[name] = performance.now() - start
+}
+
+function timeFirstTile(map: any, start: number) {
+  for (let key in map._layers) {
+    let layer = map._layers[key]
+    if (layer && layer["_url"]) {
+      layer.once("tileload", () => {
+        const global_data = window.__GLOBAL_DATA__
+        if (!("first_tile_ms" in global_data.timings)) {
+          recordTiming("first_tile_ms", start)
+          // the load timings are complete now; report them once, even if
+          // the map's own value hasn't changed
+          global_data.value_sent_at = performance.now()
+          Streamlit.setComponentValue({
+            ...global_data.previous_data,
+            profile: { ...global_data.timings },
+          })
+        }
+      })
+    }
   }
 }
 
@@ -297,6 +332,13 @@ async function onRender(event: Event) {
   const layer_control: string = data.args["layer_control"]
   const pixelated: boolean = data.args["pixelated"]
   const wrap_longitude: boolean = data.args["wrap_longitude"] ?? false
+  const profile: boolean = data.args["profile"] ?? false
+
+  // a render following a returned value closes its round trip
+  if (window.__GLOBAL_DATA__ && window.__GLOBAL_DATA__.value_sent_at !== null) {
+    recordTiming("round_trip_ms", window.__GLOBAL_DATA__.value_sent_at)
+    window.__GLOBAL_DATA__.value_sent_at = null
+  }
 
   // load scripts
   const loadScripts = async () => {
@@ -433,15 +475,22 @@ async function onRender(event: Event) {
         last_layer_control: null,
         selected_layers: {},
         height: height,
-        wrap_longitude: wrap_longitude
+        wrap_longitude: wrap_longitude,
+        profile: profile,
+        timings: {},
+        value_sent_at: null
       }
       if (script.indexOf("map_div2") !== -1) {
         parent_div?.classList.remove("single")
         parent_div?.classList.add("double")
       }
     }
+    const load_start = performance.now()
     await loadScripts().then(() => {
       ignore_render = false;
+      if (window.__GLOBAL_DATA__) {
+        recordTiming("script_load_ms", load_start)
+      }
       const render_script = document.createElement("script")
       if (!window.map) {
 	/* first add the html elements as the scripts may
@@ -454,7 +503,13 @@ async function onRender(event: Event) {
         render_script.innerHTML =
           script +
           `window.map = map_div; window.initComponent(map_div, ${return_on_hover});`
+        // inline scripts run synchronously when appended
+        const eval_start = performance.now()
         document.body.appendChild(render_script)
+        if (window.map) {
+          recordTiming("script_eval_ms", eval_start)
+          timeFirstTile(window.map, eval_start)
+        }
         const styles = getPixelatedStyles(pixelated)
         var styleSheet = document.createElement("style")
         styleSheet.innerText = styles
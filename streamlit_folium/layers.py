@@ -0,0 +1,360 @@
+"""Folium layers tuned for st_folium.
+
+:class:`MultiResolutionGeoJson` is a drop-in ``folium.GeoJson`` that embeds
+its data at a few Douglas-Peucker simplification levels and swaps between
+them on the map's ``zoomend``, so country-scale views draw far fewer vertices
+than the source geometry has.
+
+:class:`MarkerArray` draws one marker per DataFrame row from a single JSON
+array and a client-side loop, instead of one ``folium.Marker`` (and one
+template render) per row.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import folium
+from folium.template import Template
+from folium.utilities import get_obj_in_upper_tree
+
+# (minimum zoom, tolerance in degrees). The finest level is still simplified
+# (~100 m), which is what keeps the embedded payload below the source's;
+# add a (zoom, 0.0) level to show the original geometry when zoomed in.
+DEFAULT_LEVELS: tuple[tuple[int, float], ...] = ((0, 0.05), (6, 0.01), (9, 0.001))
+
+_CACHE_SIZE = 32
+
+Point = list[float]
+
+
+def _simplify_line(points: list[Point], tolerance: float) -> list[Point]:
+    """Douglas-Peucker, iteratively; always keeps both end points."""
+    if len(points) < 3:
+        return points
+    tolerance2 = tolerance * tolerance
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = points[first][0], points[first][1]
+        x2, y2 = points[last][0], points[last][1]
+        dx, dy = x2 - x1, y2 - y1
+        length2 = dx * dx + dy * dy
+        worst, worst_d2 = -1, tolerance2
+        for i in range(first + 1, last):
+            px, py = points[i][0] - x1, points[i][1] - y1
+            if length2:
+                cross = px * dy - py * dx
+                d2 = cross * cross / length2
+            else:
+                d2 = px * px + py * py
+            if d2 > worst_d2:
+                worst, worst_d2 = i, d2
+        if worst != -1:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [p for p, kept in zip(points, keep, strict=True) if kept]
+
+
+def _simplify_ring(ring: list[Point], tolerance: float) -> list[Point] | None:
+    simplified = _simplify_line(ring, tolerance)
+    # a closed ring needs at least three distinct points
+    return simplified if len(simplified) >= 4 else None
+
+
+def _simplify_polygon(
+    rings: list[list[Point]], tolerance: float
+) -> list[list[Point]] | None:
+    exterior = _simplify_ring(rings[0], tolerance)
+    if exterior is None:
+        return None
+    holes = (_simplify_ring(ring, tolerance) for ring in rings[1:])
+    return [exterior, *(hole for hole in holes if hole is not None)]
+
+
+def simplify_geometry(geometry: dict, tolerance: float) -> dict:
+    """
+    A GeoJSON geometry with every line and ring simplified to ``tolerance``.
+    Rings that would collapse are dropped; if nothing would be left, the
+    geometry is returned unchanged so no feature disappears.
+    """
+    if not geometry or tolerance <= 0:
+        return geometry
+    kind = geometry["type"]
+    coords: Any = geometry.get("coordinates")
+    simplified: list | None
+    if kind == "LineString":
+        simplified = _simplify_line(coords, tolerance)
+    elif kind == "MultiLineString":
+        simplified = [_simplify_line(line, tolerance) for line in coords]
+    elif kind == "Polygon":
+        simplified = _simplify_polygon(coords, tolerance)
+    elif kind == "MultiPolygon":
+        parts = (_simplify_polygon(polygon, tolerance) for polygon in coords)
+        simplified = [part for part in parts if part is not None] or None
+    elif kind == "GeometryCollection":
+        return {
+            "type": kind,
+            "geometries": [
+                simplify_geometry(g, tolerance) for g in geometry["geometries"]
+            ],
+        }
+    else:
+        return geometry
+    if simplified is None:
+        return geometry
+    return {"type": kind, "coordinates": simplified}
+
+
+def simplify_geojson(data: dict, tolerance: float) -> dict:
+    """A FeatureCollection, Feature or bare geometry, simplified to ``tolerance``."""
+    if data.get("type") == "FeatureCollection":
+        return {
+            **data,
+            "features": [simplify_geojson(f, tolerance) for f in data["features"]],
+        }
+    if data.get("type") == "Feature":
+        # a Feature's geometry may be null
+        geometry = data["geometry"]
+        if geometry is None:
+            return data
+        return {**data, "geometry": simplify_geometry(geometry, tolerance)}
+    return simplify_geometry(data, tolerance)
+
+
+_cache: OrderedDict[tuple[str, float], dict] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _digest(data: dict) -> str:
+    return hashlib.sha1(
+        json.dumps(data, sort_keys=True, separators=(",", ":")).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+
+
+def _cached_simplify(digest: str, data: dict, tolerance: float) -> dict:
+    # Streamlit reruns rebuild the layer from the same data, so results are
+    # kept per (data, tolerance) across reruns
+    key = (digest, tolerance)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    simplified = simplify_geojson(data, tolerance)
+    with _cache_lock:
+        _cache[key] = simplified
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return simplified
+
+
+class MultiResolutionGeoJson(folium.GeoJson):
+    """
+    ``folium.GeoJson`` that renders a coarser geometry at lower zooms.
+
+    Parameters
+    ----------
+    data: dict, str or object with ``__geo_interface__``
+        Same as ``folium.GeoJson``; the data is always embedded.
+    levels: sequence of (min_zoom, tolerance)
+        The level with the highest ``min_zoom`` not above the current zoom is
+        shown. Tolerances are in the data's units (degrees for WGS84).
+    **kwargs
+        Passed through to ``folium.GeoJson``.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        {{ this.base_script() }}
+        var {{ this.get_name() }}_levels = {{ this.level_data|tojson }};
+        var {{ this.get_name() }}_level = {{ this.initial_level }};
+        function {{ this.get_name() }}_on_zoom() {
+            var levels = {{ this.get_name() }}_levels;
+            var zoom = {{ this.get_name() }}._map.getZoom();
+            var level = 0;
+            for (var i = 0; i < levels.length; i++) {
+                if (levels[i][0] <= zoom) { level = i; }
+            }
+            var current = {{ this.get_name() }}_level;
+            if (level === current) { return; }
+            // the initial level is only embedded once, in the layer itself
+            if (levels[current][1] === null) {
+                levels[current][1] = {{ this.get_name() }}.toGeoJSON();
+            }
+            {{ this.get_name() }}_level = level;
+            {{ this.get_name() }}.clearLayers();
+            {{ this.get_name() }}_add(levels[level][1]);
+            {%- if not this.style %}
+            {{ this.get_name() }}.setStyle(function(feature) {return feature.properties.style;});
+            {%- endif %}
+        }
+        // follow the zoom only while on the map, so layers that were removed
+        // (e.g. a replaced feature group) leave no handler behind
+        {{ this.get_name() }}.on("add", function() {
+            this._map.on("zoomend", {{ this.get_name() }}_on_zoom);
+            {{ this.get_name() }}_on_zoom();
+        });
+        {{ this.get_name() }}.on("remove", function() {
+            this._map.off("zoomend", {{ this.get_name() }}_on_zoom);
+        });
+        if ({{ this.get_name() }}._map) {
+            {{ this.get_name() }}._map.on("zoomend", {{ this.get_name() }}_on_zoom);
+        }
+        {% endmacro %}
+        """
+    )
+
+    def __init__(
+        self,
+        data: Any,
+        levels: tuple[tuple[int, float], ...] = DEFAULT_LEVELS,
+        **kwargs: Any,
+    ):
+        kwargs["embed"] = True
+        super().__init__(data, **kwargs)
+        self._name = "MultiResolutionGeoJson"
+        self.embed = True
+        self.levels = sorted(levels)
+        if not self.levels:
+            raise ValueError("levels must not be empty")
+        self.source_data = self.data
+        self._digest = _digest(self.source_data)
+        self.level_data: list[list[Any]] = []
+        self.initial_level = 0
+
+    def simplified(self, tolerance: float) -> dict:
+        """The source data at ``tolerance``; cached across layers and reruns."""
+        if tolerance <= 0:
+            return self.source_data
+        return _cached_simplify(self._digest, self.source_data, tolerance)
+
+    def _level_for(self, zoom: float | None) -> int:
+        if zoom is None:
+            return len(self.levels) - 1
+        level = 0
+        for i, (min_zoom, _) in enumerate(self.levels):
+            if min_zoom <= zoom:
+                level = i
+        return level
+
+    def base_script(self) -> str:
+        return folium.GeoJson._template.module.script(self)
+
+    def render(self, **kwargs):
+        parent_map = get_obj_in_upper_tree(self, folium.Map)
+        self.initial_level = self._level_for(parent_map.options.get("zoom"))
+        self.level_data = [
+            [min_zoom, None if i == self.initial_level else self.simplified(tol)]
+            for i, (min_zoom, tol) in enumerate(self.levels)
+        ]
+        # the embedded (and style-mapped) data is the level shown first; every
+        # level keeps the same features and properties
+        self.data = self.simplified(self.levels[self.initial_level][1])
+        super().render(**kwargs)
+
+
+class MarkerArray(folium.map.Layer):
+    """
+    Markers for every row of a DataFrame, created in the browser.
+
+    Parameters
+    ----------
+    data: pandas.DataFrame
+        One marker per row.
+    lat, lon: str
+        Coordinate columns.
+    tooltip, popup: str or None
+        Columns holding each marker's tooltip and popup text.
+    color: str or None
+        Column of ``folium.Icon`` marker colors; rows with a null color get
+        Leaflet's default marker.
+    icon, prefix: str
+        Icon shown on colored markers, as for ``folium.Icon``.
+    name, overlay, control, show
+        As for ``folium.FeatureGroup``.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = L.featureGroup();
+        (function() {
+            var rows = {{ this.rows }};
+            for (var i = 0; i < rows.length; i++) {
+                var row = rows[i];
+                var marker = L.marker([row[0], row[1]]);
+                {%- if this.columns.tooltip is not none %}
+                if (row[{{ this.columns.tooltip }}] !== null) {
+                    marker.bindTooltip(String(row[{{ this.columns.tooltip }}]), {sticky: true});
+                }
+                {%- endif %}
+                {%- if this.columns.popup is not none %}
+                if (row[{{ this.columns.popup }}] !== null) {
+                    var popup = document.createElement("div");
+                    popup.innerHTML = row[{{ this.columns.popup }}];
+                    marker.bindPopup(popup);
+                }
+                {%- endif %}
+                {%- if this.columns.color is not none %}
+                if (row[{{ this.columns.color }}] !== null) {
+                    marker.setIcon(L.AwesomeMarkers.icon({
+                        markerColor: row[{{ this.columns.color }}],
+                        icon: {{ this.icon|tojson }},
+                        prefix: {{ this.prefix|tojson }},
+                    }));
+                }
+                {%- endif %}
+                marker.addTo({{ this.get_name() }});
+            }
+        })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(
+        self,
+        data: Any,
+        lat: str = "latitude",
+        lon: str = "longitude",
+        tooltip: str | None = None,
+        popup: str | None = None,
+        color: str | None = None,
+        icon: str = "info-sign",
+        prefix: str = "glyphicon",
+        name: str | None = None,
+        overlay: bool = True,
+        control: bool = True,
+        show: bool = True,
+    ):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = "MarkerArray"
+        self.icon = icon
+        self.prefix = prefix
+        selected = [lat, lon]
+        # row position of each optional column in the emitted arrays
+        self.columns: dict[str, int | None] = {}
+        for field, column in (("tooltip", tooltip), ("popup", popup), ("color", color)):
+            self.columns[field] = None
+            if column is not None:
+                self.columns[field] = len(selected)
+                selected.append(column)
+        self.size = len(data)
+        # one vectorized serialization for every row
+        self.rows = (
+            data[selected]
+            .to_json(orient="values", force_ascii=False)
+            .replace("<", "\\u003c")
+            .replace(">", "\\u003e")
+        )
+
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,183 @@
+"""Spatial lookups for handling map clicks.
+
+``st_folium`` returns clicks as ``{"lat": ..., "lng": ...}``. Apps typically
+need to turn that back into one of their own features: the marker that was
+clicked, or the polygon the click fell in. Filtering a DataFrame on every
+rerun is linear in the number of features; the indexes here are built once
+(e.g. inside ``st.cache_resource``) and answer in roughly logarithmic time.
+
+Both indexes are pure Python and work on plain coordinates, so they need no
+geo libraries.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Generic, Hashable, Iterable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+Ring = list[tuple[float, float]]
+
+
+class PointIndex(Generic[K]):
+    """
+    Static 2-d tree over ``(lat, lon)`` points, for nearest-point queries.
+
+    Distances are planar, in degrees, which is what matching a click to a
+    nearby marker needs.
+    """
+
+    def __init__(self, points: Iterable[tuple[float, float]], keys: Iterable[K]):
+        self._points = [(float(lat), float(lon)) for lat, lon in points]
+        self._keys = list(keys)
+        if len(self._points) != len(self._keys):
+            raise ValueError("points and keys must have the same length")
+        # node i: (point index, axis, left node, right node); -1 for no child
+        self._nodes: list[tuple[int, int, int, int]] = []
+        self._root = self._build(list(range(len(self._points))), 0)
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: Any,
+        key: str,
+        lat: str = "latitude",
+        lon: str = "longitude",
+    ) -> PointIndex:
+        """Index the rows of a DataFrame, keyed by its ``key`` column."""
+        return cls(zip(df[lat], df[lon], strict=True), df[key])
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _build(self, indices: list[int], depth: int) -> int:
+        if not indices:
+            return -1
+        axis = depth % 2
+        indices.sort(key=lambda i: self._points[i][axis])
+        mid = len(indices) // 2
+        node = len(self._nodes)
+        self._nodes.append((indices[mid], axis, -1, -1))
+        left = self._build(indices[:mid], depth + 1)
+        right = self._build(indices[mid + 1 :], depth + 1)
+        self._nodes[node] = (indices[mid], axis, left, right)
+        return node
+
+    def nearest(
+        self, lat: float, lon: float, max_distance: float | None = None
+    ) -> K | None:
+        """Key of the point closest to ``(lat, lon)``, or ``None`` if none is
+        within ``max_distance`` degrees."""
+        target = (lat, lon)
+        best = -1
+        best_d2 = math.inf if max_distance is None else max_distance**2
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node == -1:
+                continue
+            point_idx, axis, left, right = self._nodes[node]
+            point = self._points[point_idx]
+            d2 = (point[0] - lat) ** 2 + (point[1] - lon) ** 2
+            if d2 <= best_d2:
+                best, best_d2 = point_idx, d2
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # visit the far side only if the splitting plane is close enough;
+            # pushed first so the near side is searched first
+            if diff * diff <= best_d2:
+                stack.append(far)
+            stack.append(near)
+        return self._keys[best] if best != -1 else None
+
+
+def _polygons(geometry: dict) -> list[list[Ring]]:
+    """GeoJSON Polygon/MultiPolygon as a list of polygons, each a list of rings."""
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return list(geometry["coordinates"])
+    return []
+
+
+def _in_ring(x: float, y: float, ring: Ring) -> bool:
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+class PolygonIndex(Generic[K]):
+    """
+    Grid hash over the bounding boxes of GeoJSON polygons, for
+    point-in-polygon queries. A query only ray-casts the few polygons whose
+    box overlaps the query's grid cell.
+    """
+
+    def __init__(
+        self,
+        features: Iterable[dict],
+        key: Callable[[dict], K],
+        cell_size: float = 1.0,
+    ):
+        self.cell_size = cell_size
+        self._keys: list[K] = []
+        self._shapes: list[list[list[Ring]]] = []
+        self._boxes: list[tuple[float, float, float, float]] = []
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        for feature in features:
+            polygons = _polygons(feature["geometry"])
+            if not polygons:
+                continue
+            xs = [p[0] for polygon in polygons for p in polygon[0]]
+            ys = [p[1] for polygon in polygons for p in polygon[0]]
+            box = (min(xs), min(ys), max(xs), max(ys))
+            idx = len(self._keys)
+            self._keys.append(key(feature))
+            self._shapes.append(polygons)
+            self._boxes.append(box)
+            for cx in range(self._cell(box[0]), self._cell(box[2]) + 1):
+                for cy in range(self._cell(box[1]), self._cell(box[3]) + 1):
+                    self._grid.setdefault((cx, cy), []).append(idx)
+
+    @classmethod
+    def from_geojson(
+        cls, data: dict, key_property: str, cell_size: float = 1.0
+    ) -> PolygonIndex:
+        """Index a FeatureCollection, keyed by one of its feature properties."""
+        return cls(
+            data["features"],
+            key=lambda feature: feature["properties"][key_property],
+            cell_size=cell_size,
+        )
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _cell(self, value: float) -> int:
+        return math.floor(value / self.cell_size)
+
+    def containing(self, lat: float, lon: float) -> list[K]:
+        """Keys of every polygon that contains ``(lat, lon)``."""
+        found = []
+        for idx in self._grid.get((self._cell(lon), self._cell(lat)), ()):
+            min_x, min_y, max_x, max_y = self._boxes[idx]
+            if not (min_x <= lon <= max_x and min_y <= lat <= max_y):
+                continue
+            for polygon in self._shapes[idx]:
+                # even-odd over all rings, so holes are excluded
+                if sum(_in_ring(lon, lat, ring) for ring in polygon) % 2:
+                    found.append(self._keys[idx])
+                    break
+        return found
+
+    def locate(self, lat: float, lon: float) -> K | None:
+        """Key of the first polygon containing ``(lat, lon)``, if any."""
+        found = self.containing(lat, lon)
+        return found[0] if found else None
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _sse(data: dict, event: str | None = None) -> bytes:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+
+@contextmanager
+def fake_alli_server(chunks: list[bytes], delay: float = 0.0):
+    """Serve `chunks` as a streamed response to POST /webapi/apps/<id>/run"""
+    requests_seen: list[dict] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            requests_seen.append(
+                {"path": self.path, "headers": dict(self.headers), "body": body}
+            )
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+                time.sleep(delay)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}", requests_seen
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_iter_sse():
+    from demo_ui.alli import iter_sse
+
+    lines = [
+        ": keep-alive",
+        "event: chat",
+        'data: {"a":',
+        "data: 1}",
+        "",
+        '{"b": 2}',
+        "data: [DONE]",
+    ]
+    assert list(iter_sse(lines)) == [
+        ("chat", '{"a":\n1}'),
+        ("message", '{"b": 2}'),
+        ("message", "[DONE]"),
+    ]
+
+
+def test_chat_stream_yields_increments():
+    from demo_ui.alli import ChatEvent, ChatStream
+
+    events = [
+        ChatEvent("message", {"result": {"conversation": {"id": "conv-1"}}}),
+        ChatEvent("message", {"id": "u", "sender": "USER", "message": "E-1"}),
+        ChatEvent("message", {"id": "b1", "sender": "BOT", "message": "Hel"}),
+        ChatEvent("message", {"id": "b1", "sender": "BOT", "message": "Hello"}),
+        ChatEvent("message", {"id": "b2", "sender": "BOT", "message": "Bye"}),
+        ChatEvent("message", {"delta": "!"}),
+    ]
+    stream = ChatStream(events)
+
+    assert list(stream) == ["Hel", "lo", "\nBye", "!"]
+    assert stream.conversation_id == "conv-1"
+    assert stream.bot_messages == ["Hello", "Bye"]
+
+
+def test_client_streams_from_server():
+    from demo_ui.alli import AlliClient
+    from demo_ui.http_client import HttpClient
+
+    chunks = [
+        _sse({"result": {"conversation": {"id": "conv-9"}}}),
+        _sse({"id": "b1", "sender": "BOT", "message": "審査"}),
+        _sse({"id": "b1", "sender": "BOT", "message": "審査完了"}),
+        b"data: [DONE]\n\n",
+    ]
+    with fake_alli_server(chunks) as (url, seen):
+        client = AlliClient("APP", http=HttpClient(url, headers={"API-KEY": "KEY"}))
+        stream = client.stream_chat("E-1", conversation_id="conv-9")
+        assert "".join(stream) == "審査完了"
+
+    assert stream.conversation_id == "conv-9"
+    assert seen[0]["path"] == "/webapi/apps/APP/run"
+    assert seen[0]["headers"]["API-KEY"] == "KEY"
+    payload = json.loads(seen[0]["body"])
+    assert payload["mode"] == "stream"
+    assert payload["chat"] == {"message": "E-1"}
+
+
+def test_client_yields_before_response_completes():
+    from demo_ui.alli import AlliClient
+    from demo_ui.http_client import HttpClient
+
+    chunks = [_sse({"delta": str(i)}) for i in range(3)]
+    with fake_alli_server(chunks, delay=0.5) as (url, _):
+        start = time.perf_counter()
+        events = AlliClient("APP", http=HttpClient(url)).stream("hi")
+        first = next(events)
+        time_to_first = time.perf_counter() - start
+        rest = list(events)
+
+    assert first.data == {"delta": "0"}
+    assert len(rest) == 2
+    assert time_to_first < 0.5
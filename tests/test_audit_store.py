@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from demo_ui.audit_store import AuditResultStore, content_version
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AuditResultStore(tmp_path / "audit.sqlite3")
+
+
+def test_content_version_tracks_the_expense_row():
+    expense = {"id": "e1", "amount": 1200, "payment_datetime": "2025-01-02"}
+    assert content_version(expense) == content_version(dict(reversed(expense.items())))
+    assert content_version(expense) != content_version({**expense, "amount": 1300})
+
+
+def test_results_survive_a_new_store(store):
+    store.put("e1", "v1", {"audit_result": {"bot_message": "違反なし"}})
+    reopened = AuditResultStore(store.path)
+    assert reopened.get("e1", "v1") == {"audit_result": {"bot_message": "違反なし"}}
+    assert reopened.get("e1", "v2") is None
+
+
+def test_concurrent_requests_share_one_computation(store):
+    calls = 0
+
+    def compute():
+        nonlocal calls
+        calls += 1
+        time.sleep(0.1)
+        return {"conversation_id": "conv"}
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [
+            executor.submit(store.get_or_compute, "e1", "v1", compute) for _ in range(4)
+        ]
+        results = [f.result() for f in futures]
+
+    assert calls == 1
+    assert results == [{"conversation_id": "conv"}] * 4
+    assert store.get_or_compute("e1", "v1", compute) == {"conversation_id": "conv"}
+    assert calls == 1
+
+
+def test_failures_are_not_stored(store):
+    def fail():
+        raise RuntimeError("agent error")
+
+    with pytest.raises(RuntimeError):
+        store.get_or_compute("e1", "v1", fail)
+    assert store.get("e1", "v1") is None
+    assert store.get_or_compute("e1", "v1", lambda: {"ok": True}) == {"ok": True}
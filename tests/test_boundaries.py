@@ -0,0 +1,72 @@
+import math
+
+import pytest
+
+
+def _circle(cx, cy, r, n=400):
+    ring = [
+        [cx + r * math.cos(2 * math.pi * i / n), cy + r * math.sin(2 * math.pi * i / n)]
+        for i in range(n)
+    ]
+    return [*ring, ring[0]]
+
+
+def _collection():
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"name": name, "density": i},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [_circle(-90 + i, 40, 1)],
+                },
+            }
+            for i, name in enumerate(["Ohio", "Indiana", "Iowa"])
+        ],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    from demo_ui.boundaries import BoundaryStore, build_store
+
+    path = tmp_path / "states.arrow"
+    assert build_store(_collection(), path) == 3
+    return BoundaryStore(path)
+
+
+def _vertices(feature):
+    return len(feature["geometry"]["coordinates"][0])
+
+
+def test_lookup_by_name(store):
+    assert sorted(store.names()) == ["Indiana", "Iowa", "Ohio"]
+    assert "Ohio" in store
+    assert "Texas" not in store
+
+    feature = store.feature("Iowa")
+    assert feature["properties"] == {"name": "Iowa", "density": 2}
+    assert _vertices(feature) == 401
+    with pytest.raises(KeyError):
+        store.feature("Texas")
+
+
+def test_feature_collection_and_decode_cache(store):
+    collection = store.feature_collection("Indiana")
+    assert collection["type"] == "FeatureCollection"
+    assert collection["features"][0] is store.feature("Indiana")
+
+
+def test_missing_store_is_not_downloaded(tmp_path, monkeypatch, caplog):
+    from demo_ui import boundaries
+
+    monkeypatch.setattr(boundaries, "STORE_PATH", tmp_path / "missing.arrow")
+    monkeypatch.setattr(boundaries, "_store", None)
+    monkeypatch.setattr(boundaries, "_load_source", None)  # no network fallback
+    assert boundaries.get_boundary_store() is None
+    assert "python -m demo_ui.boundaries" in caplog.text
+
+    boundaries.build_store(_collection(), boundaries.STORE_PATH)
+    assert boundaries.get_boundary_store().names() == ["Indiana", "Iowa", "Ohio"]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+
+def test_ttl_cache_read_through_and_expiry():
+    from demo_ui.cache import TTLCache
+
+    cache = TTLCache(ttl=60)
+    loads = []
+
+    def load():
+        loads.append(1)
+
+    # cached falsy values still count as hits
+    assert cache.get_or_load("a", load) is None
+    assert cache.get_or_load("a", load) is None
+    assert len(loads) == 1
+
+    cache.ttl = -1
+    cache.set("b", 1)
+    assert "b" not in cache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    from demo_ui.cache import TTLCache
+
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+
+def test_same_canvas_is_stored_once(tmp_path):
+    from demo_ui.canvas_store import CanvasStore
+
+    store = CanvasStore(tmp_path)
+    key = store.put("<h1>リスク: 低</h1>")
+
+    assert store.put("<h1>リスク: 低</h1>") == key
+    assert store.put("<h1>リスク: 高</h1>") != key
+    assert len(list(tmp_path.glob("*.html"))) == 2
+    assert "<h1>リスク: 低</h1>" in (tmp_path / f"{key}.html").read_text("utf-8")
+    assert "<h1>リスク: 低</h1>" in store.get(key)
+
+
+def test_memory_and_files_are_bounded(tmp_path):
+    from demo_ui.canvas_store import CanvasStore
+
+    store = CanvasStore(tmp_path, max_files=2, max_memory_bytes=1)
+    keys = []
+    for i in range(3):
+        keys.append(store.put(f"<p>{i}</p>" * 1000))
+        path = tmp_path / f"{keys[-1]}.html"
+        os.utime(path, (i, i))
+
+    assert sorted(p.stem for p in tmp_path.glob("*.html")) == sorted(keys[1:])
+    # only the most recent compressed copy is kept; older ones come from disk
+    assert list(store._compressed) == [keys[-1]]
+    assert "<p>1</p>" in store.get(keys[1])
+    assert store.get(keys[0]) is None
+
+
+def test_rejects_oversized_canvas(tmp_path):
+    from demo_ui.canvas_store import CanvasStore, CanvasTooLargeError
+
+    store = CanvasStore(tmp_path, max_canvas_bytes=1024)
+    with pytest.raises(CanvasTooLargeError):
+        store.put("x" * 2048)
+    assert not list(tmp_path.glob("*"))
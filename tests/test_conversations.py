@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+
+from demo_ui.conversations import ConversationPool
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def counter_factory():
+    ids = itertools.count(1)
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            return f"conv-{next(ids)}"
+
+    return factory
+
+
+def test_pool_is_filled_in_background_and_refilled():
+    pool = ConversationPool(counter_factory(), size=2).start()
+    try:
+        wait_until(lambda: pool.available() == 2)
+        first = pool.acquire()
+        assert first == "conv-1"
+        wait_until(lambda: pool.available() == 2)
+        assert pool.snapshot()["created"] == 3
+        assert pool.stats.hits == 1
+        assert pool.stats.misses == 0
+    finally:
+        pool.close()
+
+
+def test_empty_pool_creates_synchronously():
+    pool = ConversationPool(counter_factory(), size=0)
+    assert pool.acquire() == "conv-1"
+    assert pool.acquire() == "conv-2"
+    assert pool.stats.misses == 2
+    assert pool.stats.hit_rate == 0.0
+
+
+def test_expired_ids_are_not_handed_out():
+    pool = ConversationPool(counter_factory(), size=1, max_age=0.05).start()
+    try:
+        wait_until(lambda: pool.stats.created >= 1)
+        time.sleep(0.1)
+        wait_until(lambda: pool.stats.expired >= 1)
+        assert pool.acquire() != "conv-1"
+    finally:
+        pool.close()
+
+
+def test_failures_are_counted_and_retried():
+    calls = 0
+
+    def flaky():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("backend down")
+        return "conv"
+
+    pool = ConversationPool(flaky, size=1, retry_delay=0.01).start()
+    try:
+        wait_until(lambda: pool.available() == 1)
+        assert pool.stats.failures == 1
+    finally:
+        pool.close()
+
+
+def test_failures_back_off_exponentially_up_to_a_cap():
+    calls = []
+
+    def down():
+        calls.append(time.monotonic())
+        raise RuntimeError("backend down")
+
+    pool = ConversationPool(down, size=1, retry_delay=0.01, max_retry_delay=0.02)
+    pool.start()
+    try:
+        # uncapped, the first seven delays alone would add up to 1.27s
+        wait_until(lambda: len(calls) >= 8, timeout=1.0)
+    finally:
+        pool.close()
+    gaps = [b - a for a, b in zip(calls, calls[1:])]
+    assert gaps[0] >= 0.01
+    assert all(gap >= 0.02 for gap in gaps[1:7])
+
+
+def test_idle_pool_is_not_refilled_until_used_again():
+    pool = ConversationPool(
+        counter_factory(), size=1, max_age=0.05, idle_timeout=0.1
+    ).start()
+    try:
+        time.sleep(0.4)
+        # the id is replaced while the pool was recently started, then left to expire
+        created = pool.stats.created
+        assert created <= 3
+        time.sleep(0.2)
+        assert pool.stats.created == created
+        assert pool.available() == 0
+
+        pool.acquire()
+        wait_until(lambda: pool.available() == 1)
+    finally:
+        pool.close()
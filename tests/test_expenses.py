@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("psycopg2")
+
+
+class FakeDatabase:
+    """Answers the repository's queries from in-memory rows"""
+
+    def __init__(self, expenses, violations):
+        self.expenses = expenses
+        self.violations = violations
+        self.queries: list[str] = []
+        self.frames: list[tuple] = []
+        self.tables: set[str] = set()
+
+    def fetch_all(self, query, params=None):
+        self.queries.append(query)
+        if "FROM violations" in query:
+            ids = params[0]
+            return [dict(v) for v in self.violations if v["expense_id"] in ids]
+        *after, limit = params
+        rows = [e for e in self.expenses if not after or e["id"] > after[0]]
+        return [dict(e) for e in rows[:limit]]
+
+    def fetch_frame(self, query, params=None, **_kwargs):
+        if "risk_score" in query:
+            self.frames.append((query, params))
+            rows = [{"id": "e1", "risk_score": 3}, {"id": "e2", "risk_score": 1}]
+            return pd.DataFrame.from_records(rows[: params[-1]])
+        return pd.DataFrame.from_records(self.fetch_all(query, params))
+
+    def fetch_one(self, query, params=None):
+        self.queries.append(query)
+        if "to_regclass" in query:
+            return {"exists": params[0] in self.tables}
+        if "COUNT(*)" in query:
+            amounts = [e["amount"] for e in self.expenses]
+            return {
+                "count": len(amounts),
+                "total_amount": sum(amounts),
+                "average_amount": sum(amounts) / len(amounts),
+            }
+        return next((dict(e) for e in self.expenses if e["id"] == params[0]), None)
+
+
+@pytest.fixture
+def repo():
+    from demo_ui.expenses import ExpenseRepository
+
+    expenses = [
+        {
+            "id": "e1",
+            "amount": 1200,
+            "payment_datetime": datetime(2025, 1, 2, 3, 4, 5),
+        },
+        {"id": "e2", "amount": 800, "payment_datetime": None},
+    ]
+    violations = [
+        {
+            "expense_id": "e1",
+            "violation_type": "深夜",
+            "description": "",
+            "reference": "",
+        },
+        {
+            "expense_id": "e1",
+            "violation_type": "酒類",
+            "description": "",
+            "reference": "",
+        },
+    ]
+    return ExpenseRepository(FakeDatabase(expenses, violations))
+
+
+def test_list_is_paginated_by_keyset(repo):
+    page, cursor = repo.list_page(limit=1)
+    assert page["id"].tolist() == ["e1"]
+    assert cursor == "e1"
+
+    page, cursor = repo.list_page(after_id=cursor, limit=1)
+    assert page["id"].tolist() == ["e2"]
+    assert cursor is None
+    assert "WHERE e.id > %s" in repo.db.queries[-1]
+    assert "expense_violation_summary" not in repo.db.queries[-1]
+
+
+def test_summary_is_aggregated_and_cached(repo):
+    assert repo.summary() == {
+        "count": 2,
+        "total_amount": 2000,
+        "average_amount": 1000,
+    }
+    repo.summary()
+    assert len(repo.db.queries) == 1
+
+
+def test_detail_dates_are_formatted(repo):
+    expense = repo.get_expense("e1")
+    assert expense["payment_datetime"] == "2025-01-02 03:04:05"
+
+
+def test_detail_is_read_through(repo):
+    assert repo.get_expense("missing") is None
+    assert repo.get_expense("missing") is None
+    assert len(repo.db.queries) == 1
+
+
+def test_prefetch_violations_uses_one_query(repo):
+    repo.prefetch_violations(["e1", "e2", "e1"])
+
+    assert [v["violation_type"] for v in repo.get_violations("e1")] == ["深夜", "酒類"]
+    assert repo.get_violations("e2") == []
+    assert len(repo.db.queries) == 1
+
+    repo.invalidate()
+    repo.get_violations("e2")
+    assert len(repo.db.queries) == 2
+
+
+def test_display_frame_renames_columns_only():
+    from demo_ui.expenses import to_display_frame
+
+    frame = pd.DataFrame(
+        {
+            "id": ["00000001", "e2"],
+            "user_name": ["a", "b"],
+            "business_name": ["x", "y"],
+            "business_type": ["食事", "交通"],
+            "amount": [1234567.0, 800.0],
+            "payment_datetime": ["2025-01-02 03:04:05", None],
+        }
+    )
+    df = to_display_frame(frame)
+    assert list(df.columns) == ["精算 ID", "申請者", "加盟店", "分類", "金額", "利用日"]
+    assert df["精算 ID"].tolist() == ["00000001", "e2"]
+    assert df["金額"].tolist() == [1234567.0, 800.0]
+
+
+def test_risk_page_is_ordered_by_score_keyset(repo):
+    _, cursor = repo.list_risk_page(limit=1)
+    assert cursor == (3, "e1")
+    query, params = repo.db.frames[-1]
+    assert "ORDER BY s.risk_score DESC, s.expense_id DESC" in query
+    assert params == (1, 2)
+
+    repo.list_risk_page(after=cursor, limit=1, min_score=2)
+    query, params = repo.db.frames[-1]
+    assert "(s.risk_score, s.expense_id) < (%s, %s)" in query
+    assert params == (2, 3, "e1", 2)
+
+
+def test_list_joins_violation_summary_when_installed(repo):
+    repo.db.tables.add("expense_violation_summary")
+    repo.list_page(limit=1)
+    query = repo.db.queries[-1]
+    assert "COALESCE(v.violation_count, 0) AS violation_count" in query
+    assert "LEFT JOIN expense_violation_summary v ON v.expense_id = e.id" in query
+
+
+def test_violation_badges():
+    from demo_ui.expenses import to_display_frame
+
+    frame = pd.DataFrame(
+        {
+            "id": ["e1", "e2"],
+            "violation_count": [2, 0],
+            "top_types": ["深夜 / 酒類", None],
+        }
+    )
+    df = to_display_frame(frame)
+    assert df["違反"].tolist() == ["⚠️ 2", "✅"]
+    assert df["主な違反"].tolist() == ["深夜 / 酒類", ""]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture
+def flaky_server():
+    """Server whose GET /flaky fails with 503 twice before succeeding"""
+    calls = {"flaky": 0, "down": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.strip("/")
+            calls[name] += 1
+            ok = name == "flaky" and calls[name] > 2
+            self.send_response(200 if ok else 503)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", calls
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_transient_errors(flaky_server):
+    from demo_ui.http_client import HttpClient
+
+    url, calls = flaky_server
+    client = HttpClient(url, backoff_factor=0)
+
+    response = client.get("flaky", "/flaky")
+
+    assert response.status_code == 200
+    assert calls["flaky"] == 3
+    stats = client.stats()["flaky"]
+    assert stats["count"] == 1
+    assert stats["circuit"] == "closed"
+
+
+def test_circuit_opens_after_repeated_failures(flaky_server):
+    from demo_ui.http_client import CircuitOpenError, HttpClient
+
+    url, calls = flaky_server
+    client = HttpClient(url, retries=0, failure_threshold=2, reset_timeout=60)
+
+    assert client.get("down", "/down").status_code == 503
+    assert client.get("down", "/down").status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.get("down", "/down")
+
+    assert calls["down"] == 2
+    assert client.stats()["down"]["circuit"] == "open"
+
+
+def test_circuit_half_open_after_timeout():
+    from demo_ui.http_client import CircuitBreaker, CircuitOpenError
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+
+    breaker.reset_timeout = 60
+    breaker.opened_at -= 120
+    breaker.before_call()
+    # the trial call re-arms the timer, so concurrent callers still fail fast
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_latency_histogram():
+    from demo_ui.http_client import LatencyHistogram
+
+    histogram = LatencyHistogram(buckets_ms=(10, 100))
+    for seconds in (0.001, 0.002, 0.05, 5):
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"10": 2, "100": 1, "+Inf": 1}
+    assert snapshot["p50_ms"] == 10
+    assert snapshot["p95_ms"] == float("inf")
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+
+def _photo(
+    size=(4000, 3000), orientation: int | None = None, quality: int = 98
+) -> bytes:
+    import random
+
+    from PIL import Image
+
+    # noisy pixels so the encoder can't trivially compress the original away
+    rng = random.Random(0)
+    image = Image.frombytes(
+        "RGB", (400, 300), bytes(rng.randrange(256) for _ in range(400 * 300 * 3))
+    ).resize(size)
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True, exif=exif)
+    return buffer.getvalue()
+
+
+def test_large_photo_is_oriented_and_downscaled():
+    from PIL import Image
+
+    from demo_ui.ingest import prepare_upload
+
+    data = _photo(orientation=6)  # rotated 90 degrees by the camera
+    prepared = prepare_upload("card.jpeg", data, "image/jpeg", dpi=100)
+
+    image = Image.open(io.BytesIO(prepared.data))
+    assert prepared.name == "card.jpg"
+    assert prepared.mime_type == "image/jpeg"
+    assert image.size == (877, 1169)  # portrait, longest side 11.69in at 100 dpi
+    assert prepared.bytes_saved == len(data) - len(prepared.data) > 0
+
+
+def test_small_or_unknown_files_are_kept():
+    from PIL import Image
+
+    from demo_ui.ingest import prepare_upload
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (20, 20), "white").save(buffer, format="PNG")
+    # a flat PNG is already smaller than any JPEG re-encoding of it
+    tiny = buffer.getvalue()
+    assert prepare_upload("a.png", tiny, "image/png").data == tiny
+
+    garbage = b"not an image"
+    prepared = prepare_upload("a.png", garbage, "image/png")
+    assert prepared.data == garbage
+    assert prepared.bytes_saved == 0
+
+
+def test_encoding_failure_keeps_original(monkeypatch):
+    from demo_ui import ingest
+
+    def broken(image, quality):
+        raise OSError("image file is truncated")
+
+    # truncated files may only fail once the pixels are decoded and re-encoded
+    monkeypatch.setattr(ingest, "_encode_jpeg", broken)
+    data = _photo(size=(2000, 1500))
+    prepared = ingest.prepare_upload("card.jpeg", data, "image/jpeg")
+    assert prepared.data == data
+    assert prepared.name == "card.jpeg"
+
+
+def test_pdf_first_page_is_rasterized():
+    fitz = pytest.importorskip("pymupdf")
+    from PIL import Image
+
+    from demo_ui.ingest import prepare_upload
+
+    doc = fitz.open()
+    for text in ("first", "second"):
+        doc.new_page().insert_image(
+            fitz.Rect(0, 0, 595, 842), stream=_photo(size=(2000, 2800))
+        )
+        doc[-1].insert_text((72, 72), text)
+    data = doc.tobytes()
+
+    prepared = prepare_upload("reg.pdf", data, "application/pdf", dpi=72)
+
+    assert prepared.name == "reg.jpg"
+    assert Image.open(io.BytesIO(prepared.data)).size == (595, 842)
+    assert prepared.size < len(data)
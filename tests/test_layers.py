@@ -0,0 +1,120 @@
+import itertools
+import math
+
+import folium
+import pytest
+
+from streamlit_folium import MultiResolutionGeoJson, generate_leaflet_string
+from streamlit_folium.layers import simplify_geojson, simplify_geometry
+
+
+def _circle(n=2000, r=5.0):
+    ring = [
+        [
+            -90 + r * math.cos(2 * math.pi * i / n),
+            40 + r * math.sin(2 * math.pi * i / n),
+        ]
+        for i in range(n)
+    ]
+    return [*ring, ring[0]]
+
+
+def _collection():
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"name": "circle"},
+                "geometry": {"type": "Polygon", "coordinates": [_circle()]},
+            }
+        ],
+    }
+
+
+def test_simplify_keeps_shape_within_tolerance():
+    ring = _circle()
+    simplified = simplify_geometry({"type": "Polygon", "coordinates": [ring]}, 0.01)
+    (out,) = simplified["coordinates"]
+    assert 4 <= len(out) < len(ring) / 10
+    assert out[0] == out[-1] == ring[0]
+    # a chord of a circle of radius r deviates from it by r * (1 - cos(theta / 2))
+    for a, b in itertools.pairwise(out):
+        theta = abs(math.atan2(b[1] - 40, b[0] + 90) - math.atan2(a[1] - 40, a[0] + 90))
+        theta = min(theta, 2 * math.pi - theta)
+        assert 5 * (1 - math.cos(theta / 2)) <= 0.01 + 1e-9
+
+
+def test_simplify_never_drops_a_feature():
+    tiny = {"type": "Polygon", "coordinates": [_circle(n=50, r=0.001)]}
+    assert simplify_geometry(tiny, 1.0) == tiny
+
+    multi = {
+        "type": "MultiPolygon",
+        "coordinates": [[_circle()], [_circle(n=50, r=0.001)]],
+    }
+    assert len(simplify_geometry(multi, 0.01)["coordinates"]) == 1
+
+    point = {"type": "Point", "coordinates": [1.0, 2.0]}
+    assert simplify_geojson(point, 1.0) == point
+
+
+def _render(layer, zoom):
+    m = folium.Map(location=[40, -90], zoom_start=zoom)
+    layer.add_to(m)
+    m.get_root().render()
+    return generate_leaflet_string(m)
+
+
+@pytest.mark.parametrize(("zoom", "initial"), [(3, 0), (7, 1), (12, 2)])
+def test_initial_level_follows_map_zoom(zoom, initial):
+    layer = MultiResolutionGeoJson(_collection(), levels=((0, 0.1), (6, 0.01), (9, 0)))
+    script = _render(layer, zoom)
+
+    assert layer.initial_level == initial
+    assert layer.level_data[initial][1] is None
+    assert layer.data is layer.simplified(layer.levels[initial][1])
+    # the zoom handler lives only as long as the layer is on the map
+    assert '._map.on("zoomend", ' in script
+    assert '._map.off("zoomend", ' in script
+    assert "_levels = [[0, " in script
+
+
+def test_script_is_smaller_than_plain_geojson():
+    plain = _render(folium.GeoJson(_collection()), 5)
+    multi = _render(MultiResolutionGeoJson(_collection()), 5)
+    assert len(multi) < len(plain) / 2
+
+
+def test_simplified_levels_are_cached_across_layers():
+    first = MultiResolutionGeoJson(_collection())
+    second = MultiResolutionGeoJson(_collection())
+    assert first.simplified(0.01) is second.simplified(0.01)
+
+
+def test_marker_array_emits_one_array_for_all_rows():
+    import pandas as pd
+
+    from streamlit_folium import MarkerArray
+
+    df = pd.DataFrame(
+        {
+            "latitude": [32.377716, 58.301598],
+            "longitude": [-86.300568, -134.420212],
+            "label": ["Montgomery</script>", "Juneau"],
+            "color": ["green", None],
+        }
+    )
+    layer = MarkerArray(df, tooltip="label", color="color")
+    assert len(layer) == 2
+    assert layer.columns == {"tooltip": 2, "popup": None, "color": 3}
+
+    script = _render(layer, 5)
+    assert script.count("L.marker(") == 1
+    assert "bindTooltip" in script
+    assert "bindPopup" not in script
+    assert (
+        '[[32.377716,-86.300568,"Montgomery\\u003c\\/script\\u003e","green"],'
+        '[58.301598,-134.420212,"Juneau",null]]'
+    ) in script
+    assert "marker_array_div_1.addTo(map_div)" in script
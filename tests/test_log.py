@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from demo_ui.log import (
+    BoundedQueueHandler,
+    JsonDump,
+    Lazy,
+    Truncated,
+    configure_logging,
+    event,
+    stop_logging,
+)
+
+
+def test_arguments_are_not_rendered_below_the_level():
+    calls = 0
+
+    def expensive():
+        nonlocal calls
+        calls += 1
+        return "payload"
+
+    logger = logging.getLogger("test_log.quiet")
+    logger.setLevel(logging.WARNING)
+    logger.info("payload: %s", Lazy(expensive))
+    assert calls == 0
+
+
+def test_truncated_and_dumps():
+    assert str(Truncated("")) == "빈 값"
+    assert str(Truncated("abcdef", 3)) == "abc..."
+    assert str(JsonDump({"メッセージ": "x" * 10}, limit=12, sample_rate=1)) == (
+        '{"メッセージ": "x...'
+    )
+    assert str(JsonDump({"a": 1}, sample_rate=0)) == "<omitted by sampling>"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = BoundedQueueHandler(maxsize=1)
+    logger = logging.getLogger("test_log.bounded")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for _ in range(3):
+            logger.warning("record")
+    finally:
+        logger.removeHandler(handler)
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
+
+
+def test_json_lines_sink(tmp_path):
+    path = tmp_path / "app.jsonl"
+    configure_logging(jsonl_path=str(path))
+    try:
+        logging.getLogger("test_log.sink").info(
+            "[API 호출] expense_id: %s",
+            "e1",
+            extra=event("api.call", expense_id="e1", status=200),
+        )
+    finally:
+        stop_logging()
+
+    entry = json.loads(path.read_text(encoding="utf-8").splitlines()[-1])
+    assert entry["event"] == "api.call"
+    assert entry["message"] == "[API 호출] expense_id: e1"
+    assert entry["expense_id"] == "e1"
+    assert entry["status"] == 200
@@ -117,3 +117,308 @@ def test_vector_grid():
     VectorGridProtobuf(url, "test").add_to(m)
     leaflet = _get_map_string(m)
     assert "var vector_grid_protobuf_div_1 = L.vectorGrid.protobuf(" in leaflet
+
+
+def test_deep_tree_does_not_recurse():
+    import folium
+
+    from streamlit_folium import generate_leaflet_string
+
+    m = folium.Map()
+    parent = m
+    for _ in range(1500):
+        parent = folium.FeatureGroup().add_to(parent)
+    folium.Marker([1, 2]).add_to(parent)
+
+    leaflet = generate_leaflet_string(m)
+    assert leaflet.count("L.featureGroup(") == 1500
+    # the tile layer is the map's first child
+    assert "var marker_div_1" + "_0" * 1500 + " = L.marker(" in leaflet
+
+
+def test_element_scripts_are_memoized(monkeypatch):
+    import folium
+
+    import streamlit_folium
+    from streamlit_folium import generate_leaflet_string
+
+    rendered = []
+    render_script = streamlit_folium._render_script
+
+    def counting_render_script(m):
+        rendered.append(type(m).__name__)
+        return render_script(m)
+
+    monkeypatch.setattr(streamlit_folium, "_render_script", counting_render_script)
+    monkeypatch.setattr(
+        streamlit_folium, "_script_cache", type(streamlit_folium._script_cache)()
+    )
+    monkeypatch.setattr(streamlit_folium, "_script_cache_bytes", 0)
+
+    def build():
+        m = folium.Map()
+        folium.Marker([1, 2], tooltip="x").add_to(m)
+        folium.GeoJson(
+            {"type": "Point", "coordinates": [2, 1]},
+            style_function=lambda _: {"color": "red"},
+        ).add_to(m)
+        m.render()
+        return m
+
+    first = generate_leaflet_string(build())
+    assert "Marker" in rendered
+    assert "Tooltip" in rendered
+
+    rendered.clear()
+    assert generate_leaflet_string(build()) == first
+    assert "Marker" not in rendered
+    assert "Tooltip" not in rendered
+    # holds a function and its map, so it is always rendered
+    assert "GeoJson" in rendered
+
+
+def test_script_cache_is_bounded_by_bytes(monkeypatch):
+    import folium
+
+    import streamlit_folium
+    from streamlit_folium import generate_leaflet_string
+
+    monkeypatch.setattr(
+        streamlit_folium, "_script_cache", type(streamlit_folium._script_cache)()
+    )
+    monkeypatch.setattr(streamlit_folium, "_script_cache_bytes", 0)
+    monkeypatch.setattr(streamlit_folium, "_SCRIPT_CACHE_BYTES", 4000)
+    monkeypatch.setattr(streamlit_folium, "_SCRIPT_CACHE_MAX_ENTRY", 2000)
+
+    m = folium.Map()
+    for i in range(20):
+        folium.Marker([i, i], tooltip=f"marker {i}").add_to(m)
+    folium.Marker([0, 0], tooltip="x" * 5000).add_to(m)
+    m.render()
+    generate_leaflet_string(m)
+
+    cache = streamlit_folium._script_cache
+    scripts = [script for script, _ in cache.values()]
+    assert streamlit_folium._script_cache_bytes == sum(map(len, scripts)) <= 4000
+    # too large to keep, and keys hold a digest rather than the state itself
+    assert not any("x" * 5000 in script for script in scripts)
+    assert all(len(digest) == 32 for _, digest in cache)
+
+
+def test_parallel_rendering_matches_serial():
+    import re
+
+    import folium
+
+    from streamlit_folium import generate_leaflet_string
+
+    def build():
+        m = folium.Map()
+        for g in range(6):
+            fg = folium.FeatureGroup(name=f"group {g}").add_to(m)
+            for i in range(4):
+                folium.Marker([g, i], tooltip=f"{g}-{i}").add_to(fg)
+                folium.GeoJson(
+                    {"type": "Point", "coordinates": [i, g]},
+                    style_function=lambda _: {"color": "red"},
+                ).add_to(fg)
+        folium.LayerControl().add_to(m)
+        m.render()
+        return m
+
+    def normalize(leaflet):
+        return re.sub(r"[0-9a-f]{32}", "<id>", leaflet)
+
+    serial = normalize(generate_leaflet_string(build()))
+    assert normalize(generate_leaflet_string(build(), workers=4)) == serial
+
+
+def test_structural_key_is_stable_and_tracks_content():
+    import folium
+
+    from streamlit_folium import _get_map_string, structural_key
+
+    def key_for(popup, zoom=5, key=None):
+        m = folium.Map(location=[40, -90], zoom_start=zoom)
+        fg = folium.FeatureGroup(name="fg").add_to(m)
+        folium.Marker([40, -90], popup=popup, tooltip="t").add_to(fg)
+        folium.GeoJson(
+            {"type": "Point", "coordinates": [-90, 40]},
+            style_function=lambda _: {"color": "red"},
+        ).add_to(m)
+        m.render()
+        signatures = []
+        _get_map_string(m, signatures=signatures)
+        return structural_key(signatures, key)
+
+    # folium assigns fresh random ids on every rerun
+    assert key_for("a") == key_for("a")
+    assert key_for("a") != key_for("b")
+    assert key_for("a") != key_for("a", zoom=6)
+    assert key_for("a") != key_for("a", key="map")
+
+
+def test_dependencies_are_collected_per_type():
+    import branca.colormap
+    import folium
+    import folium.plugins
+
+    from streamlit_folium import _get_map_string, get_dependencies
+
+    class Plugin(folium.plugins.MarkerCluster):
+        default_js = [("plugin", "https://example.com/plugin.js")]  # noqa: RUF012
+        default_css = []  # noqa: RUF012
+
+    m = folium.Map()
+    for _ in range(3):
+        folium.plugins.MarkerCluster([[0, 0]]).add_to(m)
+    Plugin().add_to(m)
+    branca.colormap.linear.YlGn_09.scale(0, 1).add_to(m)
+    m.render()
+
+    element_types = {}
+    _get_map_string(m, element_types=element_types)
+    assert list(element_types).count(folium.plugins.MarkerCluster) == 1
+
+    css_links, js_links = get_dependencies(element_types)
+    assert js_links[:2] == [
+        "https://d3js.org/d3.v4.min.js",
+        "https://cdnjs.cloudflare.com/ajax/libs/d3/3.5.5/d3.min.js",
+    ]
+    assert js_links[2].endswith("/leaflet.js")
+    assert len(js_links) == len(set(js_links))
+    assert "https://example.com/plugin.js" in js_links
+    assert any("markercluster" in link for link in css_links)
+
+    # link edits through folium's API are picked up on the next call
+    Plugin().add_js_link("extra", "https://example.com/extra.js")
+    assert "https://example.com/extra.js" in get_dependencies(element_types)[1]
+
+
+def test_st_folium_renders_once_and_splits_sections(monkeypatch):
+    import folium
+
+    import streamlit_folium
+
+    captured = {}
+    monkeypatch.setattr(
+        streamlit_folium, "_component_func", lambda **kwargs: captured.update(kwargs)
+    )
+
+    m = folium.Map()
+    folium.Marker([0, 0], icon=folium.Icon(color="green")).add_to(m)
+    folium.Element("<p>legend</p>").add_to(m.get_root().html, name="legend")
+    streamlit_folium.st_folium(m)
+
+    assert captured["script"].count(".setIcon(") == 1
+    assert "<script src=" not in captured["header"]
+    assert "<link rel=" not in captured["header"]
+    assert "#map_div {" in captured["header"]
+    assert captured["html"] == "<p>legend</p>"
+
+
+def test_st_folium_without_render_matches_a_map_render(monkeypatch):
+    import re
+
+    import folium
+
+    import streamlit_folium
+    from streamlit_folium import get_full_id
+
+    def make_map():
+        m = folium.Map()
+        folium.Marker([0, 0], tooltip="here").add_to(m)
+        folium.Element("<p>legend</p>").add_to(m.get_root().html, name="legend")
+        return m
+
+    # what st_folium sent before it read the sections part by part: the map
+    # alone rendered, then the whole header and html cleaned up with regexes
+    expected = make_map()
+    expected.render()
+    header = expected.get_root().header.render()
+    header = re.sub(r'<script src=".*?"></script>', "", header)
+    header = re.sub(r'<link rel="stylesheet" href=".*?"/>', "", header)
+    header = header.replace(get_full_id(expected), "map_div")
+    html = expected.get_root().html.render()
+    html = re.sub(r'<div class="folium-map" id=".*" ></div>', "", html).strip()
+
+    captured = {}
+    monkeypatch.setattr(
+        streamlit_folium, "_component_func", lambda **kwargs: captured.update(kwargs)
+    )
+    streamlit_folium.st_folium(make_map(), render=False)
+
+    def lines(text):
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+    assert '<meta name="viewport"' in captured["header"]
+    assert "#map_div {" in captured["header"]
+    assert lines(captured["header"]) == lines(header)
+    assert captured["html"] == html == "<p>legend</p>"
+
+
+def test_profile_reports_stages_and_payload(monkeypatch):
+    import folium
+
+    import streamlit_folium
+
+    frontend = {"script_load_ms": 12.5, "script_eval_ms": 3.0}
+    monkeypatch.setattr(
+        streamlit_folium,
+        "_component_func",
+        # the browser only adds its timings when asked to profile
+        lambda **kwargs: (
+            {"zoom": 4, "profile": dict(frontend)} if kwargs["profile"] else {"zoom": 4}
+        ),
+    )
+
+    m = folium.Map(location=[40, -90], zoom_start=4)
+    folium.Marker([40, -90]).add_to(m)
+    fg = folium.FeatureGroup(name="fg")
+    folium.Marker([41, -90]).add_to(fg)
+    value = streamlit_folium.st_folium(m, feature_group_to_add=fg, profile=True)
+
+    assert value["zoom"] == 4
+    report = value["profile"]
+    assert report["frontend"] == frontend
+    assert {
+        "render",
+        "html_header",
+        "script_render",
+        "script_rewrite",
+        "feature_groups",
+        "dependencies",
+        "hashing",
+        "total",
+    } <= set(report["python_ms"])
+    assert report["bytes"]["script"] > 0
+    assert report["bytes"]["total"] == sum(
+        size for name, size in report["bytes"].items() if name != "total"
+    )
+
+    # without profiling the component's value is returned untouched
+    assert "profile" not in streamlit_folium.st_folium(m, profile=False)
+
+
+def test_structural_key_tracks_template_text():
+    import folium
+    from branca.element import MacroElement
+    from folium.template import Template
+
+    from streamlit_folium import _get_map_string, structural_key
+
+    def key_for(message):
+        m = folium.Map()
+        element = MacroElement()
+        element._template = Template(
+            f"{{% macro script(this, kwargs) %}}console.log('{message}');"
+            "{% endmacro %}"
+        )
+        element.add_to(m)
+        m.render()
+        signatures = []
+        _get_map_string(m, signatures=signatures)
+        return structural_key(signatures)
+
+    assert key_for("A") == key_for("A")
+    assert key_for("A") != key_for("B")
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+from PIL import Image
+
+from demo_ui.receipts import RENDITIONS, ReceiptImages
+
+
+@pytest.fixture
+def images(tmp_path):
+    source = tmp_path / "data"
+    source.mkdir()
+    Image.effect_noise((700, 1000), 64).convert("RGBA").save(source / "e1.png")
+    return ReceiptImages(source, tmp_path / "cache")
+
+
+def test_renditions_are_small_webp(images):
+    original = (images.source_dir / "e1.png").stat().st_size
+    for rendition, width in RENDITIONS.items():
+        data = images.get("e1", rendition)
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            assert image.width == width
+        assert len(data) * 3 < original
+
+
+def test_renditions_are_cached_on_disk(images, tmp_path):
+    data = images.get("e1", "thumb")
+    assert list((tmp_path / "cache" / "thumb").glob("e1-*.webp"))
+
+    fresh = ReceiptImages(images.source_dir, images.cache_dir)
+    fresh._render = None  # a disk hit must not re-render
+    assert fresh.get("e1", "thumb") == data
+
+
+def test_memory_cache_is_bounded(images):
+    images.max_memory_bytes = 1
+    images.warm(["e1"])
+    assert len(images._memory) == 1
+
+
+def test_missing_or_unsafe_ids(images):
+    assert images.get("missing") is None
+    assert images.original_path("../data/e1") is None
+
+
+def test_concurrent_renders_of_one_receipt(images):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: images.get("e1", "thumb"), range(16)))
+        images._memory.clear()
+        results += list(executor.map(lambda _: images.get("e1", "thumb"), range(16)))
+
+    assert all(data for data in results)
+    assert not list(images.cache_dir.rglob("*.tmp"))
+
+
+def test_warm_async_runs_once_per_page(images, monkeypatch):
+    warmed = []
+    monkeypatch.setattr(images, "warm", warmed.append)
+    images.warm_async(["e1"])
+    images.warm_async(["e1"])
+    images._warmer.shutdown(wait=True)
+    assert warmed == [["e1"]]
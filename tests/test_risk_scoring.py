@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+MESSAGE = (
+    "審査結果です。 {'success': True, 'columns': ['違反項目', '内容'], "
+    "'rows': [['深夜', '23時以降'], ['酒類', '{注意}']]}"
+)
+
+
+def test_violation_data_is_parsed_from_the_last_bot_message():
+    from demo_ui.audit import last_bot_message, parse_violation_data, risk_score
+
+    responses = [
+        {"id": "1", "sender": "USER", "message": "e1"},
+        {"id": "2", "sender": "BOT", "message": MESSAGE},
+    ]
+    data = parse_violation_data(last_bot_message(responses))
+    assert data["columns"] == ["違反項目", "内容"]
+    assert risk_score(data) == 2
+    assert parse_violation_data("違反なし") is None
+    assert risk_score(None) == 0
+    assert risk_score({"success": False, "rows": [[1]]}) == 0
+
+
+def test_bot_messages_are_deduplicated_by_id():
+    from demo_ui.audit import bot_messages
+
+    responses = [
+        {"id": "1", "sender": "BOT", "message": "a"},
+        {"id": "1", "sender": "BOT", "message": "a"},
+        {"id": "2", "sender": "USER", "message": "b"},
+        {"id": "3", "sender": "BOT", "message": ""},
+        {"id": "4", "sender": "BOT", "message": "c"},
+    ]
+    assert bot_messages(responses) == ["a", "c"]
+
+
+class FakeAlli:
+    def start_conversation(self):
+        return "conv"
+
+    def ask(self, message, conversation_id):
+        assert conversation_id == "conv"
+        return [{"id": message, "sender": "BOT", "message": MESSAGE}]
+
+
+def test_score_expense():
+    from demo_ui.risk_scoring import score_expense
+
+    score = score_expense(FakeAlli(), "e1")
+    assert score.expense_id == "e1"
+    assert score.risk_score == 2
+    assert set(score.violations) == {"columns", "rows"}
+
+
+def test_batch_is_bounded_and_skips_failures():
+    from demo_ui.risk_scoring import RiskScore, score_expenses
+
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    saved = []
+
+    def scorer(expense_id):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        if expense_id == "bad":
+            raise RuntimeError("agent error")
+        return RiskScore(expense_id, 1)
+
+    ids = [f"e{i}" for i in range(10)] + ["bad"]
+    result = score_expenses(ids, scorer, saved.append, concurrency=3)
+
+    assert peak <= 3
+    assert result.scored == 10
+    assert result.failed == ["bad"]
+    assert sorted(s.expense_id for s in saved) == sorted(ids[:-1])
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from demo_ui.singleflight import SingleFlight
+
+
+def test_duplicate_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = 0
+
+    def agent_call():
+        nonlocal calls
+        calls += 1
+        release.wait(timeout=2)
+        return {"result": "ok"}
+
+    key = ("app", "e1", "e1")
+    with ThreadPoolExecutor(3) as executor:
+        futures = [executor.submit(flight.do, key, agent_call) for _ in range(3)]
+        while flight.snapshot()["waiting"] < 2:
+            pass
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert calls == 1
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert all(result == {"result": "ok"} for result, _ in results)
+    assert flight.snapshot() == {
+        "executions": 1,
+        "coalesced": 2,
+        "in_flight": 0,
+        "waiting": 0,
+    }
+
+
+def test_distinct_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.do("a", lambda: 3) == (3, False)
+    assert flight.stats.executions == 3
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(timeout=2)
+        raise RuntimeError("timeout")
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(flight.do, "k", failing) for _ in range(2)]
+        while flight.snapshot()["waiting"] < 1:
+            pass
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    assert flight.do("k", lambda: "retried") == ("retried", False)
+
+
+def test_interrupted_leader_hands_over_to_a_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    class Rerun(BaseException):
+        pass
+
+    def interrupted():
+        release.wait(timeout=2)
+        raise Rerun
+
+    with ThreadPoolExecutor(1) as executor:
+        leader = executor.submit(flight.do, "k", interrupted)
+        while flight.snapshot()["in_flight"] < 1:
+            pass
+        with ThreadPoolExecutor(1) as waiters:
+            waiter = waiters.submit(flight.do, "k", lambda: "own")
+            while flight.snapshot()["waiting"] < 1:
+                pass
+            release.set()
+            with pytest.raises(Rerun):
+                leader.result()
+            assert waiter.result() == ("own", False)
+
+    assert flight.snapshot()["in_flight"] == 0
@@ -0,0 +1,70 @@
+import random
+
+
+def test_nearest_matches_brute_force():
+    from streamlit_folium import PointIndex
+
+    rng = random.Random(0)
+    points = [(rng.uniform(20, 50), rng.uniform(-125, -65)) for _ in range(500)]
+    index = PointIndex(points, keys=range(len(points)))
+
+    for _ in range(200):
+        lat, lon = rng.uniform(20, 50), rng.uniform(-125, -65)
+        expected = min(
+            range(len(points)),
+            key=lambda i: (points[i][0] - lat) ** 2 + (points[i][1] - lon) ** 2,
+        )
+        assert index.nearest(lat, lon) == expected
+
+
+def test_nearest_respects_max_distance():
+    import pandas as pd
+
+    from streamlit_folium import PointIndex
+
+    df = pd.DataFrame(
+        {
+            "state": ["Alabama", "Alaska"],
+            "latitude": [32.377716, 58.301598],
+            "longitude": [-86.300568, -134.420212],
+        }
+    )
+    index = PointIndex.from_dataframe(df, key="state")
+    assert index.nearest(32.377716, -86.300568, max_distance=0.0001) == "Alabama"
+    assert index.nearest(40.0, -100.0, max_distance=0.0001) is None
+    assert PointIndex([], []).nearest(0, 0) is None
+
+
+def test_point_in_polygon_with_holes():
+    from streamlit_folium import PolygonIndex
+
+    square = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+    hole = [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]
+    data = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"name": "donut"},
+                "geometry": {"type": "Polygon", "coordinates": [square, hole]},
+            },
+            {
+                "type": "Feature",
+                "properties": {"name": "islands"},
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [
+                        [[[20, 0], [22, 0], [22, 2], [20, 2], [20, 0]]],
+                        [[[30, 0], [32, 0], [32, 2], [30, 2], [30, 0]]],
+                    ],
+                },
+            },
+        ],
+    }
+    index = PolygonIndex.from_geojson(data, "name", cell_size=5)
+
+    # coordinates are GeoJSON (lon, lat); queries are (lat, lon)
+    assert index.locate(lat=1, lon=1) == "donut"
+    assert index.locate(lat=5, lon=5) is None
+    assert index.locate(lat=1, lon=31) == "islands"
+    assert index.locate(lat=1, lon=25) is None